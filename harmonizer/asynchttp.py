@@ -0,0 +1,409 @@
+"""Minimal asyncio HTTP/1.1 client with pooled keep-alive connections.
+
+Catalog discovery is thousands of tiny GETs (period catalogs, item JSONs, S3
+list pages) against one host. With `urllib.request.urlopen` every one of them
+pays a fresh TCP + TLS handshake and parks a thread while it waits. This
+module multiplexes any number of in-flight requests over a small, bounded set
+of persistent connections per host, all driven by a single event loop.
+
+Stdlib only, like the rest of the discovery path. It implements just what the
+WB-LEN endpoints need: GET/HEAD, Content-Length and chunked bodies, keep-alive
+reuse, redirects, and status-based retry with a fixed backoff schedule. Non-2xx
+responses raise `urllib.error.HTTPError`, so callers keep the exception types
+they had with urllib.
+
+Proxies are left to urllib: a request whose host the ``http_proxy`` /
+``https_proxy`` / ``no_proxy`` environment (`urllib.request.getproxies`) routes
+through a proxy is sent with `urllib.request.urlopen` on a worker thread, so
+proxied networks behave exactly as they did before this client existed.
+
+`EventLoopThread` runs a loop on a daemon thread so synchronous code can
+submit coroutines to it (`run`) and share one pool across the process.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import email.message
+import json
+import logging
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Awaitable, Iterable, Optional, TypeVar
+
+from harmonizer.concurrency import AIMDController
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_USER_AGENT = "ntl-harmonizer"
+
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# Same cap as urllib's HTTPRedirectHandler.
+_MAX_REDIRECTS = 10
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]  # lower-cased names
+    body: bytes
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:  # pragma: no cover - already torn down
+            pass
+
+
+class _StaleConnection(Exception):
+    """A reused keep-alive connection was closed by the server before replying."""
+
+
+def _urlopen(
+    url: str, method: str, headers: Optional[dict[str, str]], timeout: float,
+) -> Response:
+    """One blocking exchange through urllib, for proxied hosts.
+
+    urllib follows redirects itself and raises `HTTPError` for non-2xx
+    statuses; those come back as a `Response` so `AsyncHTTPPool.get` applies
+    the same retry rules either way.
+    """
+    req = urllib.request.Request(
+        url, method=method, headers={"User-Agent": _USER_AGENT, **(headers or {})},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return Response(r.status, {k.lower(): v for k, v in r.headers.items()}, r.read())
+    except urllib.error.HTTPError as e:
+        with e:
+            return Response(e.code, {k.lower(): v for k, v in e.headers.items()}, e.read())
+
+
+class AsyncHTTPPool:
+    """Pooled keep-alive HTTP/1.1 client.
+
+    Parameters
+    ----------
+    max_connections_per_host : upper bound on open connections to one
+        (scheme, host, port). Requests beyond that wait for a free connection
+        instead of opening a new one.
+    timeout : default per-request timeout in seconds (connect + full body).
+        It starts once the request holds a connection slot, so time spent
+        queued behind other requests to the same host doesn't count.
+    retry_statuses / retry_delays : HTTP statuses that are retried, and the
+        sleep before each retry. One retry per entry in `retry_delays`.
+    controller : optional `AIMDController`; when given, the number of
+        requests in flight across all hosts is capped at its current limit,
+        and every request reports its latency and outcome (5xx and transport
+        errors and 429s count as failures) back to it.
+
+    Hosts that the proxy environment routes through a proxy are fetched with
+    urllib on a worker thread (same slots, gate and timeout); see the module
+    docstring.
+
+    Must only be used from the event loop it was first used on.
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 16,
+        timeout: float = 30.0,
+        retry_statuses: Iterable[int] = (),
+        retry_delays: Iterable[float] = (),
+        controller: Optional[AIMDController] = None,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.controller = controller
+        self._in_flight = 0
+        self._gate_waiters: collections.deque[asyncio.Future] = collections.deque()
+        self.timeout = timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_delays = tuple(retry_delays)
+        self._idle: dict[tuple, collections.deque[_Connection]] = {}
+        self._slots: dict[tuple, asyncio.Semaphore] = {}
+        self._ssl = ssl.create_default_context()
+        self._proxies = urllib.request.getproxies()
+        self._proxied: dict[tuple, bool] = {}
+
+    # ---- connection management -----------------------------------------
+
+    def _slot(self, key: tuple) -> asyncio.Semaphore:
+        sem = self._slots.get(key)
+        if sem is None:
+            sem = self._slots[key] = asyncio.Semaphore(self.max_connections_per_host)
+        return sem
+
+    async def _checkout(self, key: tuple) -> _Connection:
+        idle = self._idle.setdefault(key, collections.deque())
+        while idle:
+            conn = idle.pop()
+            if not conn.writer.is_closing() and not conn.reader.at_eof():
+                conn.reused = True
+                return conn
+            conn.close()
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            host, port,
+            ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+        )
+        return _Connection(reader, writer)
+
+    def _checkin(self, key: tuple, conn: _Connection) -> None:
+        self._idle.setdefault(key, collections.deque()).append(conn)
+
+    def _use_proxy(self, key: tuple) -> bool:
+        """True if urllib would send requests to `key`'s host via a proxy."""
+        proxied = self._proxied.get(key)
+        if proxied is None:
+            scheme, host, _ = key
+            proxied = self._proxied[key] = (
+                scheme in self._proxies and not urllib.request.proxy_bypass(host)
+            )
+        return proxied
+
+    # ---- adaptive gate --------------------------------------------------
+
+    async def _gate_enter(self) -> None:
+        assert self.controller is not None
+        while self._in_flight >= self.controller.limit:
+            fut = asyncio.get_running_loop().create_future()
+            self._gate_waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done():
+                    self._wake()  # pass our wake-up on to the next waiter
+                else:
+                    with contextlib.suppress(ValueError):
+                        self._gate_waiters.remove(fut)
+                raise
+        self._in_flight += 1
+
+    def _wake(self) -> None:
+        free = self.controller.limit - self._in_flight
+        while free > 0 and self._gate_waiters:
+            fut = self._gate_waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    def _gate_exit(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    async def close(self) -> None:
+        for idle in self._idle.values():
+            while idle:
+                idle.pop().close()
+
+    # ---- single request -------------------------------------------------
+
+    async def _roundtrip(
+        self, conn: _Connection, method: str, host_header: str, target: str,
+        headers: Optional[dict[str, str]],
+    ) -> tuple[Response, bool]:
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {host_header}",
+            f"User-Agent: {_USER_AGENT}",
+            "Accept: */*",
+            "Connection: keep-alive",
+        ]
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise _StaleConnection()
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        status = int(status)
+        hdrs: dict[str, str] = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            hdrs[name.strip().lower()] = value.strip()
+
+        keep_alive = version == "HTTP/1.1" and hdrs.get("connection", "").lower() != "close"
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif hdrs.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked(conn.reader)
+        elif "content-length" in hdrs:
+            body = await conn.reader.readexactly(int(hdrs["content-length"]))
+        else:
+            body = await conn.reader.read()
+            keep_alive = False
+        return Response(status, hdrs, body), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        parts: list[bytes] = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Drain optional trailers up to the terminating blank line.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(parts)
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def request(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Response:
+        """One request/response exchange, no status-based retries.
+
+        Redirects are followed (up to `_MAX_REDIRECTS`, like urllib), each
+        hop as its own exchange; a 303 turns the method into GET. A reused
+        connection that turns out to have been closed by the server is
+        transparently replaced with a fresh one. `timeout` covers the connect
+        and the exchange of each hop, not the wait for a free slot.
+        """
+        for _ in range(_MAX_REDIRECTS + 1):
+            resp = await self._request_once(url, method, headers, timeout)
+            location = resp.headers.get("location")
+            if resp.status not in _REDIRECT_STATUSES or not location:
+                return resp
+            url = urllib.parse.urljoin(url, location)
+            if resp.status == 303:
+                method = "GET"
+        raise urllib.error.HTTPError(
+            url, resp.status, f"more than {_MAX_REDIRECTS} redirects", None, None,
+        )
+
+    async def _request_once(
+        self,
+        url: str,
+        method: str,
+        headers: Optional[dict[str, str]],
+        timeout: Optional[float],
+    ) -> Response:
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname, port)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+
+        async def _go() -> Response:
+            if self._use_proxy(key):
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, _urlopen, url, method, headers, timeout or self.timeout,
+                )
+            while True:
+                conn = await self._checkout(key)
+                try:
+                    resp, keep_alive = await self._roundtrip(
+                        conn, method, parsed.netloc, target, headers
+                    )
+                except (_StaleConnection, ConnectionResetError, asyncio.IncompleteReadError):
+                    conn.close()
+                    if conn.reused:
+                        continue
+                    raise ConnectionResetError(f"connection closed fetching {url}")
+                except BaseException:
+                    conn.close()
+                    raise
+                if keep_alive:
+                    self._checkin(key, conn)
+                else:
+                    conn.close()
+                return resp
+
+        if self.controller is None:
+            async with self._slot(key):
+                return await asyncio.wait_for(_go(), timeout or self.timeout)
+        await self._gate_enter()
+        try:
+            async with self._slot(key):
+                loop = asyncio.get_running_loop()
+                t0 = loop.time()
+                ok = False
+                try:
+                    resp = await asyncio.wait_for(_go(), timeout or self.timeout)
+                    ok = resp.status < 500 and resp.status != 429
+                    return resp
+                finally:
+                    # Record before releasing so a raised limit wakes extra
+                    # waiters.
+                    self.controller.record(loop.time() - t0, ok)
+        finally:
+            self._gate_exit()
+
+    # ---- retrying helpers ----------------------------------------------
+
+    async def get(
+        self, url: str, headers: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        """GET with status-based retry; returns the body of a 2xx response."""
+        delays = iter(self.retry_delays)
+        while True:
+            resp = await self.request(url, headers=headers, timeout=timeout)
+            if 200 <= resp.status < 300:
+                return resp.body
+            wait = next(delays, None)
+            if resp.status not in self.retry_statuses or wait is None:
+                msg = email.message.Message()
+                for k, v in resp.headers.items():
+                    msg[k] = v
+                raise urllib.error.HTTPError(url, resp.status, f"HTTP {resp.status}", msg, None)
+            log.debug("HTTP %d fetching %s; retrying in %ss", resp.status, url, wait)
+            await asyncio.sleep(wait)
+
+    async def get_json(self, url: str, timeout: Optional[float] = None) -> dict:
+        return json.loads(await self.get(url, timeout=timeout))
+
+
+class EventLoopThread:
+    """An asyncio event loop running forever on a daemon thread."""
+
+    def __init__(self, name: str = "asynchttp"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, coro: Awaitable[T]):
+        """Schedule a coroutine; returns a `concurrent.futures.Future`."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """Run a coroutine on the loop thread and block for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("EventLoopThread.run called from its own loop thread")
+        return self.submit(coro).result()
+
+    def close(self) -> None:
+        """Stop the loop and join its thread. Pending coroutines are dropped."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
@@ -0,0 +1,197 @@
+"""Multi-ROI batch runs sharing catalog discovery and remote COG opens.
+
+`main.main` runs the pipeline for one ROI. Running it once per country walks
+the STAC catalog and opens the same remote orbit COGs again for every ROI,
+so HTTP traffic grows with orbits × countries. This entry point instead:
+
+    1. walks the catalog once per sensor over the union of all ROI bboxes
+       (`ingest.ingest_many`);
+    2. opens each overlapping orbit COG once and cuts every intersecting
+       ROI's window from that single open;
+    3. fans out to the usual per-ROI orbitprep → composite → calibrate →
+       fit → inference → diagnostics steps.
+
+Window, composite and model caches are the same per-ROI paths `main` uses,
+so a batch run and single-ROI runs share caches in both directions.
+
+Run:
+    python -m harmonizer.batch --roi roifiles/gadm36_* --prefix gadm_
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+from harmonizer.config import (
+    END_DATE,
+    INGEST_CACHE,
+    LUNAR_MASK_MODE,
+    PERIOD_FORMAT,
+    START_DATE,
+    TRAIN_YEAR,
+)
+from harmonizer.constants import SENSOR_DMSP, SENSOR_VIIRS
+from harmonizer.ingest import ingest_many
+from harmonizer.orbittable import OrbitTable
+from harmonizer.main import (
+    _composite_records,
+    _ingest_settings,
+    _ingest_table_path,
+    _ingest_kwargs,
+    _open_manifest,
+    _parse_date,
+    run_from_composites,
+)
+from harmonizer.utils import roi_bbox_from_path, roi_slug
+
+log = logging.getLogger(__name__)
+
+Bbox = tuple[float, float, float, float]
+
+
+def roi_name(roi: str) -> str:
+    """Trial-name stem for an ROI argument: the shapefile directory or file
+    name without a trailing ``_shp`` / ``.shp``, or the bbox slug for
+    "xmin,ymin,xmax,ymax" strings."""
+    p = Path(roi)
+    if roi.count(",") == 3 and not p.exists():
+        return roi_slug(roi_bbox_from_path(roi))
+    name = p.stem if p.suffix == ".shp" else p.name
+    return name[:-4] if name.endswith("_shp") else name
+
+
+def roi_names(rois: list[str]) -> dict[str, str]:
+    """Map each distinct ROI argument to a unique trial-name stem.
+
+    Arguments whose `roi_name` collides (e.g. two ``.../gadm36_FRA_shp``
+    directories) get ``-2``, ``-3``, ... suffixes in argument order, with a
+    warning, instead of one silently replacing the other. Repeated identical
+    arguments are kept once."""
+    names: dict[str, str] = {}
+    taken: set[str] = set()
+    for roi in dict.fromkeys(rois):
+        base = name = roi_name(roi)
+        n = 1
+        while name in taken:
+            n += 1
+            name = f"{base}-{n}"
+        if name != base:
+            log.warning("ROI %s: name %r already used; running it as %r", roi, base, name)
+        taken.add(name)
+        names[roi] = name
+    return names
+
+
+def run_batch(
+    rois: dict[str, Bbox],
+    start: datetime,
+    end: datetime,
+    train_year: int,
+    lunar_mode: str = LUNAR_MASK_MODE,
+    period_format: str = PERIOD_FORMAT,
+    est_factory=None,
+    trial_prefix: str = "",
+    skip_diagnostics: bool = False,
+) -> dict[str, bool]:
+    """Run the full pipeline for every ROI in `rois` ({name: bbox}).
+
+    est_factory, if given, is called once per ROI to build a fresh estimator
+    (estimators are fitted in place, so they can't be shared). Trials are
+    named ``trial_prefix + name``. A failure in one ROI's downstream steps is
+    logged and doesn't stop the others. Returns {name: succeeded}.
+    """
+    t0 = time.time()
+    print(
+        f"=== batch of {len(rois)} ROI(s): {start.date()} → {end.date()}, "
+        f"train={train_year}, mode={lunar_mode!r} ==="
+    )
+    bboxes = [tuple(b) for b in rois.values()]
+    status: dict[str, bool] = {}
+    manifest = _open_manifest()
+    try:
+        # 1–2. One discovery + one open per orbit layer, shared by all ROIs.
+        records_by_sensor: dict[str, dict[Bbox, OrbitTable]] = {}
+        for sensor in (SENSOR_DMSP, SENSOR_VIIRS):
+            t = time.time()
+            kwargs = _ingest_kwargs(sensor, lunar_mode=lunar_mode, period_format=period_format)
+            records_by_sensor[sensor] = ingest_many(
+                bboxes, start, end, sensor, INGEST_CACHE, manifest=manifest, **kwargs,
+            )
+            for bbox, table in records_by_sensor[sensor].items():
+                table.settings = _ingest_settings(kwargs)
+                table.save(_ingest_table_path(sensor, bbox, start, end))
+            print(f"  {sensor}: shared ingest in {time.time() - t:.1f}s")
+
+        # 3. Per-ROI fan-out.
+        for name, bbox in rois.items():
+            bbox = tuple(bbox)
+            trialname = f"{trial_prefix}{name}"
+            print(f"--- {trialname} ---")
+            t = time.time()
+            try:
+                composites_by_sensor: dict[str, list[dict]] = {}
+                slug_by_sensor: dict[str, str] = {}
+                for sensor in (SENSOR_DMSP, SENSOR_VIIRS):
+                    composites_by_sensor[sensor], slug_by_sensor[sensor] = _composite_records(
+                        sensor, bbox, records_by_sensor[sensor][bbox], lunar_mode,
+                        period_format, manifest,
+                    )
+                run_from_composites(
+                    trialname, composites_by_sensor, slug_by_sensor, train_year,
+                    est=est_factory() if est_factory is not None else None,
+                    skip_diagnostics=skip_diagnostics, manifest=manifest,
+                )
+            except Exception as e:
+                log.error("%s failed: %s", trialname, e)
+                status[name] = False
+                continue
+            status[name] = True
+            print(f"  {trialname} done in {time.time() - t:.1f}s")
+    finally:
+        manifest.close()
+
+    n_ok = sum(status.values())
+    print(f"DONE {n_ok}/{len(rois)} ROI(s) in {time.time() - t0:.1f}s")
+    return status
+
+
+def get_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument(
+        "--roi", nargs="+", required=True,
+        help="ROI shapefile paths/directories or 'xmin,ymin,xmax,ymax' bboxes in EPSG:4326",
+    )
+    p.add_argument("--prefix", default="", help="prepended to each ROI's trial name")
+    p.add_argument("--start", default=START_DATE.isoformat(), type=_parse_date)
+    p.add_argument("--end", default=END_DATE.isoformat(), type=_parse_date)
+    p.add_argument("--train-year", type=int, default=TRAIN_YEAR)
+    p.add_argument(
+        "--lunar-mode", default=LUNAR_MASK_MODE,
+        choices=["zero", "low", "all"],
+    )
+    p.add_argument("--period-format", default=PERIOD_FORMAT)
+    p.add_argument(
+        "--skip-diagnostics", action="store_true",
+        help="skip the post-run plots/metrics step",
+    )
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    args = get_args()
+    rois = {name: roi_bbox_from_path(r) for r, name in roi_names(args.roi).items()}
+    status = run_batch(
+        rois,
+        start=args.start,
+        end=args.end,
+        train_year=args.train_year,
+        lunar_mode=args.lunar_mode,
+        period_format=args.period_format,
+        trial_prefix=args.prefix,
+        skip_diagnostics=args.skip_diagnostics,
+    )
+    raise SystemExit(0 if all(status.values()) else 1)
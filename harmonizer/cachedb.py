@@ -0,0 +1,705 @@
+"""Manifest database for the stage caches.
+
+Every stage caches its outputs under `data/cache/<stage>/...` and used to
+decide "is this cached?" by stat-ing each file (`exists()` + `st_size`) and
+calling `mkdir` on its output directory on every call. On the network
+filesystems the cache usually lives on, a 20-year DMSP run turns that into
+hundreds of thousands of metadata round-trips.
+
+`CacheManifest` records every completed artifact in one SQLite file
+(`CACHE/manifest.sqlite`):
+
+    artifacts  path (primary key), stage, size, crc32 checksum, the producing
+               input key (a fingerprint of whatever the artifact was derived
+               from, or NULL), and a created-at timestamp
+
+Stages answer cache-hit questions with one indexed query and never touch the
+disk for a hit. A miss falls back to one stat so caches written before the
+manifest existed are adopted rather than recomputed. Because a hit is
+trusted without looking at the file, anything that deletes or edits cache
+files behind the manifest's back should be followed by `verify`:
+
+    python -m harmonizer.cachedb verify [--deep] [--adopt] [--dry-run]
+
+which drops rows whose file is gone or changed size (and, with --deep,
+whose checksum no longer matches) and optionally records orphan files found
+on disk.
+
+The manifest also holds ingest's negative results, so reruns don't reopen
+remote COGs just to reach the same dead end again:
+
+    negatives  (orbit_id, ROI slug, mode) → reason, detail, created-at
+
+Reasons are "no_overlap" (the ROI window misses the COG), "lunar",
+"ephemeris" and "prescreen" (rejected by a pre-filter; `mode` names the
+filter settings, so changing them is a miss; ephemeris verdicts are kept
+apart from flag/LI-tile verdicts, so a run with the ephemeris pre-screen off
+still checks the tile) and "failed" (a permanent error such as an HTTP 404
+or a missing LI file; `mode` names the layer that failed, so only runs that
+read that layer skip the orbit). Each reason has a TTL in `NEGATIVE_TTL`; the first
+four never expire, failures are retried after a week in case the product
+is republished. `python -m harmonizer.cachedb negatives [--clear] [--reason R]`
+lists or drops them.
+
+`SharedTier` adds an optional read-only cache tier (e.g. a team NFS path)
+in front of the private one: a manifest miss is looked up there before the
+stage recomputes, and hits are hard-linked (or copied) into the private
+cache. With write-back, artifacts recorded locally are also published to
+the shared tier, so one run warms the cache for everyone.
+
+`ensure_dir` is a process-wide memoized `mkdir` used by all stages.
+
+`build_lock` makes stage builds single-flight across threads and processes
+sharing one cache (two trials over overlapping ROIs, an estimator sweep):
+a stage checks its cache, takes the artifact's lock, checks again, and only
+then builds, so whoever claims an artifact first builds it and everyone
+else waits and reuses it. Locks are `flock`s on a ``.{name}.lock`` sidecar
+that is removed on release; the OS drops them when a process dies, so a
+crash never leaves an artifact claimed. Temporary files are named by
+`tmp_name`, unique per process and thread, so concurrent writers never
+share one.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: in-process locking only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+STAGES = ("ingest", "orbitprep", "composite", "calibrated", "viirs_prepped")
+
+# Same conservative bound-parameter chunking as `harmonizer.stacindex`.
+_IN_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path     TEXT PRIMARY KEY,
+    stage    TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    key      TEXT,
+    created  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_stage ON artifacts (stage);
+CREATE TABLE IF NOT EXISTS negatives (
+    orbit_id TEXT NOT NULL,
+    slug     TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    reason   TEXT NOT NULL,
+    detail   TEXT,
+    created  REAL NOT NULL,
+    PRIMARY KEY (orbit_id, slug, mode)
+);
+CREATE INDEX IF NOT EXISTS negatives_slug ON negatives (slug);
+"""
+
+# Seconds a negative result stays valid, per reason (None = until cleared).
+NEGATIVE_TTL: dict[str, Optional[float]] = {
+    "no_overlap": None,        # footprints and COG grids don't change
+    "lunar": None,             # keyed by the pre-filter settings
+    "ephemeris": None,         # same, plus the ephemeris margins
+    "prescreen": None,         # same
+    "failed": 7 * 86400.0,     # permanent errors, but products get republished
+}
+
+# ---------------------------------------------------------------------------
+# Memoized mkdir
+# ---------------------------------------------------------------------------
+
+_made_dirs: set[str] = set()
+_made_dirs_lock = threading.Lock()
+
+
+def ensure_dir(path: Path) -> Path:
+    """`path.mkdir(parents=True, exist_ok=True)`, at most once per process."""
+    key = str(path)
+    if key in _made_dirs:
+        return path
+    Path(path).mkdir(parents=True, exist_ok=True)
+    with _made_dirs_lock:
+        _made_dirs.add(key)
+    return path
+
+
+def file_checksum(path: Path) -> str:
+    """crc32 of the file contents, as ``crc32:<8 hex digits>``."""
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return f"crc32:{crc:08x}"
+
+
+def _chunks(seq: list, n: int = _IN_CHUNK):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _nonempty(path: Path) -> bool:
+    try:
+        return path.stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+
+def tmp_name(path: Path) -> Path:
+    """A temporary sibling of `path` unique to this process and thread."""
+    path = Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+# ---------------------------------------------------------------------------
+# Single-flight build locks
+# ---------------------------------------------------------------------------
+
+# In-process locks per artifact, refcounted so finished builds don't pile up.
+_build_locks: dict[str, list] = {}
+_build_locks_lock = threading.Lock()
+
+
+def lock_path(path: Path) -> Path:
+    """The sidecar `build_lock` flocks for `path`."""
+    path = Path(path)
+    return path.with_name(f".{path.name}.lock")
+
+
+def _flock(path: Path):
+    """Open and exclusively flock `path`, retrying until the locked file is
+    still the one at `path` (a releasing holder may have just unlinked it)."""
+    waited = False
+    while True:
+        f = open(path, "a")
+        try:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if not waited:
+                    log.debug("waiting for another process to build %s", path)
+                    waited = True
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+        except BaseException:
+            f.close()
+            raise
+        f.close()
+
+
+@contextlib.contextmanager
+def build_lock(path: Path):
+    """Hold the exclusive right to build the artifact at `path`.
+
+    Serialises threads of this process and, through an `flock` on
+    `lock_path(path)`, other processes on the same filesystem. Use it as
+    check, lock, check again:
+
+        if not cached(path):
+            with build_lock(path):
+                if not cached(path):
+                    build(path)
+
+    so a build someone else finished while this one waited is reused.
+    Artifacts built together (a composite's layers) share one lock: take
+    it on one of them.
+    """
+    key = str(path)
+    with _build_locks_lock:
+        entry = _build_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            if fcntl is None:
+                yield
+                return
+            ensure_dir(Path(path).parent)
+            lp = lock_path(path)
+            f = _flock(lp)
+            try:
+                yield
+            finally:
+                # Unlink while still holding the lock; waiters on the old
+                # file notice and retry on a fresh one.
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(lp)
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+    finally:
+        with _build_locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _build_locks[key]
+
+
+@contextlib.contextmanager
+def build_locks(paths: Iterable[Path]):
+    """`build_lock` on several artifacts at once, taken in sorted order so
+    two callers with overlapping sets can't deadlock."""
+    with contextlib.ExitStack() as stack:
+        for key in sorted({str(p) for p in paths}):
+            stack.enter_context(build_lock(Path(key)))
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Shared read-only tier
+# ---------------------------------------------------------------------------
+
+class SharedTier:
+    """A shared cache tier mirroring the private cache's layout.
+
+    The private artifact ``{local_root}/a/b.tif`` lives at ``{root}/a/b.tif``
+    in the shared tier, next to a ``b.tif.meta`` sidecar holding its size,
+    checksum and manifest input key. A shared artifact is only used when its
+    sidecar key matches the key the stage asks for and the materialized copy
+    has the recorded checksum, so a half-published or since-replaced file is
+    a miss, never a wrong hit.
+
+    Parameters
+    ----------
+    root : the shared tier directory (read-only unless `write_back`)
+    local_root : the private cache root (`harmonizer.config.CACHE`)
+    mode : how hits enter the private cache: "link" (hard link, falling back
+           to a copy across filesystems or without permission), "copy", or
+           "symlink" (use the shared file in place)
+    write_back : publish artifacts recorded locally to the shared tier
+    """
+
+    MODES = ("link", "copy", "symlink")
+
+    def __init__(self, root: Path, local_root: Path, mode: str = "link",
+                 write_back: bool = False):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.local_root = Path(local_root)
+        self.mode = mode
+        self.write_back = write_back
+
+    def shared_path(self, path: Path) -> Optional[Path]:
+        """Where `path` lives in the shared tier, or None if it isn't under
+        the private cache root."""
+        try:
+            return self.root / Path(path).relative_to(self.local_root)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _meta_path(shared: Path) -> Path:
+        return shared.with_name(shared.name + ".meta")
+
+    def _read_meta(self, shared: Path) -> Optional[dict]:
+        try:
+            with open(self._meta_path(shared)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _materialize(self, src: Path, dst: Path) -> None:
+        tmp = tmp_name(dst)
+        try:
+            if self.mode == "symlink":
+                os.symlink(src, tmp)
+            else:
+                try:
+                    if self.mode != "link":
+                        raise OSError("copy mode")
+                    os.link(src, tmp)
+                except OSError:
+                    shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def fetch(self, paths: list[Path], key: Optional[str] = None) -> Optional[dict[Path, str]]:
+        """Bring every one of `paths` in from the shared tier, or none.
+
+        Returns {path: checksum} when all are present with input key `key`
+        (not checked when None), else None and nothing is left behind.
+        """
+        pairs = []
+        for path in paths:
+            shared = self.shared_path(path)
+            meta = self._read_meta(shared) if shared is not None else None
+            if meta is None or (key is not None and meta.get("key") != key):
+                return None
+            try:
+                if shared.stat().st_size != meta["size"]:
+                    return None  # being republished
+            except FileNotFoundError:
+                return None
+            pairs.append((Path(path), shared, meta))
+        done: list[Path] = []
+        sums: dict[Path, str] = {}
+        try:
+            for path, shared, meta in pairs:
+                ensure_dir(path.parent)
+                self._materialize(shared, path)
+                done.append(path)
+                sums[path] = file_checksum(path)
+                if sums[path] != meta["checksum"]:
+                    raise ValueError(f"{shared} changed while being fetched")
+        except (OSError, ValueError) as e:
+            log.debug("shared tier miss for %s: %s", paths[0], e)
+            for path in done:
+                path.unlink(missing_ok=True)
+            return None
+        return sums
+
+    def publish(self, sums: dict[Path, str], key: Optional[str] = None) -> None:
+        """Copy local artifacts ({path: checksum}) into the shared tier.
+
+        Data goes in before its sidecar, each via an atomic rename, so
+        concurrent readers see either the old or the new artifact. Failures
+        (read-only mount, quota) are logged and otherwise ignored.
+        """
+        for path, checksum in sums.items():
+            shared = self.shared_path(path)
+            if shared is None:
+                continue
+            meta = {"size": os.stat(path).st_size, "checksum": checksum, "key": key}
+            if self._read_meta(shared) == meta:
+                continue
+            tmp = None
+            try:
+                ensure_dir(shared.parent)
+                tmp = tmp_name(shared)
+                shutil.copyfile(path, tmp)
+                os.replace(tmp, shared)
+                tmp = tmp_name(self._meta_path(shared))
+                with open(tmp, "w") as f:
+                    json.dump(meta, f)
+                os.replace(tmp, self._meta_path(shared))
+            except OSError as e:
+                log.warning("could not publish %s to the shared cache: %s", path, e)
+                if tmp is not None:
+                    tmp.unlink(missing_ok=True)
+
+
+class CacheManifest:
+    """SQLite record of completed cache artifacts.
+
+    Shared between threads (one connection guarded by a lock) and processes
+    (WAL journal plus a busy timeout), like `harmonizer.stacindex.STACItemIndex`.
+    Paths are stored as given (stages pass the absolute paths under CACHE).
+
+    With a `shared` tier, misses are looked up there before the stage
+    recomputes (see `SharedTier`), and input keys name inputs relative to
+    the private cache root so they agree between users. That changes the
+    keys of existing keyed artifacts, which are rebuilt once.
+    """
+
+    def __init__(self, path: Path, shared: Optional[SharedTier] = None):
+        self.path = Path(path)
+        self.shared = shared
+        ensure_dir(self.path.parent)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=60.0, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- writes ---------------------------------------------------------
+
+    def record(self, stage: str, path: Path, key: Optional[str] = None) -> None:
+        """Record a finished artifact (call after its final `os.replace`)."""
+        self.record_many(stage, [path], key)
+
+    def record_many(self, stage: str, paths: Iterable[Path], key: Optional[str] = None) -> None:
+        sums = {Path(p): file_checksum(p) for p in paths}
+        self._insert(stage, sums, key)
+        if self.shared is not None and self.shared.write_back:
+            self.shared.publish(sums, key)
+
+    def _insert(self, stage: str, sums: dict[Path, str], key: Optional[str]) -> None:
+        now = time.time()
+        rows = [
+            (str(p), stage, os.stat(p).st_size, checksum, key, now)
+            for p, checksum in sums.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (path, stage, size, checksum, key, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def forget(self, paths: Iterable[Path]) -> None:
+        keys = [str(p) for p in paths]
+        with self._lock, self._conn:
+            for chunk in _chunks(keys):
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM artifacts WHERE path IN ({marks})", chunk)
+
+    # ---- reads ----------------------------------------------------------
+
+    def has_all(
+        self, stage: str, paths: list[Path], key: Optional[str] = None,
+        adopt: bool = True,
+    ) -> bool:
+        """True if every path is recorded (with this input key, if given).
+
+        With `adopt`, files that already exist on disk with a non-zero size
+        but no recorded row count as hits and are recorded under `key`, so
+        caches from before the manifest keep working. Stages whose outputs
+        were never reused before the manifest (composites and later) pass
+        adopt=False, since an unrecorded file there says nothing about its
+        inputs. A recorded row with a different key is a miss. Misses are
+        then looked up in the shared tier, if there is one, and recorded
+        when found there.
+        """
+        strs = [str(p) for p in paths]
+        with self._lock:
+            rows = {}
+            for chunk in _chunks(strs):
+                marks = ",".join("?" * len(chunk))
+                rows.update(self._conn.execute(
+                    f"SELECT path, key FROM artifacts WHERE path IN ({marks})", chunk,
+                ))
+        # Recorded, but built from different inputs.
+        stale = [Path(p) for p in strs if p in rows and key is not None and rows[p] != key]
+        unrecorded = [Path(p) for p in strs if p not in rows]
+        if not stale and not unrecorded:
+            return True
+        if not stale and adopt and all(_nonempty(p) for p in unrecorded):
+            self.record_many(stage, unrecorded, key)
+            return True
+        if self.shared is None:
+            return False
+        sums = self.shared.fetch(stale + unrecorded, key)
+        if sums is None:
+            return False
+        self._insert(stage, sums, key)
+        return True
+
+    def has(
+        self, stage: str, path: Path, key: Optional[str] = None, adopt: bool = True,
+    ) -> bool:
+        return self.has_all(stage, [path], key, adopt)
+
+    def checksums(self, paths: Iterable[Path]) -> dict[str, str]:
+        """{path: checksum} for the recorded ones among `paths`."""
+        strs = [str(p) for p in paths]
+        out: dict[str, str] = {}
+        with self._lock:
+            for chunk in _chunks(strs):
+                marks = ",".join("?" * len(chunk))
+                out.update(self._conn.execute(
+                    f"SELECT path, checksum FROM artifacts WHERE path IN ({marks})", chunk,
+                ))
+        return out
+
+    def input_key(self, *parts, inputs: Iterable[Path] = ()) -> str:
+        """Fingerprint of an artifact's inputs: the given parameter values
+        plus each input path and its recorded checksum (or just the path if
+        it isn't recorded). Pass as `key` to `has_all` / `record_many`."""
+        inputs = sorted(str(p) for p in inputs)
+        sums = self.checksums(inputs)
+        h = hashlib.sha1()
+        for part in parts:
+            h.update(repr(part).encode())
+            h.update(b"\0")
+        for p in inputs:
+            name = p
+            if self.shared is not None:
+                shared = self.shared.shared_path(Path(p))
+                if shared is not None:
+                    name = str(shared.relative_to(self.shared.root))
+            h.update(f"{name}={sums.get(p, '')}".encode())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    # ---- negative results -----------------------------------------------
+
+    def record_negatives(
+        self, rows: Iterable[tuple[str, str, str, str, str]],
+    ) -> None:
+        """Record negative results as (orbit_id, slug, mode, reason, detail)."""
+        now = time.time()
+        rows = [(*row, now) for row in rows]
+        for reason in {row[3] for row in rows}:
+            if reason not in NEGATIVE_TTL:
+                raise ValueError(f"unknown negative reason {reason!r}")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO negatives "
+                "(orbit_id, slug, mode, reason, detail, created) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def negatives(
+        self, slugs: Iterable[str], modes: Iterable[str],
+    ) -> dict[tuple[str, str], str]:
+        """{(orbit_id, slug): reason} for unexpired negative results of
+        these ROI slugs recorded under any of `modes`."""
+        slugs = list(dict.fromkeys(slugs))
+        modes = set(modes)
+        now = time.time()
+        out: dict[tuple[str, str], str] = {}
+        with self._lock:
+            for chunk in _chunks(slugs):
+                marks = ",".join("?" * len(chunk))
+                cur = self._conn.execute(
+                    f"SELECT orbit_id, slug, mode, reason, created FROM negatives "
+                    f"WHERE slug IN ({marks})",
+                    chunk,
+                )
+                for orbit_id, slug, mode, reason, created in cur:
+                    ttl = NEGATIVE_TTL.get(reason, 0.0)
+                    if mode in modes and (ttl is None or now - created < ttl):
+                        out[(orbit_id, slug)] = reason
+        return out
+
+    def forget_negatives(self, reason: Optional[str] = None, expired_only: bool = False) -> int:
+        """Drop negative results (of one reason, or only the expired ones);
+        returns how many were dropped."""
+        now = time.time()
+        n = 0
+        with self._lock, self._conn:
+            for r, ttl in NEGATIVE_TTL.items():
+                if reason is not None and r != reason:
+                    continue
+                if expired_only:
+                    if ttl is None:
+                        continue
+                    cur = self._conn.execute(
+                        "DELETE FROM negatives WHERE reason = ? AND created < ?", (r, now - ttl),
+                    )
+                else:
+                    cur = self._conn.execute("DELETE FROM negatives WHERE reason = ?", (r,))
+                n += cur.rowcount
+        return n
+
+    def negative_counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT reason, COUNT(*) FROM negatives GROUP BY reason"
+            ).fetchall())
+
+    # ---- reconciliation -------------------------------------------------
+
+    def verify(
+        self,
+        roots: dict[str, Path],
+        deep: bool = False,
+        adopt: bool = False,
+        dry_run: bool = False,
+    ) -> dict[str, int]:
+        """Reconcile the manifest with the files under `roots` ({stage: dir}).
+
+        Drops rows whose file is missing or has a different size (and, with
+        `deep`, a different checksum). With `adopt`, records `.tif` files under
+        the roots that have no row. Returns counts per outcome.
+        """
+        counts = {"ok": 0, "missing": 0, "changed": 0, "orphans": 0, "adopted": 0}
+        with self._lock:
+            rows = self._conn.execute("SELECT path, stage, size, checksum FROM artifacts").fetchall()
+        stale: list[str] = []
+        known: set[str] = set()
+        for path, stage, size, checksum in rows:
+            known.add(path)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                counts["missing"] += 1
+                stale.append(path)
+                continue
+            if st.st_size != size or (deep and file_checksum(Path(path)) != checksum):
+                counts["changed"] += 1
+                stale.append(path)
+                continue
+            counts["ok"] += 1
+        if stale and not dry_run:
+            self.forget(stale)
+
+        for stage, root in roots.items():
+            root = Path(root)
+            if not root.exists():
+                continue
+            orphans = [
+                p for p in root.rglob("*.tif")
+                if str(p) not in known and p.stat().st_size > 0
+            ]
+            counts["orphans"] += len(orphans)
+            if adopt and orphans and not dry_run:
+                self.record_many(stage, orphans)
+                counts["adopted"] += len(orphans)
+        return counts
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def get_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = p.add_subparsers(dest="command", required=True)
+    v = sub.add_parser("verify", help="reconcile the manifest with the cache on disk")
+    v.add_argument("--deep", action="store_true", help="also re-checksum every file")
+    v.add_argument("--adopt", action="store_true", help="record cache files missing from the manifest")
+    v.add_argument("--dry-run", action="store_true", help="report only; change nothing")
+    n = sub.add_parser("negatives", help="list or clear ingest's negative results")
+    n.add_argument("--clear", action="store_true", help="drop them (default: only list counts)")
+    n.add_argument("--expired", action="store_true", help="with --clear, only drop expired ones")
+    n.add_argument("--reason", choices=sorted(NEGATIVE_TTL), default=None)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    from harmonizer.config import (
+        CACHE_MANIFEST,
+        CALIB_DIR,
+        COMPOSITE_DIR,
+        INGEST_CACHE,
+        PREP_DIR,
+        VIIRS_PREP_DIR,
+    )
+
+    args = get_args()
+    manifest = CacheManifest(CACHE_MANIFEST)
+    try:
+        if args.command == "negatives":
+            if args.clear:
+                print(f"dropped={manifest.forget_negatives(args.reason, args.expired)}")
+            counts = dict(sorted(manifest.negative_counts().items()))
+        else:
+            counts = manifest.verify(
+                {
+                    "ingest": INGEST_CACHE,
+                    "orbitprep": PREP_DIR,
+                    "composite": COMPOSITE_DIR,
+                    "calibrated": CALIB_DIR,
+                    "viirs_prepped": VIIRS_PREP_DIR,
+                },
+                deep=args.deep, adopt=args.adopt, dry_run=args.dry_run,
+            )
+    finally:
+        manifest.close()
+    print("  ".join(f"{k}={v}" for k, v in counts.items()))
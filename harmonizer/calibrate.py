@@ -22,10 +22,11 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
 
 from tqdm import tqdm
 
+from harmonizer.cachedb import CacheManifest, build_lock, ensure_dir, tmp_name
 from harmonizer.constants import SENSOR_DMSP, SENSOR_VIIRS
 from harmonizer.transformers.dmspcalibrate import DMSPstepwise
 from harmonizer.transformers.viirsprep import VIIRSprep
@@ -46,6 +47,7 @@ def calibrate_dmsp_composites(
     dst_dir: Path,
     preferred_sats: dict[str, list[str]],
     roi_slug: str,
+    manifest: Optional[CacheManifest] = None,
 ) -> list[dict]:
     """Run DMSPstepwise on each per-period composite, picking coefs by sat-year.
 
@@ -56,6 +58,9 @@ def calibrate_dmsp_composites(
     Outputs land at ``{dst_dir}/{roi_slug}/{period}/radiance.tif``. The slug
     must match the one used by the upstream ``OrbitPrep`` / ``Compositor``
     so cross-ROI runs cannot overwrite each other.
+
+    With a ``manifest``, periods whose output is recorded for the same input
+    composite and satellite-year are skipped.
     """
     dst_dir = Path(dst_dir)
     calibrator = DMSPstepwise(dstdir=dst_dir)  # dstdir kept for compatibility
@@ -74,10 +79,21 @@ def calibrate_dmsp_composites(
             )
             continue
         sat_year = f"{sat}{year}"
-        period_dir = dst_dir / roi_slug / period
-        period_dir.mkdir(parents=True, exist_ok=True)
+        period_dir = ensure_dir(dst_dir / roi_slug / period)
         dst_path = period_dir / "radiance.tif"
-        calibrator.transform(rec["radiance"], satellite_year=sat_year, dstpath=dst_path)
+        key = None
+        if manifest is not None:
+            key = manifest.input_key(sat_year, inputs=[rec["radiance"]])
+            if manifest.has("calibrated", dst_path, key, adopt=False):
+                out.append({**rec, "radiance": dst_path, "satellite_year": sat_year})
+                continue
+        with build_lock(dst_path):
+            if manifest is None or not manifest.has("calibrated", dst_path, key, adopt=False):
+                tmp = tmp_name(dst_path)
+                calibrator.transform(rec["radiance"], satellite_year=sat_year, dstpath=tmp)
+                tmp.replace(dst_path)
+                if manifest is not None:
+                    manifest.record("calibrated", dst_path, key)
         log.info("DMSP %s: applied coefs for %s -> %s", period, sat_year, dst_path)
         out.append({**rec, "radiance": dst_path, "satellite_year": sat_year})
     return out
@@ -92,6 +108,7 @@ def prep_viirs_composites(
     damperthresh: float = 1.0,
     usedask: bool = False,
     chunks: str | None = "auto",
+    manifest: Optional[CacheManifest] = None,
 ) -> list[dict]:
     """Run VIIRSprep on each per-period composite radiance raster.
 
@@ -102,6 +119,9 @@ def prep_viirs_composites(
     annual-composite pipeline. They may benefit from re-tuning at monthly
     cadence (the input is noisier than an annual composite) — flagged for a
     later sweep.
+
+    With a ``manifest``, periods whose output is recorded for the same input
+    composite and parameters are skipped.
     """
     dst_dir = Path(dst_dir)
     prepper = VIIRSprep(
@@ -118,10 +138,23 @@ def prep_viirs_composites(
         if rec["sensor"] != SENSOR_VIIRS:
             raise ValueError(f"expected viirs_npp record, got {rec['sensor']!r}")
         period = rec["period"]
-        period_dir = dst_dir / roi_slug / period
-        period_dir.mkdir(parents=True, exist_ok=True)
+        period_dir = ensure_dir(dst_dir / roi_slug / period)
         dst_path = period_dir / "radiance.tif"
-        prepper.transform(rec["radiance"], dstpath=dst_path)
+        key = None
+        if manifest is not None:
+            key = manifest.input_key(
+                pixelradius, sigma, damperthresh, inputs=[rec["radiance"]],
+            )
+            if manifest.has("viirs_prepped", dst_path, key, adopt=False):
+                out.append({**rec, "radiance": dst_path})
+                continue
+        with build_lock(dst_path):
+            if manifest is None or not manifest.has("viirs_prepped", dst_path, key, adopt=False):
+                tmp = tmp_name(dst_path)
+                prepper.transform(rec["radiance"], dstpath=tmp)
+                tmp.replace(dst_path)
+                if manifest is not None:
+                    manifest.record("viirs_prepped", dst_path, key)
         log.info("VIIRS %s: prep -> %s", period, dst_path)
         out.append({**rec, "radiance": dst_path})
     return out
@@ -0,0 +1,970 @@
+"""Pluggable raster I/O backends for COG window reads.
+
+`WindowedCOGReader` needs very little from a raster library: open a URL, look
+at its grid (crs, transform, size, bounds, profile) and read one band over a
+pixel window, optionally at a coarser `out_shape`. This module puts that
+behind a small backend interface, so the engine doing the I/O is chosen per
+run (`RASTER_BACKEND` in config, `backend=` on `ingest`) and can be compared
+with `scripts/bench_ingest.py --backend ...`:
+
+    gdal   rasterio/GDAL over /vsicurl/ (the default). Per-thread dataset
+           handles and one long-lived `rasterio.Env` per worker thread.
+    range  pure-Python COG reader over HTTP range requests. Each header is
+           parsed once per process; the tiles a window needs are fetched in
+           one round of requests, with byte ranges less than
+           `coalesce_gap` apart merged, over a pooled keep-alive
+           `AsyncHTTPPool`. No GDAL on the read path.
+    local  the same reader over local files (plain paths and file:// URLs,
+           e.g. an offline mirror from `harmonizer.mirror`).
+    auto   local for files, range for everything else.
+
+`open(url)` returns a dataset exposing the subset of rasterio's
+`DatasetReader` the reader uses (crs, transform, width, height, bounds,
+profile, nodata, `read(1, window=, out_shape=, resampling=)`), so window
+planning is backend-agnostic.
+
+The pure-Python reader covers what GDAL's COG driver writes for WB-LEN:
+single-band, tiled or stripped, classic or BigTIFF, either byte order;
+uncompressed, deflate, LZW or (with `zstandard` installed) zstd; horizontal
+and floating-point predictors; reduced-resolution IFDs as overviews
+(nearest-neighbour only); EPSG-coded GeoKeys and GDAL's nodata tag. Any
+other file raises `UnsupportedTIFF` at open, and the range/local backends
+hand that URL to their GDAL fallback for the rest of the run.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import struct
+import threading
+import urllib.parse
+import urllib.request
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Union
+
+from harmonizer.asynchttp import AsyncHTTPPool, EventLoopThread
+
+if TYPE_CHECKING:
+    import numpy as np
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ("gdal", "range", "local", "auto")
+
+# Open GDAL datasets kept per backend per thread (rasterio dataset handles
+# must not be shared between threads).
+_HANDLE_CACHE_SIZE = 8
+# Parsed pure-Python datasets kept per backend (thread-safe, shared).
+_DATASET_CACHE_SIZE = 256
+# Decoded blocks kept per process, so overlapping windows (several ROIs, or
+# a retry) don't fetch and inflate the same tile twice.
+_BLOCK_CACHE_BYTES = 64 << 20
+
+# First read of a file. GDAL's COG layout puts every IFD and the tile
+# offset/bytecount arrays at the start, so one request usually covers it.
+_HEADER_BYTES = 32 << 10
+# Tile byte ranges closer than this are fetched in one request; the gap is
+# read and discarded.
+_COALESCE_GAP = 16 << 10
+_MAX_REQUEST_BYTES = 8 << 20
+
+_HTTP_CONNECTIONS_PER_HOST = 32
+_HTTP_TIMEOUT = 60.0
+_HTTP_RETRY_STATUSES = (500, 502, 503, 504)
+_HTTP_RETRY_DELAYS = (0.5, 2.0)  # the reader retries whole windows on top
+
+
+class RasterBackend:
+    """Opens raster URLs for `WindowedCOGReader`.
+
+    Subclasses implement `open`; `evict` drops a (possibly broken) cached
+    dataset so the next `open` on any thread starts fresh,
+    `limit_thread_handles` caps what the calling thread keeps open, and
+    `close` releases whatever the backend holds. A closed backend may be
+    used again.
+    """
+
+    name = ""
+
+    def open(self, url: str):
+        raise NotImplementedError
+
+    def evict(self, url: str) -> None:
+        pass
+
+    def limit_thread_handles(self, n: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# GDAL
+# ---------------------------------------------------------------------------
+
+# Per-thread long-lived GDAL environment (see `_enter_thread_env`).
+_tls = threading.local()
+
+
+def _enter_thread_env(options: dict[str, str]) -> None:
+    """Make sure this thread is inside a `rasterio.Env` with `options`.
+
+    The env is entered once per thread and left open, instead of being built
+    and torn down around every read; it is only swapped if a backend with
+    different options runs on the same thread.
+    """
+    key = tuple(sorted(options.items()))
+    if getattr(_tls, "env_key", None) == key:
+        return
+    import rasterio
+
+    if getattr(_tls, "env", None) is not None:
+        _tls.env.__exit__(None, None, None)
+    env = rasterio.Env(**options)
+    env.__enter__()
+    _tls.env, _tls.env_key = env, key
+
+
+class GDALBackend(RasterBackend):
+    """rasterio/GDAL datasets in a small per-thread LRU.
+
+    `options` are GDAL config options for the thread's `rasterio.Env`.
+    Handles can't be closed from another thread, so `evict` bumps the URL's
+    generation and each thread reopens its own stale handle on its next
+    `open`.
+    """
+
+    name = "gdal"
+
+    def __init__(self, options: Optional[dict[str, str]] = None,
+                 handles_per_thread: int = _HANDLE_CACHE_SIZE):
+        self.options = dict(options or {})
+        self.handles_per_thread = handles_per_thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all_handles: list[collections.OrderedDict] = []
+        self._generations: dict[str, int] = {}
+
+    def _handles(self) -> collections.OrderedDict:
+        handles = getattr(self._local, "handles", None)
+        if handles is None:
+            handles = self._local.handles = collections.OrderedDict()
+            with self._lock:
+                self._all_handles.append(handles)
+        return handles
+
+    def open(self, url: str):
+        import rasterio
+
+        _enter_thread_env(self.options)
+        handles = self._handles()
+        generation = self._generations.get(url, 0)
+        entry = handles.pop(url, None)
+        if entry is not None:
+            src, opened_at = entry
+            if opened_at == generation and not src.closed:
+                handles[url] = entry
+                return src
+            _close_quietly(src)  # evicted since this thread opened it
+        src = rasterio.open(url)
+        handles[url] = (src, generation)
+        limit = getattr(self._local, "limit", self.handles_per_thread)
+        while len(handles) > limit:
+            _close_quietly(handles.popitem(last=False)[1][0])
+        return src
+
+    def evict(self, url: str) -> None:
+        with self._lock:
+            self._generations[url] = self._generations.get(url, 0) + 1
+        entry = self._handles().pop(url, None)
+        if entry is not None:
+            _close_quietly(entry[0])
+
+    def limit_thread_handles(self, n: int) -> None:
+        self._local.limit = n
+
+    def close(self) -> None:
+        """Close every handle opened on any thread. Only call once no other
+        thread is reading."""
+        with self._lock:
+            for handles in self._all_handles:
+                while handles:
+                    _close_quietly(handles.popitem()[1][0])
+
+
+def _close_quietly(src) -> None:
+    try:
+        src.close()
+    except Exception:  # pragma: no cover - already broken
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Byte sources
+# ---------------------------------------------------------------------------
+
+class _FileSource:
+    """Byte ranges of a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read_ranges(self, ranges: list[tuple[int, int]]) -> list[bytes]:
+        with open(self.path, "rb") as f:
+            out = []
+            for offset, length in ranges:
+                f.seek(offset)
+                out.append(f.read(length))
+            return out
+
+
+class _HTTPSource:
+    """Byte ranges of a remote file, all fetched concurrently on `loop`."""
+
+    def __init__(self, url: str, backend: "RangeBackend"):
+        self.url = url
+        self.backend = backend
+
+    async def _aget(self, pool: AsyncHTTPPool, offset: int, length: int) -> bytes:
+        body = await pool.get(
+            self.url, headers={"Range": f"bytes={offset}-{offset + length - 1}"},
+            timeout=self.backend.timeout,
+        )
+        if len(body) > length:  # server ignored Range and sent the whole file
+            body = body[offset:offset + length]
+        self.backend._count(1, len(body))
+        return body
+
+    async def _aread(self, pool: AsyncHTTPPool, ranges: list[tuple[int, int]]) -> list[bytes]:
+        return list(await asyncio.gather(*(self._aget(pool, o, n) for o, n in ranges)))
+
+    def read_ranges(self, ranges: list[tuple[int, int]]) -> list[bytes]:
+        loop, pool = self.backend._http()
+        return loop.run(self._aread(pool, ranges))
+
+
+def _coalesce(
+    ranges: list[tuple[int, int]], gap: int, max_bytes: int = _MAX_REQUEST_BYTES,
+) -> list[tuple[int, int, list[int]]]:
+    """Merge (offset, length) ranges less than `gap` apart.
+
+    Returns [(offset, length, [indices of the input ranges it covers])].
+    """
+    spans: list[list] = []
+    for i in sorted(range(len(ranges)), key=lambda i: ranges[i][0]):
+        offset, length = ranges[i]
+        if spans:
+            span = spans[-1]
+            end = span[0] + span[1]
+            if offset - end <= gap and max(end, offset + length) - span[0] <= max_bytes:
+                span[1] = max(end, offset + length) - span[0]
+                span[2].append(i)
+                continue
+        spans.append([offset, length, [i]])
+    return [tuple(s) for s in spans]
+
+
+def _read_coalesced(source, ranges: list[tuple[int, int]], gap: int) -> list[bytes]:
+    spans = _coalesce(ranges, gap)
+    bodies = source.read_ranges([(o, n) for o, n, _ in spans])
+    out: list[bytes] = [b""] * len(ranges)
+    for (offset, _, members), body in zip(spans, bodies):
+        for i in members:
+            start = ranges[i][0] - offset
+            out[i] = body[start:start + ranges[i][1]]
+    return out
+
+
+# ---------------------------------------------------------------------------
+# TIFF parsing
+# ---------------------------------------------------------------------------
+
+class UnsupportedTIFF(ValueError):
+    """The pure-Python reader can't decode this file (GDAL can)."""
+
+
+# TIFF field type → numpy dtype code (RATIONAL types are pairs).
+_FIELD_DTYPES = {
+    1: "u1", 2: "u1", 3: "u2", 4: "u4", 5: "u4", 6: "i1", 7: "u1", 8: "i2",
+    9: "i4", 10: "i4", 11: "f4", 12: "f8", 16: "u8", 17: "i8", 18: "u8",
+}
+_RATIONAL = (5, 10)
+
+_T_SUBFILE_TYPE = 254
+_T_WIDTH, _T_HEIGHT, _T_BITS, _T_COMPRESSION, _T_PHOTOMETRIC = 256, 257, 258, 259, 262
+_T_STRIP_OFFSETS, _T_SAMPLES, _T_ROWS_PER_STRIP, _T_STRIP_COUNTS = 273, 277, 278, 279
+_T_PREDICTOR, _T_TILE_W, _T_TILE_H, _T_TILE_OFFSETS, _T_TILE_COUNTS = 317, 322, 323, 324, 325
+_T_SAMPLE_FORMAT = 339
+_T_PIXEL_SCALE, _T_TIEPOINT, _T_MODEL_TRANSFORM, _T_GEOKEYS = 33550, 33922, 34264, 34735
+_T_GDAL_NODATA = 42113
+_TAGS = frozenset({
+    _T_SUBFILE_TYPE, _T_WIDTH, _T_HEIGHT, _T_BITS, _T_COMPRESSION, _T_PHOTOMETRIC,
+    _T_STRIP_OFFSETS, _T_SAMPLES, _T_ROWS_PER_STRIP, _T_STRIP_COUNTS, _T_PREDICTOR,
+    _T_TILE_W, _T_TILE_H, _T_TILE_OFFSETS, _T_TILE_COUNTS, _T_SAMPLE_FORMAT,
+    _T_PIXEL_SCALE, _T_TIEPOINT, _T_MODEL_TRANSFORM, _T_GEOKEYS, _T_GDAL_NODATA,
+})
+
+_COMPRESSION_NAMES = {1: None, 5: "lzw", 8: "deflate", 32946: "deflate", 50000: "zstd"}
+_MASK_SUBFILE = 4
+_MAX_IFDS = 64
+
+# GeoKeys
+_GK_RASTER_TYPE, _GK_GEOGRAPHIC, _GK_PROJECTED = 1025, 2048, 3072
+_PIXEL_IS_POINT = 2
+_USER_DEFINED = 32767
+
+# Overview choice for a downsampled read, matched to GDAL's for nearest
+# resampling: an overview of factor k serves a read at factor f when
+# k < f * _OVERVIEW_THRESHOLD + _OVERVIEW_SLACK (measured against GDAL 3.10).
+_OVERVIEW_THRESHOLD = 1.2
+_OVERVIEW_SLACK = 0.1
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdDecompressor()
+
+
+def _lzw_decode(data: bytes) -> bytes:
+    """TIFF LZW (MSB-first codes, 9–12 bits, early change)."""
+    data = bytes(data) + b"\0\0\0"
+    nbits = (len(data) - 3) * 8
+    out = bytearray()
+    table = [bytes((i,)) for i in range(256)] + [b"", b""]
+    width, pos, prev = 9, 0, None
+    while pos + width <= nbits:
+        byte = pos >> 3
+        chunk = int.from_bytes(data[byte:byte + 3], "big")
+        code = (chunk >> (24 - (pos & 7) - width)) & ((1 << width) - 1)
+        pos += width
+        if code == 257:  # end of information
+            break
+        if code == 256:  # clear
+            del table[258:]
+            width, prev = 9, None
+            continue
+        if prev is None:
+            entry = table[code]
+        elif code < len(table):
+            entry = table[code]
+            table.append(prev + entry[:1])
+        else:
+            entry = prev + prev[:1]
+            table.append(entry)
+        out += entry
+        prev = entry
+        if len(table) >= (1 << width) - 1 and width < 12:
+            width += 1
+    return bytes(out)
+
+
+@dataclass
+class _IFD:
+    """One image (full resolution or an overview) of a TIFF."""
+    width: int
+    height: int
+    dtype: object            # numpy dtype in file byte order
+    compression: int
+    predictor: int
+    block_w: int
+    block_h: int
+    tiled: bool
+    offsets: "np.ndarray"
+    counts: "np.ndarray"
+    subfile_type: int
+    tags: dict
+
+    @property
+    def blocks_across(self) -> int:
+        return -(-self.width // self.block_w)
+
+
+class _TIFFHeader:
+    """Reads IFDs from the first `_HEADER_BYTES` of a file, fetching any
+    value stored past them on demand."""
+
+    def __init__(self, source, prefix: bytes):
+        self.source = source
+        self.prefix = prefix
+        if prefix[:2] == b"II":
+            self.bo = "<"
+        elif prefix[:2] == b"MM":
+            self.bo = ">"
+        else:
+            raise UnsupportedTIFF("not a TIFF file")
+        version = self.unpack("H", 2)
+        if version == 42:
+            self.big, self.first = False, self.unpack("I", 4)
+        elif version == 43:
+            self.big, self.first = True, self.unpack("Q", 8)
+        else:
+            raise UnsupportedTIFF(f"unknown TIFF version {version}")
+
+    def read(self, offset: int, length: int) -> bytes:
+        if offset + length <= len(self.prefix):
+            return self.prefix[offset:offset + length]
+        data = self.source.read_ranges([(offset, length)])[0]
+        if len(data) < length:
+            raise UnsupportedTIFF(f"truncated TIFF at byte {offset}")
+        return data
+
+    def unpack(self, fmt: str, offset: int):
+        size = struct.calcsize("<" + fmt)
+        return struct.unpack(self.bo + fmt, self.read(offset, size))[0]
+
+    def ifds(self) -> list[dict]:
+        """Tag dicts of every IFD in file order."""
+        out = []
+        offset, seen = self.first, set()
+        entry_size, count_fmt, off_fmt = (20, "Q", "Q") if self.big else (12, "H", "I")
+        count_size = 8 if self.big else 2
+        field = 8 if self.big else 4
+        while offset and offset not in seen and len(out) < _MAX_IFDS:
+            seen.add(offset)
+            n = self.unpack(count_fmt, offset)
+            block = self.read(offset + count_size, n * entry_size + field)
+            tags = {}
+            for k in range(n):
+                entry = block[k * entry_size:(k + 1) * entry_size]
+                tag, typ = struct.unpack(self.bo + "HH", entry[:4])
+                if tag not in _TAGS or typ not in _FIELD_DTYPES:
+                    continue
+                count = struct.unpack(self.bo + off_fmt, entry[4:4 + field])[0]
+                size = int(_FIELD_DTYPES[typ][1]) * count * (2 if typ in _RATIONAL else 1)
+                value = entry[4 + field:]
+                if size > field:
+                    value = self.read(struct.unpack(self.bo + off_fmt, value)[0], size)
+                tags[tag] = self._decode(typ, count, value[:size])
+            out.append(tags)
+            offset = struct.unpack(self.bo + off_fmt, block[n * entry_size:])[0]
+        return out
+
+    def _decode(self, typ: int, count: int, raw: bytes):
+        import numpy as np
+
+        if typ == 2:
+            return raw.split(b"\0", 1)[0].decode("latin-1")
+        arr = np.frombuffer(raw, dtype=np.dtype(self.bo + _FIELD_DTYPES[typ]))
+        if typ in _RATIONAL:
+            arr = arr[0::2] / np.where(arr[1::2] == 0, 1, arr[1::2])
+        return arr
+
+
+def _first(tags: dict, tag: int, default=None):
+    value = tags.get(tag)
+    return default if value is None or len(value) == 0 else value[0].item()
+
+
+def _make_ifd(tags: dict, bo: str) -> _IFD:
+    import numpy as np
+
+    width, height = _first(tags, _T_WIDTH), _first(tags, _T_HEIGHT)
+    if not width or not height:
+        raise UnsupportedTIFF("IFD without image size")
+    if _first(tags, _T_SAMPLES, 1) != 1:
+        raise UnsupportedTIFF("more than one sample per pixel")
+    compression = _first(tags, _T_COMPRESSION, 1)
+    if compression not in _COMPRESSION_NAMES:
+        raise UnsupportedTIFF(f"compression {compression}")
+    if compression == 50000 and _zstd() is None:
+        raise UnsupportedTIFF("zstd compression without the zstandard package")
+    predictor = _first(tags, _T_PREDICTOR, 1)
+    if predictor not in (1, 2, 3):
+        raise UnsupportedTIFF(f"predictor {predictor}")
+    bits = _first(tags, _T_BITS, 1)
+    kind = {1: "u", 2: "i", 3: "f"}.get(_first(tags, _T_SAMPLE_FORMAT, 1))
+    if kind is None or bits not in (8, 16, 32, 64) or (kind == "f" and bits < 32):
+        raise UnsupportedTIFF(f"{bits}-bit samples of format {kind}")
+    if _T_TILE_OFFSETS in tags:
+        block_w, block_h = _first(tags, _T_TILE_W), _first(tags, _T_TILE_H)
+        offsets, counts, tiled = tags[_T_TILE_OFFSETS], tags.get(_T_TILE_COUNTS), True
+    else:
+        block_w, block_h = width, min(_first(tags, _T_ROWS_PER_STRIP, height), height)
+        offsets, counts, tiled = tags.get(_T_STRIP_OFFSETS), tags.get(_T_STRIP_COUNTS), False
+    if offsets is None or counts is None or len(offsets) != len(counts):
+        raise UnsupportedTIFF("missing block offsets")
+    return _IFD(
+        width=width, height=height, dtype=np.dtype(f"{bo}{kind}{bits // 8}"),
+        compression=compression, predictor=predictor, block_w=block_w,
+        block_h=block_h, tiled=tiled, offsets=offsets.astype(np.int64),
+        counts=counts.astype(np.int64), subfile_type=_first(tags, _T_SUBFILE_TYPE, 0),
+        tags=tags,
+    )
+
+
+def _georeference(tags: dict):
+    """(crs, transform) from a full-resolution IFD's GeoTIFF tags."""
+    from affine import Affine
+    from rasterio.crs import CRS
+
+    keys = tags.get(_T_GEOKEYS)
+    if keys is None or len(keys) < 4:
+        raise UnsupportedTIFF("no GeoKeys")
+    geokeys = {}
+    for k in range(int(keys[3])):
+        key_id, location, _, value = (int(v) for v in keys[4 + 4 * k:8 + 4 * k])
+        if location == 0:  # value stored inline
+            geokeys[key_id] = value
+    code = geokeys.get(_GK_PROJECTED) or geokeys.get(_GK_GEOGRAPHIC)
+    if not code or code == _USER_DEFINED:
+        raise UnsupportedTIFF("CRS is not an EPSG code")
+    crs = CRS.from_epsg(code)
+
+    if _T_MODEL_TRANSFORM in tags:
+        m = tags[_T_MODEL_TRANSFORM]
+        transform = Affine(m[0], m[1], m[3], m[4], m[5], m[7])
+    elif _T_PIXEL_SCALE in tags and _T_TIEPOINT in tags:
+        sx, sy = tags[_T_PIXEL_SCALE][:2]
+        i, j, _, x, y, _ = tags[_T_TIEPOINT][:6]
+        transform = Affine(sx, 0.0, x - i * sx, 0.0, -sy, y + j * sy)
+    else:
+        raise UnsupportedTIFF("no georeferencing tags")
+    if geokeys.get(_GK_RASTER_TYPE) == _PIXEL_IS_POINT:
+        transform = transform * Affine.translation(-0.5, -0.5)
+    return crs, transform
+
+
+# ---------------------------------------------------------------------------
+# Decoded-block cache
+# ---------------------------------------------------------------------------
+
+class _BlockCache:
+    """Thread-safe LRU of decoded blocks, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = _BLOCK_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: "collections.OrderedDict[tuple, np.ndarray]" = collections.OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            block = self._data.get(key)
+            if block is not None:
+                self._data.move_to_end(key)
+            return block
+
+    def put(self, key: tuple, block: "np.ndarray") -> None:
+        with self._lock:
+            if key in self._data:
+                return
+            self._data[key] = block
+            self._bytes += block.nbytes
+            while self._bytes > self.max_bytes and self._data:
+                self._bytes -= self._data.popitem(last=False)[1].nbytes
+
+    def drop(self, name: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k[0] == name]:
+                self._bytes -= self._data.pop(key).nbytes
+
+
+_blocks = _BlockCache()
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+class TIFFDataset:
+    """Read-only single-band GeoTIFF over a byte source.
+
+    Safe to share between threads: the parsed header is immutable and
+    decoded blocks go through the process-wide block cache.
+    """
+
+    count = 1
+
+    def __init__(self, name: str, source, ifds: list[_IFD], crs, transform,
+                 nodata, coalesce_gap: int = _COALESCE_GAP):
+        self.name = name
+        self.source = source
+        self.crs = crs
+        self.transform = transform
+        self.nodata = nodata
+        self.coalesce_gap = coalesce_gap
+        self._full = ifds[0]
+        # Overviews, finest first.
+        self._overviews = sorted(ifds[1:], key=lambda ifd: -ifd.width)
+        self.width, self.height = self._full.width, self._full.height
+        self.closed = False
+
+    @classmethod
+    def open(cls, name: str, source, coalesce_gap: int = _COALESCE_GAP) -> "TIFFDataset":
+        header = _TIFFHeader(source, source.read_ranges([(0, _HEADER_BYTES)])[0])
+        ifds = []
+        for tags in header.ifds():
+            subfile = _first(tags, _T_SUBFILE_TYPE, 0)
+            if subfile & _MASK_SUBFILE or _first(tags, _T_PHOTOMETRIC) == 4:
+                continue  # internal nodata masks; the band's nodata is enough here
+            ifds.append(_make_ifd(tags, header.bo))
+        if not ifds:
+            raise UnsupportedTIFF("no image IFD")
+        crs, transform = _georeference(ifds[0].tags)
+        nodata = ifds[0].tags.get(_T_GDAL_NODATA)
+        if nodata is not None:
+            nodata = float(nodata.strip())
+            if ifds[0].dtype.kind in "ui":
+                nodata = int(nodata)
+        return cls(name, source, ifds, crs, transform, nodata, coalesce_gap)
+
+    # ---- rasterio-compatible attributes -----------------------------------
+
+    @property
+    def dtypes(self) -> tuple[str]:
+        return (self._full.dtype.newbyteorder("=").name,)
+
+    @property
+    def bounds(self):
+        from rasterio.coords import BoundingBox
+
+        xs, ys = zip(*(self.transform * (c, r) for c in (0, self.width) for r in (0, self.height)))
+        return BoundingBox(min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def profile(self) -> dict:
+        profile = {
+            "driver": "GTiff",
+            "dtype": self.dtypes[0],
+            "nodata": self.nodata,
+            "width": self.width,
+            "height": self.height,
+            "count": 1,
+            "crs": self.crs,
+            "transform": self.transform,
+            "tiled": self._full.tiled,
+            "interleave": "band",
+        }
+        if self._full.tiled:
+            profile.update(blockxsize=self._full.block_w, blockysize=self._full.block_h)
+        compress = _COMPRESSION_NAMES[self._full.compression]
+        if compress:
+            profile["compress"] = compress
+        return profile
+
+    def close(self) -> None:
+        self.closed = True
+
+    # ---- reads ------------------------------------------------------------
+
+    def read(self, indexes=1, window=None, out_shape=None, resampling=None) -> "np.ndarray":
+        """Band 1 over `window` (full extent by default), optionally sampled
+        to `out_shape` from the best overview, nearest-neighbour."""
+        import numpy as np
+
+        if indexes != 1:
+            raise ValueError("only band 1 can be read")
+        if resampling is not None and getattr(resampling, "name", resampling) != "nearest":
+            raise ValueError("only nearest resampling is supported")
+        if window is None:
+            c0, r0, w, h = 0, 0, self.width, self.height
+        else:
+            c0, r0 = int(round(window.col_off)), int(round(window.row_off))
+            w, h = int(round(window.width)), int(round(window.height))
+        if c0 < 0 or r0 < 0 or c0 + w > self.width or r0 + h > self.height:
+            raise ValueError(f"window {window} outside the {self.width}x{self.height} raster")
+        if out_shape is None or tuple(out_shape[-2:]) == (h, w):
+            return self._read_region(self._full, r0, r0 + h, c0, c0 + w)
+
+        oh, ow = out_shape[-2:]
+        # GDAL's choice of target resolution (the finer axis, except for a
+        # single-row buffer), so both backends sample the same overview.
+        ifd = self._overview_for(w / ow if w / ow < h / oh or oh == 1 else h / oh)
+        sx, sy = self.width / ifd.width, self.height / ifd.height
+        cols = np.floor((c0 + (np.arange(ow) + 0.5) * w / ow) / sx).astype(np.int64)
+        rows = np.floor((r0 + (np.arange(oh) + 0.5) * h / oh) / sy).astype(np.int64)
+        cols = np.clip(cols, 0, ifd.width - 1)
+        rows = np.clip(rows, 0, ifd.height - 1)
+        region = self._read_region(
+            ifd, int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1,
+        )
+        return region[np.ix_(rows - rows[0], cols - cols[0])]
+
+    def _overview_for(self, factor: float) -> _IFD:
+        best = self._full
+        for ifd in self._overviews:
+            if self.width / ifd.width < factor * _OVERVIEW_THRESHOLD + _OVERVIEW_SLACK:
+                best = ifd
+        return best
+
+    def _read_region(self, ifd: _IFD, r0: int, r1: int, c0: int, c1: int) -> "np.ndarray":
+        import numpy as np
+
+        dtype = ifd.dtype.newbyteorder("=")
+        out = np.empty((r1 - r0, c1 - c0), dtype=dtype)
+        bw, bh = ifd.block_w, ifd.block_h
+        wanted = [
+            (by, bx)
+            for by in range(r0 // bh, (r1 - 1) // bh + 1)
+            for bx in range(c0 // bw, (c1 - 1) // bw + 1)
+        ]
+        blocks = self._blocks(ifd, [by * ifd.blocks_across + bx for by, bx in wanted])
+        for (by, bx), block in zip(wanted, blocks):
+            y0, x0 = by * bh, bx * bw
+            ys, ye = max(r0, y0), min(r1, y0 + block.shape[0])
+            xs, xe = max(c0, x0), min(c1, x0 + block.shape[1])
+            out[ys - r0:ye - r0, xs - c0:xe - c0] = block[ys - y0:ye - y0, xs - x0:xe - x0]
+        return out
+
+    def _blocks(self, ifd: _IFD, indices: list[int]) -> list["np.ndarray"]:
+        level = ifd.width
+        out: list = [_blocks.get((self.name, level, i)) for i in indices]
+        missing = [k for k, block in enumerate(out) if block is None]
+        if not missing:
+            return out
+        ranges = [(int(ifd.offsets[indices[k]]), int(ifd.counts[indices[k]])) for k in missing]
+        fetch = [k for k, (_, n) in zip(missing, ranges) if n > 0]
+        raw = dict(zip(fetch, _read_coalesced(
+            self.source, [ranges[missing.index(k)] for k in fetch], self.coalesce_gap,
+        ))) if fetch else {}
+        for k in missing:
+            block = self._decode(ifd, indices[k], raw.get(k))
+            _blocks.put((self.name, level, indices[k]), block)
+            out[k] = block
+        return out
+
+    def _decode(self, ifd: _IFD, index: int, raw: Optional[bytes]) -> "np.ndarray":
+        import numpy as np
+
+        rows = ifd.block_h
+        if not ifd.tiled:
+            rows = min(ifd.block_h, ifd.height - index * ifd.block_h)
+        shape = (rows, ifd.block_w)
+        native = ifd.dtype.newbyteorder("=")
+        if raw is None:  # sparse block
+            return np.full(shape, self.nodata or 0, dtype=native)
+        if ifd.compression in (8, 32946):
+            raw = zlib.decompress(raw)
+        elif ifd.compression == 5:
+            raw = _lzw_decode(raw)
+        elif ifd.compression == 50000:
+            raw = _zstd().decompress(raw, max_output_size=rows * ifd.block_w * native.itemsize)
+        n = rows * ifd.block_w
+        if ifd.predictor == 3:
+            size = native.itemsize
+            planes = np.frombuffer(raw, np.uint8, count=n * size).reshape(rows, size * ifd.block_w)
+            planes = np.cumsum(planes, axis=1, dtype=np.uint8)
+            # Each row is stored as byte planes, most significant first.
+            be = np.ascontiguousarray(planes.reshape(rows, size, ifd.block_w).transpose(0, 2, 1))
+            return be.view(f">{native.kind}{size}").reshape(shape).astype(native)
+        block = np.frombuffer(raw, ifd.dtype, count=n).reshape(shape).astype(native)
+        if ifd.predictor == 2:
+            block = np.cumsum(block, axis=1, dtype=native)
+        return block
+
+
+# ---------------------------------------------------------------------------
+# Pure-Python backends
+# ---------------------------------------------------------------------------
+
+class _DatasetCache:
+    """Thread-safe bounded LRU of open datasets keyed by URL."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "collections.OrderedDict[str, TIFFDataset]" = collections.OrderedDict()
+
+    def get(self, url: str) -> Optional[TIFFDataset]:
+        with self._lock:
+            ds = self._data.get(url)
+            if ds is not None:
+                self._data.move_to_end(url)
+            return ds
+
+    def put(self, url: str, ds: TIFFDataset) -> None:
+        with self._lock:
+            self._data[url] = ds
+            self._data.move_to_end(url)
+            while len(self._data) > self.maxsize:
+                _blocks.drop(self._data.popitem(last=False)[0])
+
+    def pop(self, url: str) -> None:
+        with self._lock:
+            self._data.pop(url, None)
+        _blocks.drop(url)
+
+    def clear(self) -> None:
+        with self._lock:
+            urls, self._data = list(self._data), collections.OrderedDict()
+        for url in urls:
+            _blocks.drop(url)
+
+
+class _TIFFBackend(RasterBackend):
+    """Shared open/evict logic of the pure-Python backends."""
+
+    def __init__(self, fallback: Optional[RasterBackend] = None,
+                 coalesce_gap: int = _COALESCE_GAP,
+                 max_datasets: int = _DATASET_CACHE_SIZE):
+        self.fallback = fallback
+        self.coalesce_gap = coalesce_gap
+        self._datasets = _DatasetCache(max_datasets)
+        self._lock = threading.Lock()
+        self._unsupported: set[str] = set()
+
+    def _source(self, url: str):
+        raise NotImplementedError
+
+    def open(self, url: str):
+        ds = self._datasets.get(url)
+        if ds is not None:
+            return ds
+        if url in self._unsupported:
+            return self._fallback_open(url)
+        try:
+            ds = TIFFDataset.open(url, self._source(url), self.coalesce_gap)
+        except UnsupportedTIFF as e:
+            log.info("%s: %s; reading it with %s", url, e,
+                     self.fallback.name if self.fallback else "no fallback")
+            with self._lock:
+                self._unsupported.add(url)
+            return self._fallback_open(url)
+        self._datasets.put(url, ds)
+        return ds
+
+    def _fallback_open(self, url: str):
+        if self.fallback is None:
+            raise UnsupportedTIFF(f"{url}: not readable by the {self.name} backend")
+        return self.fallback.open(url)
+
+    def evict(self, url: str) -> None:
+        self._datasets.pop(url)
+        if self.fallback is not None:
+            self.fallback.evict(url)
+
+    def limit_thread_handles(self, n: int) -> None:
+        if self.fallback is not None:
+            self.fallback.limit_thread_handles(n)
+
+    def close(self) -> None:
+        self._datasets.clear()
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+class LocalBackend(_TIFFBackend):
+    """Pure-Python reader over local files (paths or file:// URLs)."""
+
+    name = "local"
+
+    def _source(self, url: str) -> _FileSource:
+        parsed = urllib.parse.urlparse(url)
+        if parsed.scheme == "file":
+            return _FileSource(urllib.request.url2pathname(parsed.path))
+        if parsed.scheme and len(parsed.scheme) > 1:  # not a Windows drive letter
+            raise ValueError(f"the local backend only reads files, got {url}")
+        return _FileSource(url)
+
+
+class RangeBackend(_TIFFBackend):
+    """Pure-Python reader over HTTP range requests.
+
+    All requests go through one `AsyncHTTPPool` (up to
+    `max_connections_per_host` keep-alive connections per host) on the
+    backend's own event loop thread, started on first use. `stats()` reports
+    the requests and bytes fetched.
+    """
+
+    name = "range"
+
+    def __init__(self, fallback: Optional[RasterBackend] = None,
+                 coalesce_gap: int = _COALESCE_GAP,
+                 max_datasets: int = _DATASET_CACHE_SIZE,
+                 max_connections_per_host: int = _HTTP_CONNECTIONS_PER_HOST,
+                 timeout: float = _HTTP_TIMEOUT):
+        super().__init__(fallback, coalesce_gap, max_datasets)
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._loop: Optional[EventLoopThread] = None
+        self._pool: Optional[AsyncHTTPPool] = None
+        self._requests = 0
+        self._bytes = 0
+
+    def _http(self) -> tuple[EventLoopThread, AsyncHTTPPool]:
+        with self._lock:
+            if self._loop is None:
+                self._loop = EventLoopThread(name="cog-range")
+                self._pool = AsyncHTTPPool(
+                    max_connections_per_host=self.max_connections_per_host,
+                    timeout=self.timeout,
+                    retry_statuses=_HTTP_RETRY_STATUSES,
+                    retry_delays=_HTTP_RETRY_DELAYS,
+                )
+            return self._loop, self._pool
+
+    def _count(self, requests: int, nbytes: int) -> None:
+        with self._lock:
+            self._requests += requests
+            self._bytes += nbytes
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"requests": self._requests, "bytes": self._bytes}
+
+    def _source(self, url: str) -> _HTTPSource:
+        return _HTTPSource(url, self)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            loop, pool, self._loop, self._pool = self._loop, self._pool, None, None
+        if loop is not None:
+            loop.run(pool.close())
+            loop.close()
+
+
+class AutoBackend(RasterBackend):
+    """`local` for file paths and file:// URLs, `range` for the rest."""
+
+    name = "auto"
+
+    def __init__(self, local: LocalBackend, remote: RangeBackend):
+        self.local = local
+        self.remote = remote
+
+    def _pick(self, url: str) -> RasterBackend:
+        scheme = urllib.parse.urlparse(url).scheme
+        return self.local if scheme == "file" or len(scheme) <= 1 else self.remote
+
+    def open(self, url: str):
+        return self._pick(url).open(url)
+
+    def evict(self, url: str) -> None:
+        self._pick(url).evict(url)
+
+    def limit_thread_handles(self, n: int) -> None:
+        self.local.limit_thread_handles(n)
+        self.remote.limit_thread_handles(n)
+
+    def close(self) -> None:
+        self.local.close()
+        self.remote.close()
+
+
+def make_backend(
+    backend: Union[str, RasterBackend, None] = None,
+    gdal_env: Optional[dict[str, str]] = None,
+) -> RasterBackend:
+    """A backend by name (see `BACKENDS`; default "gdal"). Backend instances
+    are returned as-is. `gdal_env` configures GDAL, also where it is the
+    fallback of a pure-Python backend."""
+    if isinstance(backend, RasterBackend):
+        return backend
+    name = backend or "gdal"
+    if name == "gdal":
+        return GDALBackend(gdal_env)
+    if name == "range":
+        return RangeBackend(fallback=GDALBackend(gdal_env))
+    if name == "local":
+        return LocalBackend(fallback=GDALBackend(gdal_env))
+    if name == "auto":
+        fallback = GDALBackend(gdal_env)
+        return AutoBackend(LocalBackend(fallback), RangeBackend(fallback))
+    raise ValueError(f"unknown raster backend {name!r}; expected one of {', '.join(BACKENDS)}")
@@ -9,7 +9,9 @@ emit a single composite per period:
     obs_count.tif   number of valid observations per pixel (uint16)
 
 All three rasters share the orbit-level common ROI grid, so downstream
-harmonization can stack periods without further reprojection.
+harmonization can stack periods without further reprojection. li.tif can be
+left out of `outputs`, which is what lets a run opt out of ingesting LI (see
+`harmonizer.transformers.orbitprep.plan_layers`).
 
 The reducer ignores NaN; pixels with fewer than `min_obs` valid observations
 are emitted as NaN. Median is the EOG composite convention and is robust to
@@ -18,11 +20,12 @@ mean is provided as an option for users who want smoother outputs.
 """
 from __future__ import annotations
 
+import contextlib
 import logging
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional, Sequence
 
 from tqdm import tqdm
 
@@ -30,10 +33,14 @@ import numpy as np
 import rasterio
 from rasterio.windows import Window
 
+from harmonizer.cachedb import CacheManifest, build_lock, ensure_dir, tmp_name
 from harmonizer.constants import SENSOR_CONFIGS
+from harmonizer.orbittable import OrbitTable
 
 log = logging.getLogger(__name__)
 
+COMPOSITE_OUTPUTS = ("radiance", "li", "obs_count")
+
 REDUCERS = {
     "median": np.nanmedian,
     "mean": np.nanmean,
@@ -46,6 +53,12 @@ REDUCERS = {
 _COMPOSITE_BLOCK_ROWS = 256
 
 
+def _layer_refs(records: Sequence[dict], layer: str) -> list:
+    if isinstance(records, OrbitTable):
+        return records.refs(layer)
+    return [rec[layer] for rec in records]
+
+
 @dataclass
 class Compositor:
     """Reduce per-orbit rasters to per-period composites.
@@ -66,6 +79,12 @@ class Compositor:
                     (monthly). "%Y" for annual, "%Y%m%d" for daily.
     min_obs : minimum number of valid observations required per pixel; pixels
               below this threshold come out as NaN. Default 1.
+    outputs : composite layers to write, a subset of ``COMPOSITE_OUTPUTS``
+              that includes radiance and obs_count. Without "li" the input
+              records need no LI layer.
+    manifest : optional ``harmonizer.cachedb.CacheManifest``. When given, a
+               period whose outputs are recorded with the same inputs
+               (orbit files + checksums, method, min_obs) is not recomputed.
     """
 
     sensor: str
@@ -74,101 +93,151 @@ class Compositor:
     method: str = "median"
     period_format: str = "%Y%m"
     min_obs: int = 1
+    outputs: tuple[str, ...] = COMPOSITE_OUTPUTS
+    manifest: Optional[CacheManifest] = None
 
     def __post_init__(self):
         if self.sensor not in SENSOR_CONFIGS:
             raise ValueError(f"unknown sensor: {self.sensor}")
         if self.method not in REDUCERS:
             raise ValueError(f"method must be one of {list(REDUCERS)}, got {self.method!r}")
+        self.outputs = tuple(o for o in COMPOSITE_OUTPUTS if o in set(self.outputs))
+        if not {"radiance", "obs_count"} <= set(self.outputs):
+            raise ValueError(f"outputs must include radiance and obs_count, got {self.outputs!r}")
         self.dst_dir = Path(self.dst_dir)
 
     # ---- API ----------------------------------------------------------
 
     def aggregate(self, orbit_outputs: Iterable[dict]) -> list[dict]:
-        """Composite each period in the input stream. Returns one record per period."""
-        groups: dict[str, list[dict]] = defaultdict(list)
-        for rec in orbit_outputs:
-            if rec.get("radiance") is None or rec.get("li") is None:
-                continue
-            period = rec["orbit"].datetime.strftime(self.period_format)
-            groups[period].append(rec)
+        """Composite each period in the input stream. Returns one record per period.
+
+        An `OrbitTable` (from `OrbitPrep.transform_table`) is filtered and
+        grouped by period with vectorized column operations.
+        """
+        groups: dict[str, Sequence[dict]]
+        if isinstance(orbit_outputs, OrbitTable):
+            keep = orbit_outputs.has("radiance")
+            if self._with_li:
+                keep &= orbit_outputs.has("li")
+            groups = orbit_outputs[keep].group_by_period(self.period_format)
+        else:
+            groups = defaultdict(list)
+            for rec in orbit_outputs:
+                if rec.get("radiance") is None or (self._with_li and rec.get("li") is None):
+                    continue
+                period = rec["orbit"].datetime.strftime(self.period_format)
+                groups[period].append(rec)
 
         results: list[dict] = []
         for period in tqdm(sorted(groups), desc=f"{self.sensor} composite", unit="period"):
             results.append(self.composite_period(period, groups[period]))
         return results
 
-    def composite_period(self, period: str, records: list[dict]) -> dict:
-        """Reduce one period's worth of orbit records into a composite triplet.
+    @property
+    def _with_li(self) -> bool:
+        return "li" in self.outputs
+
+    def composite_period(self, period: str, records: Sequence[dict]) -> dict:
+        """Reduce one period's worth of orbit records into its composite rasters.
 
         Processes one row-strip at a time so the working set stays bounded by
         ``_COMPOSITE_BLOCK_ROWS`` regardless of how many orbits the period
         contains or how big the ROI grid is. Numerically identical to the
         full-frame version since every reducer here is per-pixel.
         """
-        out_dir = self.dst_dir / self.sensor / self.roi_slug / period
-        out_dir.mkdir(parents=True, exist_ok=True)
-        outs = {
-            "radiance": out_dir / "radiance.tif",
-            "li": out_dir / "li.tif",
-            "obs_count": out_dir / "obs_count.tif",
+        out_dir = ensure_dir(self.dst_dir / self.sensor / self.roi_slug / period)
+        outs = {name: out_dir / f"{name}.tif" for name in self.outputs}
+        result = {
+            "sensor": self.sensor,
+            "period": period,
+            "n_orbits": len(records),
+            **outs,
         }
-
-        with rasterio.open(records[0]["radiance"]) as src0:
+        rad_paths = _layer_refs(records, "radiance")
+        li_paths = _layer_refs(records, "li") if self._with_li else []
+        key = None
+        if self.manifest is not None:
+            key = self.manifest.input_key(
+                self.method, self.min_obs,
+                inputs=[p for pair in zip(rad_paths, li_paths) for p in pair]
+                if self._with_li else rad_paths,
+            )
+            if self.manifest.has_all("composite", list(outs.values()), key, adopt=False):
+                return result
+
+        # Single-flight: a concurrent run compositing the same period waits
+        # here and reuses the result.
+        with build_lock(outs["radiance"]):
+            if self.manifest is not None and self.manifest.has_all(
+                "composite", list(outs.values()), key, adopt=False,
+            ):
+                return result
+            self._write_composite(period, records, outs, rad_paths, li_paths, key)
+        return result
+
+    def _write_composite(
+        self, period: str, records: Sequence[dict], outs: dict[str, Path],
+        rad_paths: list, li_paths: list, key: Optional[str],
+    ) -> None:
+        with rasterio.open(rad_paths[0]) as src0:
             ref_profile = src0.profile.copy()
             height, width = src0.height, src0.width
 
-        rad_paths = [rec["radiance"] for rec in records]
-        li_paths = [rec["li"] for rec in records]
-
         rad_profile = self._float_profile(ref_profile)
         li_profile = self._float_profile(ref_profile)
         count_profile = self._count_profile(ref_profile)
 
-        rad_tmp = outs["radiance"].with_suffix(outs["radiance"].suffix + ".tmp")
-        li_tmp = outs["li"].with_suffix(outs["li"].suffix + ".tmp")
-        count_tmp = outs["obs_count"].with_suffix(outs["obs_count"].suffix + ".tmp")
+        tmps = {name: tmp_name(path) for name, path in outs.items()}
 
         reducer = REDUCERS[self.method]
         n_pixels_with_obs = 0
         max_obs = 0
 
-        with rasterio.open(rad_tmp, "w", **rad_profile) as rad_dst, \
-             rasterio.open(li_tmp, "w", **li_profile) as li_dst, \
-             rasterio.open(count_tmp, "w", **count_profile) as count_dst:
+        with contextlib.ExitStack() as stack:
+            rad_dst = stack.enter_context(rasterio.open(tmps["radiance"], "w", **rad_profile))
+            count_dst = stack.enter_context(rasterio.open(tmps["obs_count"], "w", **count_profile))
+            li_dst = (
+                stack.enter_context(rasterio.open(tmps["li"], "w", **li_profile))
+                if self._with_li else None
+            )
             for row_off in range(0, height, _COMPOSITE_BLOCK_ROWS):
                 rows = min(_COMPOSITE_BLOCK_ROWS, height - row_off)
                 window = Window(0, row_off, width, rows)
 
                 rad_block = np.empty((len(records), rows, width), dtype=np.float32)
-                li_block = np.empty((len(records), rows, width), dtype=np.float32)
-                for i, (rp, lp) in enumerate(zip(rad_paths, li_paths)):
+                for i, rp in enumerate(rad_paths):
                     with rasterio.open(rp) as src:
                         src.read(1, window=window, out=rad_block[i])
-                    with rasterio.open(lp) as src:
-                        src.read(1, window=window, out=li_block[i])
 
                 valid = np.isfinite(rad_block)
                 obs_count_block = valid.sum(axis=0).astype(np.uint16)
                 with np.errstate(all="ignore"):
                     rad_out_block = reducer(rad_block, axis=0).astype(np.float32)
-                    li_out_block = np.nanmean(li_block, axis=0).astype(np.float32)
 
                 below_min = obs_count_block < self.min_obs
                 rad_out_block[below_min] = np.nan
-                li_out_block[below_min] = np.nan
 
                 rad_dst.write(rad_out_block, 1, window=window)
-                li_dst.write(li_out_block, 1, window=window)
                 count_dst.write(obs_count_block, 1, window=window)
 
+                if li_dst is not None:
+                    li_block = np.empty((len(records), rows, width), dtype=np.float32)
+                    for i, lp in enumerate(li_paths):
+                        with rasterio.open(lp) as src:
+                            src.read(1, window=window, out=li_block[i])
+                    with np.errstate(all="ignore"):
+                        li_out_block = np.nanmean(li_block, axis=0).astype(np.float32)
+                    li_out_block[below_min] = np.nan
+                    li_dst.write(li_out_block, 1, window=window)
+
                 n_pixels_with_obs += int((obs_count_block > 0).sum())
                 if obs_count_block.size:
                     max_obs = max(max_obs, int(obs_count_block.max()))
 
-        rad_tmp.replace(outs["radiance"])
-        li_tmp.replace(outs["li"])
-        count_tmp.replace(outs["obs_count"])
+        for name, tmp in tmps.items():
+            tmp.replace(outs[name])
+        if self.manifest is not None:
+            self.manifest.record_many("composite", outs.values(), key)
 
         log.info(
             "%s %s: %d orbits → composite has %d/%d pixels with >=1 obs (max=%d)",
@@ -176,13 +245,6 @@ class Compositor:
             height * width, max_obs,
         )
 
-        return {
-            "sensor": self.sensor,
-            "period": period,
-            "n_orbits": len(records),
-            **outs,
-        }
-
     # ---- IO helpers ---------------------------------------------------
 
     @staticmethod
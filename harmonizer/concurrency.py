@@ -0,0 +1,287 @@
+"""Adaptive (AIMD) concurrency control for the ingest worker pools.
+
+A fixed worker count is wrong somewhere: too low on a cloud VM next to the
+bucket, too high on a laptop or a throttled shared network, where extra
+in-flight requests just queue up and time out together during S3 slowdowns.
+
+`AIMDController` keeps a concurrency *limit* and adjusts it from observed
+request outcomes, TCP-style:
+
+  - additive increase: after each evaluation window with a low error rate,
+    latency near the best seen, and throughput that didn't drop, the limit
+    grows by `increase`;
+  - multiplicative decrease: an error-rate above `error_threshold` or a
+    latency blow-up past `latency_tolerance` × baseline cuts the limit by
+    `decrease`. A burst of failures (e.g. timeouts) cuts it at most once per
+    window so one bad moment doesn't collapse it to the floor.
+
+Every change is logged at INFO with the stats that caused it. The controller
+is pure bookkeeping; `AdaptiveSemaphore` gates threads on it, and
+`harmonizer.asynchttp.AsyncHTTPPool` gates coroutines on it.
+
+`HedgeController` is the bookkeeping for hedged requests: it tracks a
+running latency quantile (the hedge delay) and a token-bucket budget that
+caps duplicates at a fixed fraction of all requests.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+
+class AIMDController:
+    """Thread-safe AIMD concurrency limit.
+
+    Parameters
+    ----------
+    name : label used in log lines (e.g. "window reads")
+    initial, minimum, maximum : starting limit and its bounds
+    increase : additive step per healthy window
+    decrease : multiplicative factor applied on overload (0 < decrease < 1)
+    latency_tolerance : median latency above this multiple of the baseline
+        (best recent median) counts as overload
+    error_threshold : error fraction above which a window counts as overload
+    min_window : minimum number of samples per evaluation window; the window
+        is also at least the current limit, so every slot reports once
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.5,
+        error_threshold: float = 0.05,
+        min_window: int = 8,
+    ):
+        if not 0 < decrease < 1:
+            raise ValueError(f"decrease must be in (0, 1), got {decrease}")
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.min_window = min_window
+        self._limit = min(max(initial, self.minimum), self.maximum)
+        self._lock = threading.Lock()
+        self._latencies: list[float] = []
+        self._errors = 0
+        self._window_start = time.monotonic()
+        self._baseline: float | None = None
+        self._last_throughput = 0.0
+        self._cut_this_window = False
+        self._listeners: list = []
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def add_listener(self, fn) -> None:
+        """Call fn(new_limit) after every change (used to wake waiters)."""
+        self._listeners.append(fn)
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Report one finished request."""
+        with self._lock:
+            self._latencies.append(latency)
+            if not ok:
+                self._errors += 1
+                # Errors back off right away rather than at window end.
+                if not self._cut_this_window and self._errors >= 2:
+                    self._set_limit(int(self._limit * self.decrease), "errors")
+                    self._cut_this_window = True
+            if len(self._latencies) >= max(self.min_window, self._limit):
+                self._evaluate()
+            new = self._limit
+        for fn in self._listeners:
+            fn(new)
+
+    def _evaluate(self) -> None:
+        n = len(self._latencies)
+        elapsed = max(time.monotonic() - self._window_start, 1e-6)
+        p50 = sorted(self._latencies)[n // 2]
+        err = self._errors / n
+        throughput = n / elapsed
+        if self._baseline is None or p50 < self._baseline:
+            self._baseline = p50
+        else:
+            # Let the baseline creep up so a permanently slower network
+            # doesn't pin the limit at the floor forever.
+            self._baseline *= 1.05
+        stats = f"p50 {p50:.2f}s, {throughput:.1f} req/s, err {100 * err:.0f}%"
+        if err > self.error_threshold or p50 > self.latency_tolerance * self._baseline:
+            if not self._cut_this_window:
+                self._set_limit(int(self._limit * self.decrease), stats)
+        elif throughput >= 0.9 * self._last_throughput:
+            self._set_limit(self._limit + self.increase, stats)
+        self._last_throughput = throughput
+        self._latencies.clear()
+        self._errors = 0
+        self._cut_this_window = False
+        self._window_start = time.monotonic()
+
+    def _set_limit(self, new: int, why: str) -> None:
+        new = min(max(new, self.minimum), self.maximum)
+        if new != self._limit:
+            log.info("%s concurrency %d -> %d (%s)", self.name, self._limit, new, why)
+            self._limit = new
+
+
+class AdaptiveSemaphore:
+    """A counting semaphore whose capacity follows an `AIMDController`."""
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        controller.add_listener(self._on_change)
+
+    def _on_change(self, _limit: int) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.controller.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(
+        self, overload: Optional[Callable[[BaseException], bool]] = None,
+    ) -> Iterator[None]:
+        """Hold one slot for the duration of the block and report its
+        latency and outcome.
+
+        An exception counts as an error, unless `overload` is given and
+        returns False for it: errors load has nothing to do with (a 404)
+        are then not reported at all, so they can't cut the limit.
+        """
+        self.acquire()
+        t0 = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release()
+            if overload is None or overload(e):
+                self.controller.record(time.monotonic() - t0, False)
+            raise
+        self.release()
+        self.controller.record(time.monotonic() - t0, True)
+
+
+class HedgeController:
+    """Thread-safe hedge delay and budget for duplicate ("hedged") requests.
+
+    A request still running after `delay()` seconds may be duplicated if
+    `try_hedge()` grants a token. Every primary request earns `budget`
+    tokens (up to `burst`) and every hedge spends one, so over any stretch
+    of requests at most about `budget` of them are duplicated, however slow
+    the backend gets.
+
+    Parameters
+    ----------
+    name : label used in log lines (e.g. "window reads")
+    quantile : latency quantile used as the hedge delay
+    budget : hedges allowed per primary request
+    burst : most tokens that can be saved up
+    min_delay : floor on the delay, so fast local reads are never hedged
+    window : number of recent latencies the quantile is taken over
+    warmup : samples needed before any hedging
+    """
+
+    def __init__(
+        self,
+        name: str,
+        quantile: float = 0.95,
+        budget: float = 0.05,
+        burst: float = 10.0,
+        min_delay: float = 0.05,
+        window: int = 512,
+        warmup: int = 20,
+    ):
+        if not 0 < quantile < 1:
+            raise ValueError(f"quantile must be in (0, 1), got {quantile}")
+        self.name = name
+        self.quantile = quantile
+        self.budget = budget
+        self.burst = burst
+        self.min_delay = min_delay
+        self.warmup = warmup
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        self._since_update = 0
+        self._tokens = 0.0
+        self._requests = 0
+        self._hedges = 0
+        self._wins = 0
+        self._denied = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging a request, or None (still warming up)."""
+        return self._delay
+
+    def record(self, latency: float) -> None:
+        """Report the latency of one finished attempt (primary or hedge)."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_update += 1
+            # Re-sorting every 16 samples keeps this cheap at high request rates.
+            if len(self._latencies) >= self.warmup and (
+                self._delay is None or self._since_update >= 16
+            ):
+                ordered = sorted(self._latencies)
+                q = ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+                self._delay = max(q, self.min_delay)
+                self._since_update = 0
+
+    def start(self) -> None:
+        """Count one primary request (earning budget)."""
+        with self._lock:
+            self._requests += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one token on a hedge if the budget allows."""
+        with self._lock:
+            if self._tokens < 1.0:
+                self._denied += 1
+                return False
+            self._tokens -= 1.0
+            self._hedges += 1
+            return True
+
+    def hedge_won(self) -> None:
+        with self._lock:
+            self._wins += 1
+
+    def stats(self) -> dict[str, float]:
+        """Counters so far: requests, hedges, wins (the hedge finished
+        first), denied (over budget), rate (hedges / requests) and the
+        current delay."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "wins": self._wins,
+                "denied": self._denied,
+                "rate": self._hedges / self._requests if self._requests else 0.0,
+                "delay": self._delay,
+            }
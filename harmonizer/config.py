@@ -10,6 +10,7 @@ imported them, see `harmonizer.downloader` for the deprecation note.
 """
 from __future__ import annotations
 
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -42,6 +43,18 @@ TRAIN_YEAR = 2013
 # composite convention by default. Valid: "zero" | "low" | "all".
 LUNAR_MASK_MODE = "zero"
 
+# Per-period composite layers to write (subset of "radiance", "li",
+# "obs_count"; radiance and obs_count are always written).
+COMPOSITE_OUTPUTS = ("radiance", "li", "obs_count")
+
+# Experimental: in "zero" lunar mode with "li" left out of COMPOSITE_OUTPUTS,
+# don't ingest LI at all (see `harmonizer.transformers.orbitprep.plan_layers`).
+# Validity then rests on the radiance range and the zero-lunar flag bit, so a
+# VIIRS no-observation pixel that LI == -999.3 would have caught is only
+# masked if its bit and radiance also give it away. Not yet checked against
+# real archive orbits; leave off for science runs.
+SKIP_LI_IN_ZERO_MODE = False
+
 ###################################
 # OPTIONAL CHANGES
 ###################################
@@ -56,6 +69,42 @@ SAMPLEMETHOD = "average"
 # resolution at inference. See harmonize.py docstring for full discussion.
 DOWNSAMPLEVIIRS = True
 
+# Orbits whose exact swath footprint covers no more than this fraction of the
+# ROI's area are dropped at discovery, before any COG is opened. 0.0 keeps
+# every orbit with real overlap; e.g. 0.01 also drops sliver-edge passes.
+MIN_FOOTPRINT_OVERLAP = 0.0
+
+# Ingest cache backend: "gtiff" writes three small GeoTIFFs per orbit; "hdf5"
+# appends them to one chunked file per period under INGEST_STORE (see
+# harmonizer.orbitstore), which is much faster on large runs.
+INGEST_BACKEND = "gtiff"
+
+# Raster I/O engine for ingest window reads (see harmonizer.cogio): "gdal"
+# (rasterio), "range" (pure-Python COG reader over pooled HTTP range
+# requests), "local" (same reader over local files, e.g. an offline mirror)
+# or "auto" (local for files, range otherwise).
+RASTER_BACKEND = "gdal"
+
+# Hedged window reads: a read still running after the running p95 latency
+# gets one duplicate request (at most ~5% extra reads) and the first copy to
+# finish wins, so a stalled S3 connection doesn't hold up a whole period.
+HEDGE_WINDOW_READS = True
+
+# Flag-tile pre-screen: orbits whose ROI window has less than this fraction
+# of pixels free of the PRESCREEN_FLAGS bit groups (see
+# `SensorConfig.prescreen_bits`) are dropped before radiance/LI are read, and
+# the same bits are masked in orbitprep. None disables both.
+PRESCREEN_MIN_USABLE_FRAC = None
+PRESCREEN_FLAGS = ("cloud",)
+
+# Coverage-targeted orbit selection (see harmonizer.selection): fetch each
+# period's most useful orbits first and stop once COVERAGE_MIN_PIXEL_FRAC of
+# the ROI's pixels have COVERAGE_TARGET_OBS valid observations. Reached
+# counts are recorded under data/cache/ingest/selection/. None fetches every
+# orbit.
+COVERAGE_TARGET_OBS = None
+COVERAGE_MIN_PIXEL_FRAC = 1.0
+
 ###################################
 # PATHS — usually no need to change
 ###################################
@@ -72,6 +121,27 @@ PREP_DIR = Path(CACHE, "orbitprep")          # per-orbit masked + warped clips
 COMPOSITE_DIR = Path(CACHE, "composite")     # per-period (radiance, li, obs_count) composites
 CALIB_DIR = Path(CACHE, "calibrated")        # post-DMSPstepwise per-period DMSP rasters
 VIIRS_PREP_DIR = Path(CACHE, "viirs_prepped")  # post-VIIRSprep per-period VIIRS rasters
+INGEST_STORE = Path(CACHE, "ingest_h5")      # same, as per-period HDF5 (INGEST_BACKEND="hdf5")
+ORBIT_TABLES = Path(CACHE, "tables")         # ingest results as OrbitTable .npz per sensor/ROI/date range
+# Persistent STAC catalog/item index (SQLite) so repeat runs skip discovery.
+STAC_INDEX = Path(CACHE, "stac_index.sqlite")
+# Opt-in cache of remote COG tiles by URL + tile x/y, shared by every ROI
+# (see harmonizer.tilecache), e.g. Path(CACHE, "tiles.sqlite"). Worth it when
+# many overlapping ROIs are run; the per-ROI window files are still written,
+# so every fetched pixel is stored twice, and it grows with everything ever
+# fetched: `python -m harmonizer.tilecache prune`. None (default) reads windows
+# straight from the remote COGs.
+TILE_CACHE = None
+# Manifest of completed cache artifacts (see harmonizer.cachedb).
+CACHE_MANIFEST = Path(CACHE, "manifest.sqlite")
+# Optional shared read-only cache tier (e.g. a team NFS copy of data/cache,
+# see harmonizer.cachedb.SharedTier), set via $NTL_SHARED_CACHE. Misses in
+# CACHE are looked up there first; hits are hard-linked ("link", copied
+# across filesystems), "copy"-ed or "symlink"-ed into CACHE. With
+# SHARED_CACHE_WRITE_BACK, new artifacts are also published to it.
+SHARED_CACHE = Path(os.environ["NTL_SHARED_CACHE"]) if os.environ.get("NTL_SHARED_CACHE") else None
+SHARED_CACHE_MODE = "link"
+SHARED_CACHE_WRITE_BACK = False
 for d in (INGEST_CACHE, PREP_DIR, COMPOSITE_DIR, CALIB_DIR, VIIRS_PREP_DIR):
     d.mkdir(parents=True, exist_ok=True)
 
@@ -13,13 +13,22 @@ hardcodes a NoData value or a bit position should pull it from here.
 """
 from __future__ import annotations
 
+import logging
+import os
 import re
-from dataclasses import dataclass
-from typing import Callable
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+log = logging.getLogger(__name__)
 
 S3_BUCKET = "globalnightlight"
 S3_REGION = "us-east-1"
-S3_HTTPS_BASE = f"https://{S3_BUCKET}.s3.amazonaws.com"
+# Root every catalog, item and COG URL hangs off. Override with the
+# NTL_WBLEN_BASE_URL environment variable (before importing harmonizer) to
+# point the whole pipeline at a stand-in, e.g. scripts/fake_wblen.py.
+S3_HTTPS_BASE = os.environ.get(
+    "NTL_WBLEN_BASE_URL", f"https://{S3_BUCKET}.s3.amazonaws.com"
+).rstrip("/")
 
 ROOT_CATALOG_URL = f"{S3_HTTPS_BASE}/catalog.json"
 DMSP_CATALOG_URL = f"{S3_HTTPS_BASE}/DMSP_catalog.json"
@@ -39,6 +48,17 @@ VIIRS_LI_NODATA = -999.3
 OLS_ZERO_LUNAR_ILLUM_BIT = 11
 VIIRS_ZERO_LUNAR_ILLUM_BIT = 5
 
+# QA flag bits evaluated by the flag-tile pre-screen (see
+# `harmonizer.ingest._process_orbit_rois`) and, when it is enabled, masked by
+# OrbitPrep. Set ⇒ the pixel is unusable for that reason.
+# Caveat: the VIIRS cloud bit is the VCM cloud flag (0x0004) as documented for
+# the EOG nightly vflag, but it hasn't been confirmed against the LEN layer
+# notes, so it is listed in `unconfirmed_groups` and using it logs a warning.
+# The OLS flag's cloud convention is not pinned down yet, so DMSP has no
+# cloud bits; asking for them logs that the pre-screen / mask is a no-op.
+VIIRS_CLOUD_BITS = (2,)
+OLS_CLOUD_BITS: tuple[int, ...] = ()
+
 # DMSP filename: F16200501010404.night.OIS.{vis|li|flag|tir|samples}.co.tif
 # Same orbit prefix across all six layers, so substitution is direct.
 _DMSP_RADIANCE_RE = re.compile(r"\.OIS\.vis\.co\.tif$")
@@ -106,7 +126,7 @@ def _viirs_flag_from_radiance(url: str) -> str:
 def _viirs_li_from_radiance(url: str) -> str:  # pragma: no cover
     raise NotImplementedError(
         "VIIRS LI URL must be resolved by S3 prefix lookup (different "
-        "processing timestamp). Use ingest.resolve_viirs_li_url()."
+        "processing timestamp). Use ingest.ViirsLIResolver."
     )
 
 
@@ -128,6 +148,48 @@ class SensorConfig:
     radiance_range: tuple[float, float]
     li_from_radiance: Callable[[str], str]
     flag_from_radiance: Callable[[str], str]
+    # Named groups of flag bits for the pre-screen, e.g. {"cloud": (2,)}.
+    prescreen_bits: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    # Groups whose bit positions aren't confirmed against the product docs.
+    unconfirmed_groups: frozenset[str] = frozenset()
+
+    def flag_bits(self, names: Iterable[str]) -> tuple[int, ...]:
+        """Union of the named `prescreen_bits` groups (unknown names raise).
+
+        Logs a warning (once per group) for a group with no bits, which
+        masks nothing, and for an unconfirmed one.
+        """
+        bits: set[int] = set()
+        for name in names:
+            if name not in self.prescreen_bits:
+                raise ValueError(
+                    f"{self.name}: unknown pre-screen flag group {name!r} "
+                    f"(have {sorted(self.prescreen_bits)})"
+                )
+            group = self.prescreen_bits[name]
+            if not group:
+                _warn_once(
+                    (self.name, name, "empty"),
+                    "%s: no %r flag bits are known; that pre-screen / mask is a no-op",
+                    self.name, name,
+                )
+            elif name in self.unconfirmed_groups:
+                _warn_once(
+                    (self.name, name, "unconfirmed"),
+                    "%s: %r flag bits %s are unconfirmed against the product docs",
+                    self.name, name, group,
+                )
+            bits.update(group)
+        return tuple(sorted(bits))
+
+
+_warned: set[tuple] = set()
+
+
+def _warn_once(key: tuple, msg: str, *args) -> None:
+    if key not in _warned:
+        _warned.add(key)
+        log.warning(msg, *args)
 
 
 SENSOR_CONFIGS = {
@@ -139,6 +201,7 @@ SENSOR_CONFIGS = {
         radiance_range=DMSP_RADIANCE_RANGE,
         li_from_radiance=_dmsp_li_from_radiance,
         flag_from_radiance=_dmsp_flag_from_radiance,
+        prescreen_bits={"cloud": OLS_CLOUD_BITS},
     ),
     SENSOR_VIIRS: SensorConfig(
         name=SENSOR_VIIRS,
@@ -148,5 +211,7 @@ SENSOR_CONFIGS = {
         radiance_range=VIIRS_RADIANCE_RANGE,
         li_from_radiance=_viirs_li_from_radiance,
         flag_from_radiance=_viirs_flag_from_radiance,
+        prescreen_bits={"cloud": VIIRS_CLOUD_BITS},
+        unconfirmed_groups=frozenset({"cloud"}),
     ),
 }
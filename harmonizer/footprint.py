@@ -0,0 +1,137 @@
+"""Exact item-footprint / ROI intersection for orbit discovery.
+
+Orbit swaths are long diagonal strips, so an item's axis-aligned `bbox` is
+mostly empty and overlaps far more ROIs than the swath itself does. Before
+this check, those items were only rejected after their COGs had been opened.
+
+`overlap_fraction(item, roi_bbox)` clips the item's footprint polygon to the
+ROI rectangle (Sutherland–Hodgman; the clip window is convex, so concave
+swath outlines are handled) and returns the covered fraction of the ROI's
+area. The footprint is the asset's valid-data polygon when the item carries
+one (STAC projection extension `proj:geometry` in EPSG:4326), else the item
+`geometry`. Areas are planar in degrees, which is plenty for a ratio over an
+ROI-sized window. Pure Python, no shapely.
+
+Returns None when the footprint can't be used (missing or unsupported
+geometry, or a ring spanning the antimeridian); callers then fall back to
+the bbox test.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+Bbox = tuple[float, float, float, float]  # (xmin, ymin, xmax, ymax) in EPSG:4326
+Ring = list[tuple[float, float]]
+
+
+def _ring_area(ring: Ring) -> float:
+    """Unsigned shoelace area of a ring (closing vertex optional)."""
+    n = len(ring)
+    if n < 3:
+        return 0.0
+    s = 0.0
+    for i in range(n):
+        x0, y0 = ring[i]
+        x1, y1 = ring[(i + 1) % n]
+        s += x0 * y1 - x1 * y0
+    return abs(s) / 2.0
+
+
+def clip_ring(ring: Ring, bbox: Bbox) -> Ring:
+    """Sutherland–Hodgman clip of a ring against an axis-aligned rectangle."""
+    xmin, ymin, xmax, ymax = bbox
+
+    def _clip(pts: Ring, inside, cross) -> Ring:
+        out: Ring = []
+        if not pts:
+            return out
+        prev = pts[-1]
+        for cur in pts:
+            if inside(cur):
+                if not inside(prev):
+                    out.append(cross(prev, cur))
+                out.append(cur)
+            elif inside(prev):
+                out.append(cross(prev, cur))
+            prev = cur
+        return out
+
+    def _at_x(x):
+        def cross(p, q):
+            t = (x - p[0]) / (q[0] - p[0])
+            return (x, p[1] + t * (q[1] - p[1]))
+        return cross
+
+    def _at_y(y):
+        def cross(p, q):
+            t = (y - p[1]) / (q[1] - p[1])
+            return (p[0] + t * (q[0] - p[0]), y)
+        return cross
+
+    pts = [tuple(p[:2]) for p in ring]
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts = pts[:-1]
+    pts = _clip(pts, lambda p: p[0] >= xmin, _at_x(xmin))
+    pts = _clip(pts, lambda p: p[0] <= xmax, _at_x(xmax))
+    pts = _clip(pts, lambda p: p[1] >= ymin, _at_y(ymin))
+    pts = _clip(pts, lambda p: p[1] <= ymax, _at_y(ymax))
+    return pts
+
+
+def _polygons(geometry: dict) -> Optional[list[list[Ring]]]:
+    """GeoJSON Polygon/MultiPolygon → list of polygons (each a list of rings,
+    exterior first). None for anything else."""
+    gtype = geometry.get("type")
+    coords = geometry.get("coordinates")
+    if not coords:
+        return None
+    if gtype == "Polygon":
+        return [coords]
+    if gtype == "MultiPolygon":
+        return list(coords)
+    return None
+
+
+def item_footprint(item: dict) -> Optional[dict]:
+    """The best footprint geometry an item offers: the image asset's
+    valid-data `proj:geometry` when it is in EPSG:4326, else `geometry`."""
+    asset = item.get("assets", {}).get("image", {})
+    epsg = asset.get("proj:epsg", item.get("properties", {}).get("proj:epsg"))
+    valid = asset.get("proj:geometry")
+    if valid is not None and epsg == 4326:
+        return valid
+    return item.get("geometry")
+
+
+def overlap_fraction(item: dict, roi_bbox: Bbox) -> Optional[float]:
+    """Fraction of the ROI's area covered by the item's footprint, or None
+    if the footprint is unavailable or unusable."""
+    geometry = item_footprint(item)
+    if not geometry:
+        return None
+    polygons = _polygons(geometry)
+    if polygons is None:
+        return None
+    xmin, ymin, xmax, ymax = roi_bbox
+    roi_area = (xmax - xmin) * (ymax - ymin)
+    if roi_area <= 0:
+        return None
+    covered = 0.0
+    for rings in polygons:
+        for i, ring in enumerate(rings):
+            xs = [p[0] for p in ring]
+            if xs and max(xs) - min(xs) > 180.0:
+                return None  # antimeridian-crossing ring; don't guess
+            a = _ring_area(clip_ring(ring, roi_bbox))
+            covered += a if i == 0 else -a  # interior rings are holes
+    return max(0.0, min(1.0, covered / roi_area))
+
+
+def footprint_overlaps(item: dict, roi_bbox: Bbox, min_frac: float = 0.0) -> bool:
+    """True if the item's footprint covers more than `min_frac` of the ROI.
+
+    Items without a usable footprint pass (the caller has already done the
+    bbox test).
+    """
+    frac = overlap_fraction(item, roi_bbox)
+    return frac is None or frac > min_frac
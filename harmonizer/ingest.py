@@ -13,23 +13,42 @@ Step 1 deliverable. Compositing, masking, and harmonization happen downstream.
 """
 from __future__ import annotations
 
+import asyncio
+import collections
+import contextlib
 import json
 import logging
 import os
+import queue
 import re
+import threading
 import time
 import urllib.error
 import urllib.parse
 import urllib.request
 import xml.etree.ElementTree as ET
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable, Iterator, Optional
+from typing import Iterable, Iterator, Optional, Union
 
 from tqdm import tqdm
 
+from harmonizer.asynchttp import AsyncHTTPPool, EventLoopThread
+from harmonizer.cachedb import (
+    CacheManifest,
+    SharedTier,
+    build_locks,
+    ensure_dir,
+    file_checksum,
+    tmp_name,
+)
+from harmonizer.cogio import RasterBackend, make_backend
+from harmonizer.concurrency import AdaptiveSemaphore, AIMDController, HedgeController
+from harmonizer import lunar
+from harmonizer.footprint import footprint_overlaps
 from harmonizer.constants import (
     S3_BUCKET,
     S3_HTTPS_BASE,
@@ -39,6 +58,11 @@ from harmonizer.constants import (
     SensorConfig,
     viirs_orbit_key,
 )
+from harmonizer.orbitstore import LayerRef, OrbitStore, StoreRef, read_layer
+from harmonizer.orbittable import OrbitTable, OrbitTableBuilder
+from harmonizer.selection import CoverageSelector, CoverageTarget
+from harmonizer.stacindex import STACItemIndex
+from harmonizer.tilecache import TileCache
 
 log = logging.getLogger(__name__)
 
@@ -53,35 +77,96 @@ S3_LIST_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
 _RETRY_STATUSES = {500, 502, 503, 504}
 _RETRY_DELAYS = (1, 4, 16)  # seconds; 3 retries with exponential backoff
 
+# Extra attempts for an item JSON whose fetch failed with a transient error
+# (timeout, reset) after the pool's own status retries.
+_ITEM_RETRY_DELAYS = (2, 8)
+
+# Keep-alive connections held open to one host by the process-wide pool used
+# for one-off requests (`_fetch_json`, `_list_s3_keys`).
+_HTTP_CONNECTIONS_PER_HOST = 16
+
+_http_lock = threading.Lock()
+_http_loop: Optional[EventLoopThread] = None
+_http_pool: Optional[AsyncHTTPPool] = None
+
+
+# Starting concurrency for adaptive pools; AIMD grows it from here.
+_ADAPTIVE_INITIAL = 8
+
+
+def _new_http_pool(
+    max_connections_per_host: int, controller: Optional[AIMDController] = None,
+) -> AsyncHTTPPool:
+    return AsyncHTTPPool(
+        max_connections_per_host=max_connections_per_host,
+        retry_statuses=_RETRY_STATUSES,
+        retry_delays=_RETRY_DELAYS,
+        controller=controller,
+    )
+
+
+def _http() -> tuple[EventLoopThread, AsyncHTTPPool]:
+    """The shared discovery event loop and its process-wide connection pool.
+
+    Started lazily on first use; every discovery request in the process runs
+    on this one loop, so keep-alive connections are reused across callers.
+    """
+    global _http_loop, _http_pool
+    with _http_lock:
+        if _http_loop is None:
+            _http_loop = EventLoopThread(name="wblen-discovery")
+            _http_pool = _new_http_pool(_HTTP_CONNECTIONS_PER_HOST)
+    assert _http_pool is not None
+    return _http_loop, _http_pool
+
+
+def _read_json_file(path: str) -> dict:
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+async def _aget_json(pool: AsyncHTTPPool, url: str, timeout: Optional[float] = None) -> dict:
+    """GET a JSON document. file:// URLs (offline mirrors, see
+    `harmonizer.mirror`) are read from disk instead."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme == "file":
+        path = urllib.request.url2pathname(parsed.path)
+        return await asyncio.get_running_loop().run_in_executor(None, _read_json_file, path)
+    return await pool.get_json(url, timeout=timeout)
+
+
 def _fetch_json(url: str, timeout: float = 30.0) -> dict:
-    delays = iter(_RETRY_DELAYS)
-    while True:
-        try:
-            with urllib.request.urlopen(url, timeout=timeout) as resp:
-                return json.load(resp)
-        except urllib.error.HTTPError as e:
-            wait = next(delays, None)
-            if e.code not in _RETRY_STATUSES or wait is None:
-                raise
-            log.debug("HTTP %d fetching %s; retrying in %ds", e.code, url, wait)
-            time.sleep(wait)
-
-
-def _list_s3_keys(prefix: str, bucket: str = S3_BUCKET) -> list[str]:
-    """List object keys under a prefix in an anonymous public bucket."""
+    loop, pool = _http()
+    return loop.run(_aget_json(pool, url, timeout=timeout))
+
+
+def _absolute_assets(item: dict, item_url: str) -> dict:
+    """Resolve relative asset hrefs (as written by `harmonizer.mirror`)
+    against the item's own URL, in place."""
+    for asset in item.get("assets", {}).values():
+        href = asset.get("href")
+        if href and "://" not in href:
+            asset["href"] = urllib.parse.urljoin(item_url, href)
+    return item
+
+
+def _bucket_base_url(bucket: str) -> str:
+    return S3_HTTPS_BASE if bucket == S3_BUCKET else f"https://{bucket}.s3.amazonaws.com"
+
+
+async def _alist_s3_keys(
+    pool: AsyncHTTPPool, prefix: str, bucket: str = S3_BUCKET,
+    base_url: Optional[str] = None,
+) -> list[str]:
+    base_url = base_url or _bucket_base_url(bucket)
     keys: list[str] = []
     continuation: Optional[str] = None
     while True:
         params = {"list-type": "2", "prefix": prefix, "max-keys": "1000"}
         if continuation:
             params["continuation-token"] = continuation
-        url = (
-            f"https://{bucket}.s3.amazonaws.com/?"
-            + urllib.parse.urlencode(params)
-        )
-        with urllib.request.urlopen(url, timeout=30.0) as resp:
-            tree = ET.parse(resp)
-        root = tree.getroot()
+        url = f"{base_url}/?" + urllib.parse.urlencode(params)
+        root = ET.fromstring(await pool.get(url))
         for c in root.findall(f"{S3_LIST_NS}Contents"):
             key = c.findtext(f"{S3_LIST_NS}Key")
             if key:
@@ -93,6 +178,18 @@ def _list_s3_keys(prefix: str, bucket: str = S3_BUCKET) -> list[str]:
     return keys
 
 
+def _list_s3_keys(
+    prefix: str, bucket: str = S3_BUCKET, base_url: Optional[str] = None,
+) -> list[str]:
+    """List object keys under a prefix in an anonymous public bucket.
+
+    `base_url` overrides the bucket endpoint (any server speaking the S3
+    ListObjectsV2 XML dialect at its root).
+    """
+    loop, pool = _http()
+    return loop.run(_alist_s3_keys(pool, prefix, bucket, base_url))
+
+
 # ---------------------------------------------------------------------------
 # Bbox / period helpers
 # ---------------------------------------------------------------------------
@@ -135,6 +232,37 @@ def _period_in_range(period_id: str, sensor: str, start: datetime, end: datetime
     raise ValueError(f"Unknown sensor: {sensor}")
 
 
+# A period catalog may keep growing for a while after the period closes (late
+# reprocessing uploads). Past this grace it's treated as settled and served
+# from the STAC index forever.
+_PERIOD_SETTLE_GRACE = timedelta(days=30)
+
+
+def _period_end(period_id: str, sensor: str) -> Optional[datetime]:
+    """Exclusive end of the time span a child catalog covers, or None."""
+    if sensor == SENSOR_DMSP:
+        m = _DMSP_PERIOD_RE.match(period_id)
+        if not m:
+            return None
+        return datetime(int(m.group("year")) + 1, 1, 1, tzinfo=timezone.utc)
+    if sensor == SENSOR_VIIRS:
+        m = _VIIRS_PERIOD_RE.match(period_id)
+        if not m:
+            return None
+        year, month = int(period_id[:4]), int(period_id[4:6])
+        if month == 12:
+            return datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+        return datetime(year, month + 1, 1, tzinfo=timezone.utc)
+    return None
+
+
+def _period_settled(period_id: str, sensor: str) -> bool:
+    end = _period_end(period_id, sensor)
+    if end is None:
+        return False
+    return datetime.now(timezone.utc) >= end + _PERIOD_SETTLE_GRACE
+
+
 def _parse_item_datetime(item: dict) -> datetime:
     s = item["properties"]["datetime"]
     if s.endswith("Z"):
@@ -174,11 +302,31 @@ class STACCatalogClient:
     HTTP and do our own filtering. Output is a stream of STAC item dicts that
     intersect the ROI in space and lie inside the date range.
 
+    All catalog and item requests run as coroutines on the shared discovery
+    event loop and are multiplexed over a pool of at most `max_workers`
+    keep-alive connections, so thousands of item JSONs cost thousands of small
+    GETs on a handful of warm connections rather than a TLS handshake each.
+    With `adaptive=True` (default) the number of requests in flight is steered
+    between 1 and `max_workers` by an `AIMDController` from observed latency,
+    throughput and error rate.
+
     For DMSP, an optional `dmsp_preferred_sats` mapping (same shape as
     `harmonizer.config.DMSP_PREFERRED_SATS`) restricts the walk to only the
     `F{sat}{year}` child catalogs that match the preferred-satellite-per-year
     convention from Li et al. 2017 — keeps downstream monthly composites
     single-satellite so DMSPstepwise can apply consistent coefficients.
+
+    With an `index` (see `harmonizer.stacindex`), catalogs and item JSONs are
+    served from the persistent on-disk index whenever it has a fresh copy, so
+    repeat and overlapping-ROI runs skip almost all discovery traffic.
+
+    `catalog_url` overrides the sensor's root catalog (e.g. to walk a local
+    stand-in server); child and item hrefs are resolved relative to it.
+
+    Item JSONs that still fail after retries are logged and skipped, and
+    their URLs are left in `failed_items` after each `find_items`; they
+    aren't indexed, so the next run fetches them again. With `strict=True`
+    `find_items` raises instead, once every other item has been yielded.
     """
 
     def __init__(
@@ -186,12 +334,27 @@ class STACCatalogClient:
         sensor: str,
         max_workers: int = 16,
         dmsp_preferred_sats: Optional[dict[str, list[str]]] = None,
+        index: Optional[STACItemIndex] = None,
+        catalog_url: Optional[str] = None,
+        adaptive: bool = True,
+        strict: bool = False,
     ):
         if sensor not in SENSOR_CONFIGS:
             raise ValueError(f"Unknown sensor: {sensor}")
         self.sensor = sensor
+        self.strict = strict
+        self.failed_items: list[str] = []
         self.cfg: SensorConfig = SENSOR_CONFIGS[sensor]
+        self.catalog_url = catalog_url or self.cfg.catalog_url
         self.max_workers = max_workers
+        self.index = index
+        self.controller: Optional[AIMDController] = None
+        if adaptive:
+            self.controller = AIMDController(
+                f"{sensor} catalog fetches",
+                initial=min(_ADAPTIVE_INITIAL, max_workers), maximum=max_workers,
+            )
+        self._pool = _new_http_pool(max_workers, self.controller)
         self._dmsp_allowed_sat_years: Optional[set[str]] = None
         if dmsp_preferred_sats is not None and sensor == SENSOR_DMSP:
             self._dmsp_allowed_sat_years = {
@@ -205,16 +368,40 @@ class STACCatalogClient:
         # (treating the JSON as a file, not a directory).
         return urllib.parse.urljoin(base_url, href)
 
+    @staticmethod
+    def _period_id(period_url: str) -> str:
+        # period_id is the last directory segment in the href, e.g. F162005 or 201501
+        return Path(urllib.parse.urlparse(period_url).path).parent.name
+
+    def _run(self, coro):
+        loop, _ = _http()
+        return loop.run(coro)
+
+    def close(self) -> None:
+        """Close the client's keep-alive connections (on the discovery loop,
+        which owns them)."""
+        self._run(self._pool.close())
+
+    async def _afetch_catalog(self, url: str, settled: bool) -> dict:
+        """Fetch a catalog JSON, going through the index when we have one."""
+        if self.index is not None:
+            cat = self.index.get_catalog(url)
+            if cat is not None:
+                return cat
+        cat = await _aget_json(self._pool, url)
+        if self.index is not None:
+            self.index.put_catalog(url, self.sensor, cat, settled)
+        return cat
+
     def _period_catalog_urls(self, start: datetime, end: datetime) -> list[str]:
-        cat = _fetch_json(self.cfg.catalog_url)
+        cat = self._run(self._afetch_catalog(self.catalog_url, settled=False))
         urls: list[str] = []
         for link in cat.get("links", []):
             if link.get("rel") != "child":
                 continue
             href = link["href"]
-            child_url = self._resolve(self.cfg.catalog_url, href)
-            # period_id is the last directory segment in the href, e.g. F162005 or 201501
-            period_id = Path(urllib.parse.urlparse(child_url).path).parent.name
+            child_url = self._resolve(self.catalog_url, href)
+            period_id = self._period_id(child_url)
             if not _period_in_range(period_id, self.sensor, start, end):
                 continue
             if (
@@ -225,26 +412,93 @@ class STACCatalogClient:
             urls.append(child_url)
         return urls
 
-    def _item_urls_in_period(self, period_url: str) -> list[str]:
-        cat = _fetch_json(period_url)
-        return [
+    async def _aitem_urls_in_period(self, period_url: str) -> list[str]:
+        settled = _period_settled(self._period_id(period_url), self.sensor)
+        cat = await self._afetch_catalog(period_url, settled=settled)
+        urls = [
             self._resolve(period_url, link["href"])
             for link in cat.get("links", [])
             if link.get("rel") == "item"
         ]
+        if self.index is not None:
+            self.index.register_items(self.sensor, period_url, urls)
+        return urls
+
+    def _item_urls_in_period(self, period_url: str) -> list[str]:
+        return self._run(self._aitem_urls_in_period(period_url))
+
+    async def _aitem_urls(self, period_urls: list[str]) -> list[str]:
+        per_period = await asyncio.gather(
+            *(self._aitem_urls_in_period(u) for u in period_urls)
+        )
+        return [u for urls in per_period for u in urls]
+
+    async def _afetch_items(
+        self, urls: list[str], out: "queue.Queue", failed: list[str],
+    ) -> None:
+        """Fetch every item JSON concurrently, pushing (url, item-or-None)
+        onto `out` as each completes. The pool bounds open connections; the
+        rest of the requests simply wait their turn on the loop.
+
+        Transient failures are retried (`_ITEM_RETRY_DELAYS`); items that
+        are permanently gone (404 and friends) are logged and skipped, and
+        items that still fail transiently are logged and appended to
+        `failed`.
+        """
+        async def _one(url: str) -> None:
+            delays = iter(_ITEM_RETRY_DELAYS)
+            while True:
+                try:
+                    item = _absolute_assets(await _aget_json(self._pool, url), url)
+                    break
+                except Exception as e:
+                    wait = None if _permanent_failure(e) else next(delays, None)
+                    if wait is None:
+                        log.warning("failed fetching %s: %s", url, e)
+                        if not _permanent_failure(e):
+                            failed.append(url)
+                        item = None
+                        break
+                    log.debug("fetching %s failed (%s); retrying in %ss", url, e, wait)
+                    await asyncio.sleep(wait)
+            out.put((url, item))
+
+        await asyncio.gather(*(_one(u) for u in urls))
 
     def find_items(
-        self, roi_bbox: Bbox, start: datetime, end: datetime
+        self, roi_bbox: Bbox, start: datetime, end: datetime,
+        min_overlap_frac: float = 0.0,
     ) -> Iterator[dict]:
-        """Yield STAC item dicts intersecting roi_bbox in [start, end]."""
+        """Yield STAC item dicts intersecting roi_bbox in [start, end].
+
+        Items pass the bbox test and then an exact footprint test: their
+        swath polygon (or valid-data polygon, when published) must cover more
+        than `min_overlap_frac` of the ROI's area (see
+        `harmonizer.footprint`). Items without a usable footprint are kept on
+        the bbox test alone.
+        """
+        self.failed_items = []
         period_urls = self._period_catalog_urls(start, end)
         log.info("%s: %d period catalogs in range", self.sensor, len(period_urls))
 
-        # Fetch period catalogs in parallel to discover item URLs.
-        item_urls: list[str] = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
-            for urls in pool.map(self._item_urls_in_period, period_urls):
-                item_urls.extend(urls)
+        # Fetch period catalogs concurrently to discover item URLs.
+        item_urls = self._run(self._aitem_urls(period_urls))
+
+        if self.index is not None:
+            # Everything the index already knows is answered by one R-tree +
+            # datetime query; only never-fetched item URLs go to the network.
+            n_listed = len(item_urls)
+            for item in self.index.query(period_urls, roi_bbox, start, end):
+                # The R-tree stores float32 bounds rounded outward, so
+                # re-check exactly before yielding.
+                if _bboxes_intersect(tuple(item["bbox"]), roi_bbox) and \
+                        footprint_overlaps(item, roi_bbox, min_overlap_frac):
+                    yield item
+            item_urls = self.index.unfetched_item_urls(period_urls)
+            log.info(
+                "%s: %d/%d items not yet in the STAC index",
+                self.sensor, len(item_urls), n_listed,
+            )
         log.info("%s: %d items before filename date prefilter", self.sensor, len(item_urls))
 
         # Cheap prefilter on date tokens embedded in the filename — avoids
@@ -262,29 +516,51 @@ class STACCatalogClient:
         log.info("%s: %d items after filename date prefilter", self.sensor, len(item_urls))
 
         # Fetch each item JSON, filter by bbox + datetime.
-        def _maybe_item(url: str) -> Optional[dict]:
-            try:
-                item = _fetch_json(url)
-            except Exception as e:  # pragma: no cover
-                log.warning("failed fetching %s: %s", url, e)
-                return None
-            if "bbox" not in item:
+        def _maybe_item(item: Optional[dict]) -> Optional[dict]:
+            if item is None or "bbox" not in item:
                 return None
             if not _bboxes_intersect(tuple(item["bbox"]), roi_bbox):
                 return None
+            if not footprint_overlaps(item, roi_bbox, min_overlap_frac):
+                return None
             dt = _parse_item_datetime(item)
             if not (start <= dt <= end):
                 return None
             return item
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
-            futures = {pool.submit(_maybe_item, u): u for u in item_urls}
+        loop, _ = _http()
+        results: queue.Queue = queue.Queue()
+        failed: list[str] = []
+        fut = loop.submit(self._afetch_items(item_urls, results, failed))
+        try:
             with tqdm(total=len(item_urls), desc=f"{self.sensor} fetch items", unit="item") as pbar:
-                for fut in as_completed(futures):
-                    item = fut.result()
+                for _ in range(len(item_urls)):
+                    while True:
+                        try:
+                            url, item = results.get(timeout=1.0)
+                            break
+                        except queue.Empty:
+                            if fut.done():
+                                fut.result()  # re-raise a crashed walker
+                    if item is not None and self.index is not None:
+                        self.index.put_item(url, item)
+                    item = _maybe_item(item)
                     if item is not None:
                         yield item
                     pbar.update(1)
+            fut.result()
+        finally:
+            # Stops outstanding fetches if the consumer bails out early.
+            fut.cancel()
+        self.failed_items = failed
+        if failed:
+            msg = (
+                f"{self.sensor}: {len(failed)} item JSON(s) could not be fetched "
+                f"(first: {failed[0]}); rerun to retry them"
+            )
+            if self.strict:
+                raise RuntimeError(msg)
+            log.warning("%s; skipped", msg)
 
 
 # ---------------------------------------------------------------------------
@@ -320,16 +596,14 @@ def _viirs_li_url(radiance_url: str) -> str:
     The SVDNB radiance and GDNBO LI files share an orbit identifier
     (`npp_d…_t…_e…_b…`) but have different processing-timestamp suffixes, so
     plain string substitution doesn't work. We list the bucket for the orbit
-    prefix and pick the one matching `*.li.co.tif`.
+    prefix and pick the one matching `*.li.co.tif`. The bucket endpoint is
+    taken from the radiance URL itself, so stand-in servers work unchanged.
+
+    One listing per orbit; `ViirsLIResolver` batches this per month and only
+    falls back here for orbits missing from its month map.
     """
-    # Extract S3 prefix from the URL. URL is .../{YYYYMM}/SVDNB_..._noaa_ops.rade9.co.tif
-    parsed = urllib.parse.urlparse(radiance_url)
-    parts = parsed.path.lstrip("/").split("/", 1)
-    if len(parts) != 2:
-        raise ValueError(f"Unexpected radiance URL: {radiance_url}")
-    period, _filename = parts
-    orbit = viirs_orbit_key(radiance_url)
-    keys = _list_s3_keys(f"{period}/GDNBO_{orbit}_")
+    base, period, orbit = _viirs_url_parts(radiance_url)
+    keys = _list_s3_keys(f"{period}/GDNBO_{orbit}_", base_url=base)
     matches = [k for k in keys if k.endswith(".li.co.tif")]
     if not matches:
         raise FileNotFoundError(
@@ -337,18 +611,130 @@ def _viirs_li_url(radiance_url: str) -> str:
         )
     if len(matches) > 1:
         log.warning("multiple LI candidates for orbit %s; using first", orbit)
-    return f"{S3_HTTPS_BASE}/{matches[0]}"
+    return f"{base}/{matches[0]}"
 
 
-def orbitref_from_item(item: dict, sensor: str) -> OrbitRef:
-    cfg = SENSOR_CONFIGS[sensor]
+def _viirs_url_parts(radiance_url: str) -> tuple[str, str, str]:
+    """Split .../{YYYYMM}/SVDNB_..._noaa_ops.rade9.co.tif into
+    (bucket base URL, period, orbit key)."""
+    parsed = urllib.parse.urlparse(radiance_url)
+    parts = parsed.path.lstrip("/").split("/", 1)
+    if len(parts) != 2:
+        raise ValueError(f"Unexpected radiance URL: {radiance_url}")
+    base = f"{parsed.scheme}://{parsed.netloc}"
+    return base, parts[0], viirs_orbit_key(radiance_url)
+
+
+class ViirsLIResolver:
+    """Resolves VIIRS radiance URLs to GDNBO LI URLs with one listing per month.
+
+    The first lookup in a `{YYYYMM}` period lists the whole `{YYYYMM}/GDNBO_`
+    prefix (1000 keys per page) and builds an orbit-key → LI-key map; every
+    later lookup in that month is a dict hit. On a month with ~15k orbits
+    that is a few dozen list requests instead of ~15k.
+
+    Thread-safe: concurrent lookups in the same month wait on one listing.
+    With an `index`, month maps are persisted alongside the STAC catalogs and
+    reused across runs under the same settled/stale rules. Orbits missing from
+    a month map (e.g. uploaded after a still-open month was listed) fall back
+    to the per-orbit `_viirs_li_url` listing.
+    """
+
+    def __init__(self, index: Optional[STACItemIndex] = None):
+        self.index = index
+        self._maps: dict[tuple[str, str], dict[str, str]] = {}
+        self._period_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _list_period(self, base: str, period: str) -> dict[str, str]:
+        keys: dict[str, str] = {}
+        for key in _list_s3_keys(f"{period}/GDNBO_", base_url=base):
+            if not key.endswith(".li.co.tif"):
+                continue
+            try:
+                orbit = viirs_orbit_key(key)
+            except ValueError:
+                continue
+            if orbit in keys:
+                log.warning("multiple LI candidates for orbit %s; using first", orbit)
+                continue
+            keys[orbit] = key
+        log.info("%s: listed %d GDNBO LI keys", period, len(keys))
+        return keys
+
+    def _period_map(self, base: str, period: str) -> dict[str, str]:
+        map_key = (base, period)
+        prefix_url = f"{base}/{period}/GDNBO_"
+        with self._lock:
+            keys = self._maps.get(map_key)
+            if keys is not None:
+                return keys
+            period_lock = self._period_locks.setdefault(map_key, threading.Lock())
+        with period_lock:
+            with self._lock:
+                keys = self._maps.get(map_key)
+            if keys is not None:
+                return keys
+            if self.index is not None:
+                keys = self.index.get_li_keys(prefix_url)
+            if keys is None:
+                keys = self._list_period(base, period)
+                if self.index is not None:
+                    self.index.put_li_keys(
+                        prefix_url, keys, _period_settled(period, SENSOR_VIIRS)
+                    )
+            with self._lock:
+                self._maps[map_key] = keys
+            return keys
+
+    def resolve(self, radiance_url: str) -> str:
+        base, period, orbit = _viirs_url_parts(radiance_url)
+        key = self._period_map(base, period).get(orbit)
+        if key is None:
+            return _viirs_li_url(radiance_url)
+        return f"{base}/{key}"
+
+
+_default_li_resolver = ViirsLIResolver()
+
+
+def _item_flag_url(item: dict, sensor: str) -> str:
+    """The item's flag layer: its "flag" asset if it has one (mirrors),
+    else derived from the radiance filename."""
+    asset = item["assets"].get("flag")
+    if asset is not None:
+        return asset["href"]
+    return SENSOR_CONFIGS[sensor].flag_from_radiance(item["assets"]["image"]["href"])
+
+
+def _item_li_url(
+    item: dict, sensor: str, li_resolver: Optional[ViirsLIResolver] = None,
+) -> str:
+    """The item's LI layer: its "li" asset if it has one (mirrors, which
+    can't be prefix-listed), else derived from the radiance URL."""
+    asset = item["assets"].get("li")
+    if asset is not None:
+        return asset["href"]
+    radiance_url = item["assets"]["image"]["href"]
+    if sensor == SENSOR_VIIRS:
+        return (li_resolver or _default_li_resolver).resolve(radiance_url)
+    return SENSOR_CONFIGS[sensor].li_from_radiance(radiance_url)
+
+
+def orbitref_from_item(
+    item: dict, sensor: str, li_resolver: Optional[ViirsLIResolver] = None,
+) -> OrbitRef:
+    """Resolve a STAC item to its layer triplet.
+
+    VIIRS LI URLs go through `li_resolver` (default: a process-wide in-memory
+    `ViirsLIResolver`), so only the first orbit of each month pays for a
+    bucket listing. Explicit "li" / "flag" assets on the item take
+    precedence over the filename conventions.
+    """
     radiance_url = item["assets"]["image"]["href"]
-    flag_url = cfg.flag_from_radiance(radiance_url)
     if sensor == SENSOR_DMSP:
-        li_url = cfg.li_from_radiance(radiance_url)
         orbit_id = _orbit_id_for_dmsp(radiance_url)
     elif sensor == SENSOR_VIIRS:
-        li_url = _viirs_li_url(radiance_url)
         orbit_id = _orbit_id_for_viirs(radiance_url)
     else:  # pragma: no cover
         raise ValueError(sensor)
@@ -358,8 +744,8 @@ def orbitref_from_item(item: dict, sensor: str) -> OrbitRef:
         datetime=_parse_item_datetime(item),
         bbox=tuple(item["bbox"]),
         radiance_url=radiance_url,
-        li_url=li_url,
-        flag_url=flag_url,
+        li_url=_item_li_url(item, sensor, li_resolver),
+        flag_url=_item_flag_url(item, sensor),
     )
 
 
@@ -386,31 +772,341 @@ _GDAL_ENV = {
 _READ_RETRIES = 3
 _READ_BACKOFF_SECONDS = 2.0
 
+# Hedged window reads (see `WindowedCOGReader`): an attempt still running
+# after the running p95 read latency gets one duplicate, with duplicates
+# capped at this fraction of all reads.
+_HEDGE_QUANTILE = 0.95
+_HEDGE_BUDGET = 0.05
+# Open datasets each hedge-pool thread keeps. There are ~4× as many of those
+# threads as layer workers, and an attempt rarely revisits a COG on the same
+# pool thread, so a full per-thread LRU would mostly hold dead handles.
+_HEDGE_HANDLES_PER_THREAD = 2
+
+# Bit-flag layers: preview reads decimate them locally instead of reading
+# the COG's overviews, whose resampling the producer chose (see `_decimate`).
+_CATEGORICAL_LAYERS = frozenset({"flag"})
+
+# Accepted orbits allowed to wait per orbit worker while discovery runs
+# ahead of the reads (see `ingest_many`).
+_DISPATCH_QUEUE_PER_WORKER = 2
+
+# Parsed headers kept per process (open datasets are cached by the raster
+# backend, see `harmonizer.cogio`).
+_HEADER_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class _COGHeader:
+    """What we need from a remote COG's header to plan window reads."""
+    crs: object          # rasterio.crs.CRS
+    transform: object    # affine.Affine
+    width: int
+    height: int
+    bounds_4326: Bbox
+    profile: dict
+
+    @classmethod
+    def from_dataset(cls, src) -> "_COGHeader":
+        from rasterio.warp import transform_bounds
+        return cls(
+            crs=src.crs,
+            transform=src.transform,
+            width=src.width,
+            height=src.height,
+            bounds_4326=tuple(transform_bounds(src.crs, "EPSG:4326", *src.bounds)),
+            profile=src.profile.copy(),
+        )
+
+    @property
+    def block_shape(self) -> tuple[int, int]:
+        """(rows, cols) of the COG's internal tiles; untiled files are
+        treated as 256-row bands."""
+        if self.profile.get("tiled"):
+            return int(self.profile["blockysize"]), int(self.profile["blockxsize"])
+        return 256, self.width
+
+    def to_json(self) -> dict:
+        profile = {k: v for k, v in self.profile.items() if k not in ("crs", "transform")}
+        return {
+            "crs": self.crs.to_wkt() if self.crs else None,
+            "transform": tuple(self.transform)[:6],
+            "width": self.width,
+            "height": self.height,
+            "bounds_4326": self.bounds_4326,
+            "profile": profile,
+        }
+
+    @classmethod
+    def from_json(cls, d: dict) -> "_COGHeader":
+        from affine import Affine
+        from rasterio.crs import CRS
+
+        crs = CRS.from_wkt(d["crs"]) if d["crs"] else None
+        transform = Affine(*d["transform"])
+        return cls(
+            crs=crs,
+            transform=transform,
+            width=d["width"],
+            height=d["height"],
+            bounds_4326=tuple(d["bounds_4326"]),
+            profile={**d["profile"], "crs": crs, "transform": transform},
+        )
+
+
+class _HeaderCache:
+    """Thread-safe bounded LRU of parsed COG headers keyed by URL."""
+
+    def __init__(self, maxsize: int = _HEADER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "collections.OrderedDict[str, _COGHeader]" = collections.OrderedDict()
+
+    def get(self, url: str) -> Optional[_COGHeader]:
+        with self._lock:
+            header = self._data.get(url)
+            if header is not None:
+                self._data.move_to_end(url)
+            return header
+
+    def put(self, url: str, header: _COGHeader) -> None:
+        with self._lock:
+            self._data[url] = header
+            self._data.move_to_end(url)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_headers = _HeaderCache()
+
+
+class _AttemptClock:
+    """Time one read attempt spends in its exchanges, i.e. holding a read
+    slot: waits for a slot or a pool thread are not counted.
+
+    `started` is set when the first exchange begins (callers also set it
+    when the attempt ends, so a waiter never hangs on one that had nothing
+    to fetch).
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.exchanges = 0
+        self.elapsed = 0.0
+
+    @contextlib.contextmanager
+    def exchange(self) -> Iterator[None]:
+        self.exchanges += 1
+        self.started.set()
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.elapsed += time.monotonic() - t0
+
 
 class WindowedCOGReader:
-    """Reads a small ROI window out of a remote COG and writes it locally.
+    """Reads small ROI windows out of a remote COG and writes them locally.
 
     Cached outputs are keyed by sensor + roi-slug + period + orbit, so cache
     paths from different ROIs never collide. Without the slug, a windowed
     output written for ROI A would be silently re-used by ROI B and produce
     a raster that only contains data over their intersection — a hard-to-spot
     science bug downstream of compositing.
+
+    `roi_bbox` is the default ROI for `cache_path`; batch runs pass each
+    target's own bbox instead, and `read_windows` cuts every ROI's window from
+    a single open of the remote file.
+
+    Remote datasets are opened through a raster `backend`
+    (`harmonizer.cogio`: "gdal" by default, or the pure-Python "range",
+    "local" and "auto" readers), which keeps them open between reads; their
+    parsed headers stay in a process-wide LRU keyed by URL. Retries and
+    repeated reads of a URL therefore cost only tile range requests, and a
+    ROI that misses a COG whose header is already known is rejected without
+    any request. A dataset that fails twice in a row is evicted and reopened.
+    Call `close()` when the reader is no longer used to release the
+    backend's handles.
+
+    `read_layers` is the per-orbit read plan: windows are computed once for
+    all of an orbit's co-located layers, the layers are fetched concurrently
+    (up to `layer_workers` extra threads) and committed together.
+
+    With `overview_factor` N > 1 every window is read at N× coarser
+    resolution, served from the COG's internal overview levels (with N a
+    power of two the values come straight from the producer's overviews).
+    Flag layers are the exception: their overviews may have been built by
+    averaging, which leaves meaningless bits, so `categorical` reads fetch
+    the full-resolution window and decimate it locally, on the same grid.
+    Preview windows are cached under their own ROI slug (``...-ovN``).
+
+    With a `store` (`harmonizer.orbitstore.OrbitStore`), windows are appended
+    to per-period HDF5 files instead of written as GeoTIFFs, and records
+    carry `StoreRef`s; read them with `harmonizer.orbitstore.read_layer`.
+
+    With a `manifest`, GeoTIFF cache hits are answered from the `CacheManifest`
+    (stage "ingest") instead of stat-ing each output, and every window
+    written is recorded in it. A `shared` tier (`harmonizer.cachedb.SharedTier`)
+    is consulted on GeoTIFF cache misses, and written back to if it allows;
+    with a manifest, pass the tier to the manifest instead.
+
+    With a `tiles` cache (`harmonizer.tilecache.TileCache`), full-resolution
+    windows are assembled from the remote COG's internal tiles, keyed by URL
+    and tile x/y rather than by ROI: only tiles not yet cached are fetched,
+    so overlapping or enlarged ROIs reuse every byte already downloaded, and
+    a window whose tiles and header are all cached needs no remote open.
+    Preview reads (`overview_factor` > 1) bypass it.
+
+    `gdal_env` entries override the module-level `_GDAL_ENV` for this
+    reader's GDAL backend (or GDAL fallback).
+    With a `limiter`, every remote read attempt holds one of its slots, so
+    the number of concurrent window reads follows its AIMD controller.
+
+    With a `hedge` controller, read attempts run on the reader's read pool
+    and one still running after the controller's delay (the running p95
+    latency) is duplicated if the hedge budget allows; the first copy to
+    succeed is used and the other is cancelled, or, if already running, left
+    to finish with its result discarded (a GDAL read can't be interrupted,
+    so `close` may wait for it up to the GDAL HTTP timeouts). This cuts the
+    tail left by stalled S3 connections long before the 60 s timeout and
+    retry would. `hedge.stats()` reports the hedging rate.
     """
 
-    def __init__(self, cache_dir: Path, roi_bbox: Bbox):
+    def __init__(
+        self,
+        cache_dir: Path,
+        roi_bbox: Optional[Bbox] = None,
+        gdal_env: Optional[dict[str, str]] = None,
+        limiter: Optional[AdaptiveSemaphore] = None,
+        manifest: Optional[CacheManifest] = None,
+        layer_workers: int = 16,
+        store: Optional[OrbitStore] = None,
+        overview_factor: int = 1,
+        backend: Union[str, RasterBackend, None] = None,
+        shared: Optional[SharedTier] = None,
+        hedge: Optional[HedgeController] = None,
+        tiles: Optional[TileCache] = None,
+    ):
+        if overview_factor < 1:
+            raise ValueError(f"overview_factor must be >= 1, got {overview_factor}")
+        self.overview_factor = int(overview_factor)
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.roi_bbox = tuple(roi_bbox)
-        from harmonizer.utils import roi_slug
-        self._roi_slug = roi_slug(self.roi_bbox)
-
-    def cache_path(self, orbit: OrbitRef, layer: str) -> Path:
-        """Layer is one of {'radiance', 'li', 'flag'}."""
+        self.limiter = limiter
+        self.manifest = manifest
+        self.store = store
+        self.shared = shared
+        self.hedge = hedge
+        self.tiles = tiles
+        ensure_dir(self.cache_dir)
+        self.roi_bbox = tuple(roi_bbox) if roi_bbox is not None else None
+        # Per-reader overrides on top of _GDAL_ENV (e.g. plain-HTTP settings
+        # for a local stand-in server).
+        self.gdal_env = {**_GDAL_ENV, **(gdal_env or {})}
+        self.backend = make_backend(backend, self.gdal_env)
+        self._slugs: dict[Bbox, str] = {}
+        self._pool_lock = threading.Lock()
+        self.layer_workers = layer_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._read_pool: Optional[ThreadPoolExecutor] = None
+
+    def _roi_slug(self, roi_bbox: Bbox) -> str:
+        slug = self._slugs.get(roi_bbox)
+        if slug is None:
+            from harmonizer.utils import roi_slug
+            slug = roi_slug(roi_bbox)
+            if self.overview_factor > 1:
+                slug = f"{slug}-ov{self.overview_factor}"
+            self._slugs[roi_bbox] = slug
+        return slug
+
+    def cache_path(
+        self, orbit: OrbitRef, layer: str, roi_bbox: Optional[Bbox] = None,
+    ) -> LayerRef:
+        """Layer is one of {'radiance', 'li', 'flag'}. roi_bbox defaults to
+        the reader's own ROI. With a store, this is a `StoreRef` into the
+        period file instead of a GeoTIFF path."""
+        roi_bbox = tuple(roi_bbox) if roi_bbox is not None else self.roi_bbox
+        if roi_bbox is None:
+            raise ValueError("cache_path needs a roi_bbox on a reader without a default ROI")
         period = orbit.datetime.strftime("%Y%m")
-        sub = self.cache_dir / orbit.sensor / self._roi_slug / period
-        sub.mkdir(parents=True, exist_ok=True)
+        if self.store is not None:
+            return self.store.ref(
+                orbit.sensor, self._roi_slug(roi_bbox), period, orbit.orbit_id, layer,
+            )
+        sub = ensure_dir(self.cache_dir / orbit.sensor / self._roi_slug(roi_bbox) / period)
         return sub / f"{orbit.orbit_id}.{layer}.tif"
 
+    def is_cached(self, dst_path: LayerRef) -> bool:
+        if isinstance(dst_path, StoreRef):
+            return self.store.has(dst_path)
+        if self.manifest is not None:
+            return self.manifest.has("ingest", dst_path)
+        if dst_path.exists() and dst_path.stat().st_size > 0:
+            return True
+        return self.shared is not None and self.shared.fetch([dst_path]) is not None
+
+    def _claim(self, dsts: Iterable[LayerRef]):
+        """`build_locks` on the orbit windows `dsts` belong to: all layers of
+        one orbit in one ROI share a lock."""
+        return build_locks(_claim_path(d) for d in dsts)
+
+    def _built_meanwhile(self, dsts: list[LayerRef]) -> list[bool]:
+        """`is_cached` again once the build locks are held: another process
+        may have written some of `dsts` while this one waited."""
+        if self.store is not None:
+            for path in {d.path for d in dsts if isinstance(d, StoreRef)}:
+                self.store.reload(path)
+        return [self.is_cached(d) for d in dsts]
+
+    @contextlib.contextmanager
+    def _slot(self, clock: Optional[_AttemptClock] = None) -> Iterator[None]:
+        """A read slot from the limiter, timed on `clock` once held.
+        Permanent failures (missing files) aren't reported to the limiter
+        as overload."""
+        with contextlib.ExitStack() as stack:
+            if self.limiter is not None:
+                stack.enter_context(self.limiter.slot(lambda e: not _permanent_failure(e)))
+            if clock is not None:
+                stack.enter_context(clock.exchange())
+            yield
+
+    def close(self) -> None:
+        """Shut down the layer pool and close every dataset the backend
+        opened, on any thread. Only call once no other thread is reading."""
+        with self._pool_lock:
+            pools = [self._pool, self._read_pool]
+            self._pool = self._read_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self.backend.close()
+
+    @staticmethod
+    def _plan_windows(header: _COGHeader, rois: list[Bbox]) -> list[Optional[object]]:
+        """Pixel window of each ROI in the COG, or None where it misses."""
+        from rasterio.errors import WindowError
+        from rasterio.warp import transform_bounds
+        from rasterio.windows import Window, from_bounds
+
+        full = Window(0, 0, header.width, header.height)
+        out: list[Optional[object]] = []
+        for roi_bbox in rois:
+            if not _bboxes_intersect(header.bounds_4326, roi_bbox):
+                out.append(None)
+                continue
+            # Project ROI bbox into source CRS, then to a pixel window.
+            xmin, ymin, xmax, ymax = transform_bounds("EPSG:4326", header.crs, *roi_bbox)
+            window = from_bounds(
+                xmin, ymin, xmax, ymax, transform=header.transform
+            ).round_offsets().round_lengths()
+            # Clip to source extent.
+            try:
+                window = window.intersection(full)
+            except WindowError:
+                out.append(None)
+                continue
+            out.append(window if window.width > 0 and window.height > 0 else None)
+        return out
+
     def read_window(self, url: str, roi_bbox: Bbox, dst_path: Path) -> Optional[Path]:
         """Read just the ROI window of a remote COG and write to dst_path.
 
@@ -418,59 +1114,568 @@ class WindowedCOGReader:
         Bounded retry on transient failures; the GDAL timeouts in _GDAL_ENV
         ensure each attempt fails fast rather than hanging the worker.
         """
-        # Imported lazily so the module can be imported in environments without
-        # rasterio (the catalog walker still works).
-        import time
+        return self.read_windows(url, [(roi_bbox, dst_path)])[0]
+
+    def read_windows(
+        self, url: str, targets: list[tuple[Bbox, LayerRef]], categorical: bool = False,
+    ) -> list[Optional[LayerRef]]:
+        """Cut several ROI windows out of one remote COG with a single open.
+
+        targets is a list of (roi_bbox, dst_path). Returns one entry per
+        target, aligned with the input: dst_path on success, None where that
+        ROI does not overlap the COG. Targets already in the cache are not
+        re-read; if every target is cached the remote file is never opened.
+        Tiles shared between overlapping windows are fetched once, since all
+        reads go through the same dataset's block cache. Uncached targets
+        are claimed first (see `harmonizer.cachedb.build_lock`), so a
+        concurrent reader of the same windows waits and reuses them.
+        Pass `categorical` for a bit-flag layer, so preview reads don't
+        take it from the COG's overviews (see `_read_once`).
+        """
+        out: list[Optional[LayerRef]] = [None] * len(targets)
+        todo: list[int] = []
+        for i, (_, dst_path) in enumerate(targets):
+            if self.is_cached(dst_path):
+                out[i] = dst_path
+            else:
+                todo.append(i)
+        if not todo:
+            return out
+        with self._claim(targets[i][1] for i in todo):
+            built = self._built_meanwhile([targets[i][1] for i in todo])
+            for i, done in zip(list(todo), built):
+                if done:
+                    out[i] = targets[i][1]
+                    todo.remove(i)
+            if not todo:
+                return out
+            plan = _ReadPlan([roi for roi, _ in targets])
+            fetched = self._fetch(url, targets, todo, plan, categorical)
+            self._commit(fetched.values())
+        for i, (dst, _, _) in fetched.items():
+            out[i] = dst
+        return out
+
+    def read_layers(
+        self, urls: dict[str, str], targets: list[tuple[Bbox, dict[str, LayerRef]]],
+    ) -> list[dict[str, Optional[LayerRef]]]:
+        """Read plan for one orbit: every layer's windows for every ROI.
+
+        urls maps layer name → COG URL; targets is a list of
+        (roi_bbox, {layer: dst_path}). The layers of an orbit are co-located
+        on one grid, so the pixel windows are computed once, from whichever
+        header is seen first (a layer on a different grid gets its own). The
+        uncached layers are then fetched concurrently and written to the
+        cache together only once all of them have been read: a failure in
+        any layer raises and leaves none of this call's windows in the
+        cache. Returns one {layer: dst_path or None} per target. Like
+        `read_windows`, the uncached windows are claimed before they're
+        fetched.
+        """
+        out: list[dict[str, Optional[LayerRef]]] = [dict.fromkeys(urls) for _ in targets]
+        todo: dict[str, list[int]] = {}
+        for layer in urls:
+            for i, (_, dsts) in enumerate(targets):
+                if self.is_cached(dsts[layer]):
+                    out[i][layer] = dsts[layer]
+                else:
+                    todo.setdefault(layer, []).append(i)
+        if not todo:
+            return out
+        missing = [(layer, i) for layer, idx in todo.items() for i in idx]
+        with self._claim(targets[i][1][layer] for layer, i in missing):
+            built = self._built_meanwhile([targets[i][1][layer] for layer, i in missing])
+            todo = {}
+            for (layer, i), done in zip(missing, built):
+                if done:
+                    out[i][layer] = targets[i][1][layer]
+                else:
+                    todo.setdefault(layer, []).append(i)
+            if todo:
+                self._read_missing(urls, targets, todo, out)
+        return out
+
+    def _read_missing(
+        self, urls: dict[str, str], targets: list[tuple[Bbox, dict[str, LayerRef]]],
+        todo: dict[str, list[int]], out: list[dict[str, Optional[LayerRef]]],
+    ) -> None:
+        """The fetch-and-commit half of `read_layers`, filling `out`."""
+        plan = _ReadPlan([roi for roi, _ in targets])
+        per_layer = {
+            layer: [(roi, dsts[layer]) for roi, dsts in targets] for layer in todo
+        }
+        # The calling thread reads the first layer itself; the rest go to the
+        # reader's layer pool.
+        first, *rest = todo
+        futures = {
+            layer: self._layer_pool().submit(
+                self._fetch, urls[layer], per_layer[layer], todo[layer], plan,
+                layer in _CATEGORICAL_LAYERS,
+            )
+            for layer in rest
+        }
+        fetched: dict[str, dict[int, tuple[LayerRef, object, dict]]] = {}
+        errors: list[tuple[str, Exception]] = []
+        try:
+            fetched[first] = self._fetch(
+                urls[first], per_layer[first], todo[first], plan,
+                first in _CATEGORICAL_LAYERS,
+            )
+        except Exception as e:
+            errors.append((first, e))
+        for layer, fut in futures.items():
+            try:
+                fetched[layer] = fut.result()
+            except Exception as e:
+                errors.append((layer, e))
+        if errors:
+            layer, exc = errors[0]
+            raise LayerReadError(layer, exc) from exc
+
+        self._commit(item for items in fetched.values() for item in items.values())
+        for layer, items in fetched.items():
+            for i, (dst, _, _) in items.items():
+                out[i][layer] = dst
+
+    def _layer_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.layer_workers, thread_name_prefix="cog-layer",
+                )
+            return self._pool
+
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._read_pool is None:
+                # Room for every caller's attempt (orbit workers plus the
+                # layer pool) and its hedge, plus abandoned losers.
+                self._read_pool = ThreadPoolExecutor(
+                    max_workers=4 * self.layer_workers + 4, thread_name_prefix="cog-read",
+                    initializer=self.backend.limit_thread_handles,
+                    initargs=(_HEDGE_HANDLES_PER_THREAD,),
+                )
+            return self._read_pool
 
-        import rasterio
-        from rasterio.windows import Window, from_bounds
-        from rasterio.warp import transform_bounds
+    def _fetch(
+        self, url: str, targets: list[tuple[Bbox, LayerRef]], todo: list[int],
+        plan: "_ReadPlan", categorical: bool = False,
+    ) -> dict[int, tuple[LayerRef, object, dict]]:
+        """Read the `todo` targets' windows of one COG into memory.
 
-        if dst_path.exists() and dst_path.stat().st_size > 0:
-            return dst_path
+        Returns {target index: (dst, array, profile)} for the targets that
+        overlap the COG; the caller writes them out with `_commit`.
+        Bounded retry on transient failures; the GDAL timeouts in _GDAL_ENV
+        ensure each attempt fails fast rather than hanging the worker.
+        """
+        import time
+
+        header = self._cached_header(url)
+        if header is not None:
+            windows = plan.windows(header)
+            if not any(windows[i] for i in todo):
+                return {}
 
         last_exc: Optional[Exception] = None
         for attempt in range(_READ_RETRIES):
             try:
-                with rasterio.Env(**_GDAL_ENV):
-                    with rasterio.open(url) as src:
-                        src_bounds_4326 = transform_bounds(src.crs, "EPSG:4326", *src.bounds)
-                        if not _bboxes_intersect(src_bounds_4326, roi_bbox):
-                            return None
-                        # Project ROI bbox into source CRS, then to a pixel window.
-                        xmin, ymin, xmax, ymax = transform_bounds(
-                            "EPSG:4326", src.crs, *roi_bbox
-                        )
-                        window = from_bounds(
-                            xmin, ymin, xmax, ymax, transform=src.transform
-                        ).round_offsets().round_lengths()
-                        # Clip to source extent.
-                        full = Window(0, 0, src.width, src.height)
-                        window = window.intersection(full)
-                        if window.width <= 0 or window.height <= 0:
-                            return None
-                        data = src.read(1, window=window)
-                        profile = src.profile.copy()
-                        profile.update(
-                            height=int(window.height),
-                            width=int(window.width),
-                            transform=src.window_transform(window),
-                            driver="GTiff",
-                            compress="deflate",
-                            tiled=True,
-                        )
-                        tmp_path = dst_path.with_suffix(dst_path.suffix + ".tmp")
-                        with rasterio.open(tmp_path, "w", **profile) as dst:
-                            dst.write(data, 1)
-                        os.replace(tmp_path, dst_path)
-                return dst_path
+                if self.hedge is None:
+                    return self._read_once(url, targets, todo, plan, categorical=categorical)
+                return self._read_hedged(url, targets, todo, plan, categorical)
             except Exception as e:
                 last_exc = e
+                # Keep the handle across one transient failure (its header is
+                # still good); a second failure gets a fresh open, on every
+                # thread (hedged attempts run on the hedge pool's).
+                if attempt > 0:
+                    self.backend.evict(url)
                 if attempt + 1 < _READ_RETRIES:
                     time.sleep(_READ_BACKOFF_SECONDS * (attempt + 1))
         assert last_exc is not None
         raise last_exc
 
+    def _read_hedged(
+        self, url: str, targets: list[tuple[Bbox, LayerRef]], todo: list[int],
+        plan: "_ReadPlan", categorical: bool = False,
+    ) -> dict[int, tuple[LayerRef, object, dict]]:
+        """One read attempt, duplicated once if it runs past the hedge delay.
+
+        Both the latency samples and the hedge timer cover only the time an
+        attempt holds a read slot (`_AttemptClock`): an attempt still queued
+        for a pool thread or behind the limiter has sent nothing, and a
+        duplicate would only queue behind it while adding load the limiter
+        is trying to shed.
+        """
+        hedge = self.hedge
+
+        def timed(clock: _AttemptClock):
+            try:
+                fetched = self._read_once(url, targets, todo, plan, clock, categorical)
+            finally:
+                clock.started.set()
+            if clock.exchanges:
+                hedge.record(clock.elapsed)
+            return fetched
+
+        hedge.start()
+        delay = hedge.delay()
+        if delay is None:
+            return timed(_AttemptClock())  # still learning the latency distribution
+        clock = _AttemptClock()
+        primary = self._hedge_pool().submit(timed, clock)
+        clock.started.wait()
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+        if not hedge.try_hedge():
+            return primary.result()
+        second = self._hedge_pool().submit(timed, _AttemptClock())
+        pending = {primary, second}
+        first_exc: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if fut is second:
+                        hedge.hedge_won()
+                    return fut.result()
+                first_exc = first_exc or fut.exception()
+        raise first_exc
+
+    def _read_once(
+        self, url: str, targets: list[tuple[Bbox, LayerRef]], todo: list[int],
+        plan: "_ReadPlan", clock: Optional[_AttemptClock] = None,
+        categorical: bool = False,
+    ) -> dict[int, tuple[LayerRef, object, dict]]:
+        """One attempt at `_fetch`: open (or reuse) the COG and read the
+        windows. Time spent holding read slots is added to `clock`.
+
+        Preview windows of a `categorical` layer are read at full resolution
+        and decimated here (`_decimate`) rather than taken from the COG's
+        overviews: the producer may have built those by averaging, which
+        turns flag words into meaningless bit patterns."""
+        # Imported lazily so the module can be imported in environments without
+        # rasterio (the catalog walker still works).
+        from affine import Affine
+        from rasterio.enums import Resampling
+        from rasterio.windows import transform as window_transform
+
+        if self.tiles is not None and self.overview_factor == 1:
+            return self._read_tiled(url, targets, todo, plan, clock)
+        with self._slot(clock):
+            src = self.backend.open(url)
+            header = self._header(url, src)
+            windows = plan.windows(header)
+            fetched: dict[int, tuple[LayerRef, object, dict]] = {}
+            for i in todo:
+                window = windows[i]
+                if window is None:
+                    continue
+                transform = window_transform(window, header.transform)
+                if self.overview_factor > 1:
+                    shape = (
+                        max(1, -(-int(window.height) // self.overview_factor)),
+                        max(1, -(-int(window.width) // self.overview_factor)),
+                    )
+                    if categorical:
+                        data = _decimate(src.read(1, window=window), shape)
+                    else:
+                        data = src.read(
+                            1, window=window, out_shape=shape,
+                            resampling=Resampling.nearest,
+                        )
+                    transform = transform * Affine.scale(
+                        window.width / shape[1], window.height / shape[0],
+                    )
+                else:
+                    data = src.read(1, window=window)
+                profile = header.profile.copy()
+                profile.update(
+                    height=data.shape[0],
+                    width=data.shape[1],
+                    transform=transform,
+                    driver="GTiff",
+                    compress="deflate",
+                    tiled=True,
+                )
+                fetched[i] = (targets[i][1], data, profile)
+        return fetched
+
+    def _cached_header(self, url: str) -> Optional[_COGHeader]:
+        """The COG's header from this process or the tile cache, if known."""
+        header = _headers.get(url)
+        if header is None and self.tiles is not None:
+            stored = self.tiles.header(url)
+            if stored is not None:
+                header = _COGHeader.from_json(stored)
+                _headers.put(url, header)
+        return header
+
+    def _header(self, url: str, src) -> _COGHeader:
+        """The COG's header, parsed from the open dataset `src` if not cached."""
+        header = self._cached_header(url)
+        if header is None:
+            header = _COGHeader.from_dataset(src)
+            _headers.put(url, header)
+            if self.tiles is not None:
+                self.tiles.put_header(url, header.to_json())
+        return header
+
+    def _read_tiled(
+        self, url: str, targets: list[tuple[Bbox, LayerRef]], todo: list[int],
+        plan: "_ReadPlan", clock: Optional[_AttemptClock] = None,
+    ) -> dict[int, tuple[LayerRef, object, dict]]:
+        """`_read_once` through the tile cache: assemble each window from the
+        COG's internal tiles, fetching only the ones not cached yet."""
+        import numpy as np
+        from rasterio.windows import Window
+        from rasterio.windows import transform as window_transform
+
+        header = self._cached_header(url)
+        if header is None:
+            with self._slot(clock):
+                header = self._header(url, self.backend.open(url))
+        bh, bw = header.block_shape
+        windows = plan.windows(header)
+        spans: dict[int, tuple[int, int, int, int]] = {}
+        needed: set[tuple[int, int]] = set()
+        for i in todo:
+            if windows[i] is None:
+                continue
+            c0, r0 = int(windows[i].col_off), int(windows[i].row_off)
+            c1, r1 = c0 + int(windows[i].width), r0 + int(windows[i].height)
+            spans[i] = (r0, r1, c0, c1)
+            needed.update(
+                (tx, ty)
+                for ty in range(r0 // bh, (r1 - 1) // bh + 1)
+                for tx in range(c0 // bw, (c1 - 1) // bw + 1)
+            )
+        tiles = self.tiles.get_many(url, needed)
+        missing = sorted(needed - tiles.keys(), key=lambda t: (t[1], t[0]))
+        if missing:
+            fresh = {}
+            with self._slot(clock):
+                src = self.backend.open(url)
+                # One read per run of horizontally adjacent missing tiles.
+                for ty, tx0, tx1 in _tile_runs(missing):
+                    r0, c0 = ty * bh, tx0 * bw
+                    r1 = min(r0 + bh, header.height)
+                    c1 = min((tx1 + 1) * bw, header.width)
+                    data = src.read(1, window=Window(c0, r0, c1 - c0, r1 - r0))
+                    for tx in range(tx0, tx1 + 1):
+                        fresh[(tx, ty)] = data[:, tx * bw - c0:min((tx + 1) * bw, c1) - c0]
+            self.tiles.put_many(url, fresh)
+            tiles.update(fresh)
+
+        fetched: dict[int, tuple[LayerRef, object, dict]] = {}
+        dtype = header.profile["dtype"]
+        for i, (r0, r1, c0, c1) in spans.items():
+            data = np.empty((r1 - r0, c1 - c0), dtype=dtype)
+            for ty in range(r0 // bh, (r1 - 1) // bh + 1):
+                for tx in range(c0 // bw, (c1 - 1) // bw + 1):
+                    tile = tiles[(tx, ty)]
+                    y0, x0 = ty * bh, tx * bw
+                    ys, ye = max(r0, y0), min(r1, y0 + tile.shape[0])
+                    xs, xe = max(c0, x0), min(c1, x0 + tile.shape[1])
+                    data[ys - r0:ye - r0, xs - c0:xe - c0] = tile[ys - y0:ye - y0, xs - x0:xe - x0]
+            profile = header.profile.copy()
+            profile.update(
+                height=data.shape[0],
+                width=data.shape[1],
+                transform=window_transform(windows[i], header.transform),
+                driver="GTiff",
+                compress="deflate",
+                tiled=True,
+            )
+            fetched[i] = (targets[i][1], data, profile)
+        return fetched
+
+    def _commit(self, fetched: Iterable[tuple[LayerRef, object, dict]]) -> None:
+        """Write fetched windows ([(dst, array, profile)]) to the cache.
+
+        GeoTIFF targets are all written to temporary files first and only
+        then moved into place (and recorded in the manifest); `StoreRef`
+        targets are appended to the store in one call.
+        """
+        import rasterio
+
+        tiffs: list[tuple[Path, Path]] = []
+        refs = []
+        try:
+            for dst, data, profile in fetched:
+                if isinstance(dst, StoreRef):
+                    refs.append((dst, data, profile))
+                    continue
+                tmp_path = tmp_name(dst)
+                with rasterio.open(tmp_path, "w", **profile) as out:
+                    out.write(data, 1)
+                tiffs.append((tmp_path, dst))
+            if refs:
+                self.store.append(refs)
+        except Exception:
+            _discard(tmp for tmp, _ in tiffs)
+            raise
+        for tmp_path, dst_path in tiffs:
+            os.replace(tmp_path, dst_path)
+        if not tiffs:
+            return
+        if self.manifest is not None:
+            self.manifest.record_many("ingest", [dst for _, dst in tiffs])
+        elif self.shared is not None and self.shared.write_back:
+            self.shared.publish({dst: file_checksum(dst) for _, dst in tiffs})
+
+
+class LayerReadError(RuntimeError):
+    """A layer of an orbit couldn't be read; `layer` names which."""
+
+    def __init__(self, layer: str, exc: BaseException):
+        super().__init__(f"reading {layer}: {exc}")
+        self.layer = layer
+
+
+class _ReadPlan:
+    """Pixel windows of a fixed list of ROIs, computed once per COG grid.
+
+    All layers of an orbit share one grid, so the first header seen plans
+    the windows for every layer; a header on a different grid (which the
+    products don't have, but nothing guarantees it) is planned separately.
+    """
+
+    def __init__(self, rois: list[Bbox]):
+        self.rois = rois
+        self._lock = threading.Lock()
+        self._grid: Optional[tuple] = None
+        self._windows: list[Optional[object]] = []
+
+    def windows(self, header: _COGHeader) -> list[Optional[object]]:
+        grid = (header.crs, header.transform, header.width, header.height)
+        with self._lock:
+            if self._grid is None:
+                self._grid = grid
+                self._windows = WindowedCOGReader._plan_windows(header, self.rois)
+            if grid == self._grid:
+                return self._windows
+        return WindowedCOGReader._plan_windows(header, self.rois)
+
+
+def _decimate(data, shape: tuple[int, int]):
+    """Nearest-neighbour downsampling of a full-resolution window to `shape`.
+
+    Picks the source pixel under each output pixel's centre, the same grid
+    as a GDAL ``out_shape`` read with nearest resampling, so a decimated
+    flag window lines up with the overview-read radiance of the orbit.
+    """
+    import numpy as np
+
+    rows = ((np.arange(shape[0]) + 0.5) * data.shape[0] / shape[0]).astype(np.intp)
+    cols = ((np.arange(shape[1]) + 0.5) * data.shape[1] / shape[1]).astype(np.intp)
+    return data[np.ix_(rows, cols)]
+
+
+def _tile_runs(tiles: list[tuple[int, int]]) -> Iterator[tuple[int, int, int]]:
+    """Group (tx, ty) tiles sorted by row, then column, into
+    (ty, first tx, last tx) runs of adjacent tiles."""
+    run: Optional[list[int]] = None
+    for tx, ty in tiles:
+        if run is not None and ty == run[0] and tx == run[2] + 1:
+            run[2] = tx
+            continue
+        if run is not None:
+            yield tuple(run)
+        run = [ty, tx, tx]
+    if run is not None:
+        yield tuple(run)
+
+
+def _claim_path(dst: LayerRef) -> Path:
+    """The path an orbit window's build lock is keyed on: the window's
+    ``{orbit_id}.{layer}.tif`` with the layer dropped, or for a `StoreRef`
+    the orbit within its period file."""
+    if isinstance(dst, StoreRef):
+        return dst.path.with_name(f"{dst.path.name}.{dst.orbit_id}")
+    return dst.with_name(dst.name.rsplit(".", 2)[0])
+
+
+def _discard(paths: Iterable[Path]) -> None:
+    for p in paths:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(p)
+
+
+# ---------------------------------------------------------------------------
+# Negative results
+# ---------------------------------------------------------------------------
+
+# HTTP statuses that won't change on a retry tomorrow.
+_PERMANENT_HTTP_STATUSES = (403, 404, 410)
+_PERMANENT_STATUS_RE = re.compile(r"HTTP (?:response code: ?)?(403|404|410)\b")
+
+
+def _permanent_failure(exc: BaseException) -> bool:
+    """True if `exc` (or anything in its cause chain) is a permanent error:
+    a missing LI file or a 403/404/410 from either raster backend."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, FileNotFoundError):
+            return True
+        if isinstance(exc, urllib.error.HTTPError):
+            return exc.code in _PERMANENT_HTTP_STATUSES
+        if _PERMANENT_STATUS_RE.search(str(exc)):
+            return True  # GDAL only reports the status in its message
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _failed_mode(layer: str) -> str:
+    """Negative-result mode of a permanent failure reading `layer`."""
+    return f"failed={layer}"
+
+
+class _NegativeResults:
+    """One ingest run's view of the manifest's negative results.
+
+    Loaded once for the run's ROI slugs and filter settings; `skip` answers
+    from memory and `record` writes through to the manifest. Failures are
+    recorded under the layer that failed (`_failed_mode`), and a run only
+    skips the ones for layers it reads: an LI 404 doesn't cost a run that
+    never ingests LI its radiance and flag.
+    """
+
+    def __init__(
+        self, manifest: CacheManifest, reader: "WindowedCOGReader", rois: list[Bbox],
+        modes: dict[str, str], layers: Iterable[str],
+    ):
+        self.manifest = manifest
+        self.modes = modes
+        self._slugs = {roi: reader._roi_slug(roi) for roi in rois}
+        self._known = manifest.negatives(
+            self._slugs.values(), {*modes.values(), *map(_failed_mode, layers)},
+        )
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def skip(self, orbit_id: str, roi: Bbox) -> bool:
+        if (orbit_id, self._slugs[roi]) not in self._known:
+            return False
+        with self._lock:
+            self.skipped += 1
+        return True
+
+    def record(
+        self, orbit_id: str, rois: Iterable[Bbox], reason: str, detail: str = "",
+        layer: Optional[str] = None,
+    ) -> None:
+        """`layer` (the one that failed) is required for "failed"."""
+        mode = _failed_mode(layer) if reason == "failed" else self.modes[reason]
+        self.manifest.record_negatives(
+            (orbit_id, self._slugs[roi], mode, reason, detail[:500])
+            for roi in rois
+        )
+
 
 # ---------------------------------------------------------------------------
 # High-level entry point
@@ -485,104 +1690,319 @@ def _process_one_orbit(
     prefilter_lunar_mode: Optional[str] = None,
     prefilter_lunar_min_frac: float = 0.0,
     prefilter_lunar_thresh: float = 0.1,
+    li_resolver: Optional[ViirsLIResolver] = None,
+    min_overlap_frac: float = 0.0,
+    prefilter_lunar_ephemeris: bool = True,
+    prescreen_bits: tuple[int, ...] = (),
+    prescreen_min_frac: Optional[float] = None,
 ) -> Optional[dict]:
+    """Single-ROI form of `_process_orbit_rois`: returns the record dict, or
+    None if the orbit was dropped."""
+    roi_bbox = tuple(roi_bbox)
+    return _process_orbit_rois(
+        item, sensor, [roi_bbox], reader, layers,
+        prefilter_lunar_mode=prefilter_lunar_mode,
+        prefilter_lunar_min_frac=prefilter_lunar_min_frac,
+        prefilter_lunar_thresh=prefilter_lunar_thresh,
+        li_resolver=li_resolver,
+        min_overlap_frac=min_overlap_frac,
+        prefilter_lunar_ephemeris=prefilter_lunar_ephemeris,
+        prescreen_bits=prescreen_bits,
+        prescreen_min_frac=prescreen_min_frac,
+    ).get(roi_bbox)
+
+
+def _process_orbit_rois(
+    item: dict,
+    sensor: str,
+    roi_bboxes: list[Bbox],
+    reader: "WindowedCOGReader",
+    layers: list[str],
+    prefilter_lunar_mode: Optional[str] = None,
+    prefilter_lunar_min_frac: float = 0.0,
+    prefilter_lunar_thresh: float = 0.1,
+    li_resolver: Optional[ViirsLIResolver] = None,
+    min_overlap_frac: float = 0.0,
+    prefilter_lunar_ephemeris: bool = True,
+    prescreen_bits: tuple[int, ...] = (),
+    prescreen_min_frac: Optional[float] = None,
+    negatives: Optional[_NegativeResults] = None,
+) -> dict[Bbox, dict]:
     """Resolve the (radiance, li, flag) triplet for one STAC item and read each
-    layer's ROI window into the local cache. Returns the record dict, or None
-    if we can't even resolve the orbit (e.g. VIIRS LI lookup failed).
+    layer's window for every ROI the item overlaps into the local cache.
+
+    Each remote layer is opened once and all ROI windows are cut from that
+    open (`WindowedCOGReader.read_windows`), so HTTP traffic scales with
+    orbits rather than orbits × ROIs. Only ROIs whose area the item's
+    footprint covers by more than `min_overlap_frac` are read. Returns
+    {roi_bbox: record}; ROIs whose orbit was dropped (pre-filter reject, or
+    the triplet couldn't be resolved, e.g. VIIRS LI lookup failed) are
+    absent.
 
     If prefilter_lunar_mode is "zero" or "low", a cheap lunar pre-screen is run
     before the expensive VIIRS LI S3 prefix lookup and the larger radiance
     download.  For "zero" mode the flag URL is derivable without any S3 listing,
     so moonlit orbits cost only one small HTTP range read (~1 KB flag tile).
-    For "low" mode the LI tile is read first instead.  Orbits where fewer than
-    prefilter_lunar_min_frac of pixels pass the criterion are dropped early.
-
-    Each layer fetch is wrapped: a single failed layer doesn't drop the orbit;
-    the bad layer is just None in the returned record. Compositing later
-    handles None gracefully.
+    For "low" mode the LI tile is read first instead.  ROIs where fewer than
+    prefilter_lunar_min_frac of pixels pass the criterion are dropped early;
+    the orbit is only fetched further if at least one ROI survives. With
+    prefilter_lunar_ephemeris (default) each ROI is first screened against
+    `harmonizer.lunar.prescreen`: ROIs where the moon is certainly down (pass)
+    or certainly up (fail) over the whole acquisition are decided with no
+    I/O, and only borderline ones read the flag/LI tile.
+
+    If prescreen_min_frac is set, the small flag tile of each surviving ROI
+    is then checked against prescreen_bits (e.g. the sensor's cloud bits):
+    ROIs where the fraction of pixels with none of those bits set is below
+    prescreen_min_frac are dropped before the radiance and LI reads. A failed
+    flag read keeps the ROIs (the pre-screen only saves work).
+
+    The layer reads are all-or-nothing (`WindowedCOGReader.read_layers`
+    caches none of an orbit's windows if any layer fails). After a transient
+    failure the orbit's records are still returned, with every layer None;
+    OrbitPrep and compositing skip them, and a rerun retries the orbit. A
+    permanent failure (`_permanent_failure`) drops the ROIs and records a
+    "failed" negative for the layer that failed, so runs reading that layer
+    skip the orbit until the negative expires. ROIs whose windows miss every
+    layer's COG are dropped.
+
+    With `negatives`, ROIs with a cached negative result for this orbit are
+    dropped up front, and every new one (no overlap, lunar or flag pre-screen
+    reject, permanent failure) is recorded.
     """
     cfg = SENSOR_CONFIGS[sensor]
+    item_bbox = tuple(item["bbox"])
+    rois = [
+        tuple(r) for r in roi_bboxes
+        if _bboxes_intersect(item_bbox, tuple(r))
+        and footprint_overlaps(item, tuple(r), min_overlap_frac)
+    ]
+    stub = _item_stub(item, sensor)
+    orbit_id = stub.orbit_id
+    if negatives is not None:
+        rois = [r for r in rois if not negatives.skip(orbit_id, r)]
+
+    def _negative(
+        dropped: Iterable[Bbox], reason: str, detail: str = "", layer: Optional[str] = None,
+    ) -> None:
+        if negatives is not None:
+            dropped = list(dropped)
+            if dropped:
+                negatives.record(orbit_id, dropped, reason, detail, layer)
+
+    if not rois:
+        return {}
 
     # ── Lunar pre-filter ─────────────────────────────────────────────────────
     if prefilter_lunar_mode in ("zero", "low"):
         import numpy as np
-        import rasterio
         from harmonizer.transformers.orbitprep import decode_bit
 
-        rad_url = item["assets"]["image"]["href"]
-        orbit_id = (
-            _orbit_id_for_viirs(rad_url) if sensor == SENSOR_VIIRS
-            else _orbit_id_for_dmsp(rad_url)
-        )
         dt = _parse_item_datetime(item)
 
-        if prefilter_lunar_mode == "zero":
-            # Flag URL derivable without S3 listing — avoids the per-orbit
-            # VIIRS LI prefix lookup for every rejected (moonlit) orbit.
-            check_url = cfg.flag_from_radiance(rad_url)
-            check_layer = "flag"
-        else:  # "low"
+        # Ephemeris first: orbits where the moon is certainly down (or
+        # certainly up) over the whole ROI are decided with no I/O at all.
+        decided: list[Bbox] = []
+        if prefilter_lunar_ephemeris:
+            borderline: list[Bbox] = []
+            for roi in rois:
+                verdict = lunar.prescreen(
+                    dt, roi, prefilter_lunar_mode, sensor, prefilter_lunar_thresh, item,
+                )
+                if verdict == lunar.PASS and prefilter_lunar_min_frac < 1.0:
+                    decided.append(roi)
+                elif verdict == lunar.FAIL:
+                    log.debug("ephemeris pre-filter rejected %s", orbit_id)
+                    _negative([roi], "ephemeris")
+                else:
+                    borderline.append(roi)
+            rois = borderline
+
+        kept: list[Bbox] = []
+        if rois:
+            if prefilter_lunar_mode == "zero":
+                # Flag URL derivable without S3 listing — avoids the per-orbit
+                # VIIRS LI prefix lookup for every rejected (moonlit) orbit.
+                check_url = _item_flag_url(item, sensor)
+                check_layer = "flag"
+            else:  # "low"
+                try:
+                    check_url = _item_li_url(item, sensor, li_resolver)
+                except Exception as e:
+                    log.warning("pre-filter LI lookup failed for %s: %s", orbit_id, e)
+                    if _permanent_failure(e):
+                        _negative(rois + decided, "failed", str(e), "li")
+                    return {}
+                check_layer = "li"
+
+            targets = [(r, reader.cache_path(stub, check_layer, r)) for r in rois]
+            check_failed = False
             try:
-                check_url = (
-                    _viirs_li_url(rad_url) if sensor == SENSOR_VIIRS
-                    else cfg.li_from_radiance(rad_url)
+                check_results = reader.read_windows(
+                    check_url, targets, categorical=check_layer in _CATEGORICAL_LAYERS,
                 )
             except Exception as e:
-                log.warning("pre-filter LI lookup failed for %s: %s", orbit_id, e)
-                return None
-            check_layer = "li"
-
-        # Minimal stub so read_window can compute the right cache path.
-        # Only sensor/orbit_id/datetime affect cache_path(); URL fields unused.
-        stub = OrbitRef(
-            sensor=sensor, orbit_id=orbit_id, datetime=dt,
-            bbox=tuple(item["bbox"]),
-            radiance_url=rad_url,
-            li_url="",
-            flag_url=cfg.flag_from_radiance(rad_url),
-        )
-        check_dst = reader.cache_path(stub, check_layer)
-        try:
-            check_result = reader.read_window(check_url, roi_bbox, check_dst)
-        except Exception as e:
-            log.warning("pre-filter read failed for %s: %s", orbit_id, e)
-            return None
-
-        if check_result is None:
-            return None  # window doesn't overlap COG
-
-        with rasterio.open(check_result) as src:
-            arr = src.read(1)
+                log.warning("pre-filter read failed for %s: %s", orbit_id, e)
+                check_results = [None] * len(rois)
+                check_failed = True
+                if _permanent_failure(e):
+                    _negative(rois, "failed", str(e), check_layer)
+
+            for roi, check_result in zip(rois, check_results):
+                if check_result is None:
+                    if not check_failed:
+                        _negative([roi], "no_overlap")
+                    continue  # window doesn't overlap COG
+                arr, _ = read_layer(check_result)
+                if prefilter_lunar_mode == "zero":
+                    passes = decode_bit(arr, cfg.zero_lunar_bit)
+                else:
+                    passes = (arr.astype(np.float32) >= 0) & (arr.astype(np.float32) < prefilter_lunar_thresh)
+                if float(passes.mean()) <= prefilter_lunar_min_frac:
+                    log.debug("pre-filter rejected %s (%.1f%% lunar-ok pixels)", orbit_id, 100 * passes.mean())
+                    _negative([roi], "lunar", f"{100 * passes.mean():.1f}% lunar-ok")
+                    continue
+                kept.append(roi)
+        rois = decided + kept
+        if not rois:
+            return {}
+    # ── end pre-filter ────────────────────────────────────────────────────────
 
-        if prefilter_lunar_mode == "zero":
-            passes = decode_bit(arr, cfg.zero_lunar_bit)
-        else:
-            passes = (arr.astype(np.float32) >= 0) & (arr.astype(np.float32) < prefilter_lunar_thresh)
+    # ── Flag-bit pre-screen (clouds etc.) ────────────────────────────────────
+    if prescreen_min_frac is not None and prescreen_bits:
+        from harmonizer.transformers.orbitprep import make_extra_mask
 
-        if float(passes.mean()) <= prefilter_lunar_min_frac:
-            log.debug("pre-filter rejected %s (%.1f%% lunar-ok pixels)", orbit_id, 100 * passes.mean())
-            return None
-    # ── end pre-filter ────────────────────────────────────────────────────────
+        targets = [(r, reader.cache_path(stub, "flag", r)) for r in rois]
+        try:
+            flag_paths = reader.read_windows(stub.flag_url, targets, categorical=True)
+        except Exception as e:
+            log.warning("flag pre-screen read failed for %s: %s", stub.orbit_id, e)
+            flag_paths = None
+        if flag_paths is not None:
+            kept = []
+            for roi, flag_path in zip(rois, flag_paths):
+                if flag_path is None:
+                    _negative([roi], "no_overlap")
+                    continue  # window doesn't overlap COG
+                usable = make_extra_mask(read_layer(flag_path)[0], prescreen_bits)
+                frac = float(usable.mean()) if usable.size else 0.0
+                if frac < prescreen_min_frac:
+                    log.debug("flag pre-screen rejected %s (%.1f%% usable pixels)", stub.orbit_id, 100 * frac)
+                    _negative([roi], "prescreen", f"{100 * frac:.1f}% usable")
+                    continue
+                kept.append(roi)
+            rois = kept
+            if not rois:
+                return {}
+    # ── end flag pre-screen ──────────────────────────────────────────────────
 
     try:
-        orbit = orbitref_from_item(item, sensor)
+        # Without an LI read the stub (li_url="") is the whole triplet.
+        orbit = orbitref_from_item(item, sensor, li_resolver) if "li" in layers else stub
     except Exception as e:
         log.warning("failed resolving orbit triplet: %s", e)
-        return None
-    record: dict = {"orbit": orbit}
+        if _permanent_failure(e):
+            # Only the LI lookup goes to the network here.
+            _negative(rois, "failed", str(e), "li")
+        return {}
+    records: dict[Bbox, dict] = {roi: {"orbit": orbit} for roi in rois}
     urls = {
         "radiance": orbit.radiance_url,
         "li": orbit.li_url,
         "flag": orbit.flag_url,
     }
-    for layer in layers:
-        dst = reader.cache_path(orbit, layer)
-        try:
-            record[layer] = reader.read_window(urls[layer], roi_bbox, dst)
-        except Exception as e:
-            log.warning("failed reading %s for %s: %s", layer, orbit.orbit_id, e)
-            record[layer] = None
-    return record
+    targets = [
+        (roi, {layer: reader.cache_path(orbit, layer, roi) for layer in layers})
+        for roi in rois
+    ]
+    try:
+        paths = reader.read_layers({layer: urls[layer] for layer in layers}, targets)
+    except Exception as e:
+        log.warning("failed reading %s: %s", orbit.orbit_id, e)
+        if _permanent_failure(e):
+            _negative(rois, "failed", str(e), getattr(e, "layer", "radiance"))
+            return {}
+        paths = [dict.fromkeys(layers) for _ in rois]
+    else:
+        missed = [
+            roi for roi, layer_paths in zip(rois, paths)
+            if layer_paths and all(p is None for p in layer_paths.values())
+        ]
+        _negative(missed, "no_overlap")
+        for roi in missed:
+            del records[roi]
+    for roi, layer_paths in zip(rois, paths):
+        if roi in records:
+            records[roi].update(layer_paths)
+    return records
+
+
+def _item_stub(item: dict, sensor: str) -> OrbitRef:
+    """Minimal OrbitRef so read_windows can compute the right cache paths
+    before the (possibly costly) LI URL is resolved. Only sensor/orbit_id/
+    datetime affect cache_path(); li_url is left empty."""
+    rad_url = item["assets"]["image"]["href"]
+    orbit_id = (
+        _orbit_id_for_viirs(rad_url) if sensor == SENSOR_VIIRS
+        else _orbit_id_for_dmsp(rad_url)
+    )
+    return OrbitRef(
+        sensor=sensor, orbit_id=orbit_id, datetime=_parse_item_datetime(item),
+        bbox=tuple(item["bbox"]),
+        radiance_url=rad_url,
+        li_url="",
+        flag_url=_item_flag_url(item, sensor),
+    )
+
+
+def _ingest_by_coverage(
+    selector: CoverageSelector,
+    worker,
+    out: dict[Bbox, OrbitTableBuilder],
+    max_workers: int,
+    max_orbits: Optional[int] = None,
+) -> None:
+    """Fetch the selector's best candidates until every (period, ROI) meets
+    its target or runs out, appending records to `out`.
+
+    Keeps at most `max_workers` orbits in flight and feeds each finished
+    orbit's valid-observation masks back before choosing the next one.
+    """
+    def _run(item, item_rois):
+        records = worker(item, item_rois)
+        return records, {roi: selector.observed(roi, rec) for roi, rec in records.items()}
+
+    pending: dict = {}
+    n = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+         tqdm(desc=f"{selector.sensor} orbits", unit="orbit") as pbar:
+        while True:
+            while len(pending) < max_workers and (max_orbits is None or n < max_orbits):
+                nxt = selector.next_item()
+                if nxt is None:
+                    break
+                item, orbit_id, item_rois = nxt
+                pending[pool.submit(_run, item, item_rois)] = (item, orbit_id, item_rois)
+                n += 1
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                item, orbit_id, item_rois = pending.pop(fut)
+                try:
+                    records, masks = fut.result()
+                except Exception as e:
+                    log.warning("orbit worker raised: %s", e)
+                    records, masks = {}, {}
+                selector.done(item, orbit_id, item_rois, masks)
+                for roi, record in records.items():
+                    out[roi].append(record)
+                pbar.update(1)
+
+
+def _union_bbox(bboxes: Iterable[Bbox]) -> Bbox:
+    xmins, ymins, xmaxs, ymaxs = zip(*bboxes)
+    return (min(xmins), min(ymins), max(xmaxs), max(ymaxs))
 
 
 def ingest(
@@ -598,13 +2018,27 @@ def ingest(
     prefilter_lunar_mode: Optional[str] = None,
     prefilter_lunar_min_frac: float = 0.0,
     prefilter_lunar_thresh: float = 0.1,
-) -> list[dict]:
+    stac_index: Optional[Path] = None,
+    adaptive_concurrency: bool = True,
+    manifest: Optional[CacheManifest] = None,
+    min_overlap_frac: float = 0.0,
+    prefilter_lunar_ephemeris: bool = True,
+    prescreen_flags: Optional[Iterable[str]] = None,
+    prescreen_min_frac: Optional[float] = None,
+    store: Optional[OrbitStore] = None,
+    overview_factor: int = 1,
+    backend: Union[str, RasterBackend, None] = None,
+    hedge_reads: bool = True,
+    negative_cache: bool = True,
+    tile_cache: Optional[Path] = None,
+    coverage_target: Optional[CoverageTarget] = None,
+) -> OrbitTable:
     """Resolve and locally cache all orbit triplets matching ROI + date range.
 
     Per-orbit work (resolving the LI prefix lookup for VIIRS, then doing
     windowed COG reads for radiance/li/flag) is dispatched across a thread
     pool — every step is HTTP-bound, so threads parallelize cleanly. Cache
-    hits in `WindowedCOGReader.read_window` short-circuit, so re-running over
+    hits in `WindowedCOGReader.read_windows` short-circuit, so re-running over
     a wider date range is incremental.
 
     prefilter_lunar_mode controls an optional early rejection of moonlit orbits
@@ -613,51 +2047,357 @@ def ingest(
     LI layer directly.  Orbits where fewer than prefilter_lunar_min_frac of
     pixels pass are dropped.  For "zero" mode the flag tile (~1 KB) is read
     before any S3 LI prefix lookup or radiance download (~75 KB), so rejected
-    moonlit orbits cost almost nothing.
-
-    Returns a list of dicts:
+    moonlit orbits cost almost nothing. With prefilter_lunar_ephemeris
+    (default) orbits whose outcome is certain from the moon's computed
+    altitude/illuminance (`harmonizer.lunar`) skip that tile read too.
+
+    max_workers is the orbit thread-pool size. With adaptive_concurrency
+    (default) it is only a ceiling: the number of concurrent window reads and
+    catalog fetches is steered by AIMD controllers from observed latency,
+    throughput and error rate (current levels are logged as they change), so
+    the same defaults sit near the bandwidth ceiling on a laptop or a VM
+    without piling up timeouts during S3 slowdowns.
+
+    stac_index is an optional path to a persistent `STACItemIndex` SQLite
+    file; when given, catalog discovery and the per-month VIIRS LI key maps
+    are answered from it wherever it holds fresh data.
+
+    tile_cache is an optional path to a persistent `TileCache` SQLite file;
+    when given, windows are assembled from cached remote COG tiles and only
+    missing tiles are fetched, so overlapping ROIs share downloads (see
+    `harmonizer.tilecache`).
+
+    manifest is an optional `CacheManifest`; when given, window cache hits
+    are answered from it rather than by stat-ing each file, and orbit/ROI
+    pairs that ended in no overlap, a pre-filter reject or a permanent error
+    are recorded as negative results and skipped on later runs with the same
+    filter settings (see `harmonizer.cachedb`; negative_cache=False turns
+    this off).
+
+    min_overlap_frac drops orbits whose exact swath footprint covers no more
+    than this fraction of the ROI (0.0 keeps anything with real overlap)
+    before any raster I/O; see `harmonizer.footprint`.
+
+    prescreen_min_frac enables the flag-tile pre-screen: orbits whose ROI
+    window has less than this fraction of pixels free of the
+    prescreen_flags bit groups (default: every group in the sensor's
+    `SensorConfig.prescreen_bits`, i.e. clouds) are dropped before their
+    radiance and LI are read. Pair it with OrbitPrep's extra_mask_if_set
+    on the same bits (`SensorConfig.flag_bits`). None (default) disables it.
+
+    With `overview_factor` N > 1 every window is read at N× coarser
+    resolution, served from the COG's internal overview levels (with N a
+    power of two the values come straight from the producer's overviews).
+    The flag layer is read at full resolution and decimated locally
+    instead, since averaged flag overviews would corrupt the lunar and
+    cloud bits. Preview windows are cached under their own ROI slug
+    (``...-ovN``).
+
+    With a `store` (`harmonizer.orbitstore.OrbitStore`) the windows are
+    appended to per-period HDF5 files and the records hold `StoreRef`s
+    instead of GeoTIFF paths; downstream code reads either with
+    `harmonizer.orbitstore.read_layer`.
+
+    backend selects the raster I/O engine for window reads: "gdal"
+    (default), "range", "local" or "auto", or a `RasterBackend` instance;
+    see `harmonizer.cogio`.
+
+    hedge_reads (default) duplicates a window read still running after the
+    running p95 read latency, within a 5% budget of extra reads, and uses
+    whichever copy finishes first; the hedging rate is logged at the end.
+
+    With a `coverage_target` (`harmonizer.selection.CoverageTarget`) not every
+    candidate is fetched: each period's orbits are ranked by expected useful
+    coverage of the ROI and taken best first until enough ROI pixels have
+    `min_obs` valid observations. The reached counts are written to
+    ``{cache_dir}/selection/{sensor}/{roi_slug}/{period}.json``. Discovery
+    finishes before selection starts, since a period can't be ranked until
+    all its candidates are known. Needs the radiance and flag layers.
+
+    Returns an `harmonizer.orbittable.OrbitTable`: a columnar table that
+    also reads as a sequence of record dicts
         {"orbit": OrbitRef, "radiance": Path, "li": Path, "flag": Path}
     where Path entries may be None if the layer didn't overlap the ROI or was
-    skipped via skip_layers. Output ordering reflects completion order (results
-    are collected via as_completed), so a single slow orbit cannot stall reporting
-    or downstream consumption of finished records.
+    skipped via skip_layers. Skipping "li" also skips resolving its URL (for
+    VIIRS, the GDNBO bucket lookup); the orbit's `li_url` is then empty. See
+    `harmonizer.transformers.orbitprep.plan_layers` for when LI is needed.
+    Row ordering reflects completion order (each orbit worker's future is
+    handed back on a done-queue as it finishes, or picked up with
+    `wait(FIRST_COMPLETED)` under a coverage target), so a single slow orbit
+    cannot stall reporting or downstream consumption of finished records.
+
+    This is `ingest_many` with a single ROI.
+    """
+    roi_bbox = tuple(roi_bbox)
+    return ingest_many(
+        [roi_bbox], start, end, sensor, cache_dir,
+        max_orbits=max_orbits,
+        skip_layers=skip_layers,
+        dmsp_preferred_sats=dmsp_preferred_sats,
+        max_workers=max_workers,
+        prefilter_lunar_mode=prefilter_lunar_mode,
+        prefilter_lunar_min_frac=prefilter_lunar_min_frac,
+        prefilter_lunar_thresh=prefilter_lunar_thresh,
+        stac_index=stac_index,
+        adaptive_concurrency=adaptive_concurrency,
+        manifest=manifest,
+        min_overlap_frac=min_overlap_frac,
+        prefilter_lunar_ephemeris=prefilter_lunar_ephemeris,
+        prescreen_flags=prescreen_flags,
+        prescreen_min_frac=prescreen_min_frac,
+        store=store,
+        overview_factor=overview_factor,
+        backend=backend,
+        hedge_reads=hedge_reads,
+        negative_cache=negative_cache,
+        tile_cache=tile_cache,
+        coverage_target=coverage_target,
+    )[roi_bbox]
+
+
+def ingest_many(
+    roi_bboxes: Iterable[Bbox],
+    start: datetime,
+    end: datetime,
+    sensor: str,
+    cache_dir: Path,
+    max_orbits: Optional[int] = None,
+    skip_layers: Iterable[str] = (),
+    dmsp_preferred_sats: Optional[dict[str, list[str]]] = None,
+    max_workers: int = 32,
+    prefilter_lunar_mode: Optional[str] = None,
+    prefilter_lunar_min_frac: float = 0.0,
+    prefilter_lunar_thresh: float = 0.1,
+    stac_index: Optional[Path] = None,
+    adaptive_concurrency: bool = True,
+    manifest: Optional[CacheManifest] = None,
+    min_overlap_frac: float = 0.0,
+    prefilter_lunar_ephemeris: bool = True,
+    prescreen_flags: Optional[Iterable[str]] = None,
+    prescreen_min_frac: Optional[float] = None,
+    store: Optional[OrbitStore] = None,
+    overview_factor: int = 1,
+    backend: Union[str, RasterBackend, None] = None,
+    hedge_reads: bool = True,
+    negative_cache: bool = True,
+    tile_cache: Optional[Path] = None,
+    coverage_target: Optional[CoverageTarget] = None,
+) -> dict[Bbox, OrbitTable]:
+    """`ingest` for many ROIs at once, sharing discovery and remote opens.
+
+    The catalog is walked once over the union of all ROI bboxes, and every
+    orbit overlapping at least one ROI is processed once: each remote layer
+    is opened a single time and every intersecting ROI's window is cut from
+    that open. Window outputs land in the same per-ROI cache paths a
+    single-ROI `ingest` would use, so batch and single runs share caches.
+
+    Discovery and reads are pipelined: a discovery thread walks the catalog
+    and hands each accepted orbit to the worker pool as soon as its item
+    JSON passes the filters, through a queue bounded at
+    `_DISPATCH_QUEUE_PER_WORKER` orbits per worker, so window reads start
+    while item JSONs are still being fetched.
+
+    max_orbits caps the number of candidate orbits over the union (the
+    first ones discovered; with a coverage_target, the first ones selected).
+    All other arguments are as for `ingest`.
+    Returns {roi_bbox: OrbitTable} with one (possibly empty) table per
+    input ROI.
     """
     if start.tzinfo is None:
         start = start.replace(tzinfo=timezone.utc)
     if end.tzinfo is None:
         end = end.replace(tzinfo=timezone.utc)
-
-    client = STACCatalogClient(sensor, dmsp_preferred_sats=dmsp_preferred_sats)
-    reader = WindowedCOGReader(cache_dir, roi_bbox)
+    rois: list[Bbox] = list(dict.fromkeys(tuple(r) for r in roi_bboxes))
+    if not rois:
+        return {}
+    union = _union_bbox(rois)
 
     skip = set(skip_layers)
     layers = [l for l in ("radiance", "li", "flag") if l not in skip]
+    if coverage_target is not None and not {"radiance", "flag"} <= set(layers):
+        raise ValueError("coverage_target needs the radiance and flag layers")
+    index = STACItemIndex(stac_index) if stac_index is not None else None
+    tiles = TileCache(tile_cache) if tile_cache is not None else None
+    client = STACCatalogClient(
+        sensor, dmsp_preferred_sats=dmsp_preferred_sats, index=index,
+        adaptive=adaptive_concurrency,
+    )
+    # Each orbit worker reads its layers concurrently (`read_layers`), so up
+    # to max_workers × len(layers) window reads can be in flight.
+    max_reads = max_workers * max(1, len(layers))
+    read_controller: Optional[AIMDController] = None
+    limiter: Optional[AdaptiveSemaphore] = None
+    if adaptive_concurrency:
+        read_controller = AIMDController(
+            f"{sensor} window reads",
+            initial=min(_ADAPTIVE_INITIAL, max_reads), maximum=max_reads,
+        )
+        limiter = AdaptiveSemaphore(read_controller)
+    hedge = HedgeController(
+        f"{sensor} window reads", quantile=_HEDGE_QUANTILE, budget=_HEDGE_BUDGET,
+    ) if hedge_reads else None
+    reader = WindowedCOGReader(
+        cache_dir, rois[0] if len(rois) == 1 else None, limiter=limiter,
+        manifest=manifest, layer_workers=max_reads - max_workers or 1, store=store,
+        overview_factor=overview_factor, backend=backend, hedge=hedge, tiles=tiles,
+    )
+    li_resolver = ViirsLIResolver(index) if index is not None else None
 
-    items = list(client.find_items(roi_bbox, start, end))
-    if max_orbits is not None:
-        items = items[:max_orbits]
-    log.info("%s: dispatching %d orbits across %d worker(s)", sensor, len(items), max_workers)
-
-    def _worker(item):
-        return _process_one_orbit(
-            item, sensor, roi_bbox, reader, layers,
-            prefilter_lunar_mode=prefilter_lunar_mode,
-            prefilter_lunar_min_frac=prefilter_lunar_min_frac,
-            prefilter_lunar_thresh=prefilter_lunar_thresh,
+    cfg = SENSOR_CONFIGS[sensor]
+    prescreen_bits: tuple[int, ...] = ()
+    if prescreen_min_frac is not None:
+        prescreen_bits = cfg.flag_bits(
+            cfg.prescreen_bits if prescreen_flags is None else prescreen_flags
         )
 
-    out: list[dict] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        futures = [pool.submit(_worker, item) for item in items]
-        with tqdm(total=len(items), desc=f"{sensor} orbits", unit="orbit") as pbar:
-            for fut in as_completed(futures):
+    negatives: Optional[_NegativeResults] = None
+    if manifest is not None and negative_cache:
+        modes = {"no_overlap": ""}
+        if prefilter_lunar_mode in ("zero", "low"):
+            modes["lunar"] = (
+                f"lunar={prefilter_lunar_mode}:min={prefilter_lunar_min_frac}"
+                f":thresh={prefilter_lunar_thresh}"
+            )
+            if prefilter_lunar_ephemeris:
+                # Own mode: a run with the ephemeris off must still check the
+                # flag/LI tile of an orbit the ephemeris rejected.
+                modes["ephemeris"] = f"ephemeris:{modes['lunar']}:{lunar.prescreen_key()}"
+        if prescreen_min_frac is not None and prescreen_bits:
+            modes["prescreen"] = f"prescreen={sorted(prescreen_bits)}:min={prescreen_min_frac}"
+        negatives = _NegativeResults(manifest, reader, rois, modes, layers)
+
+    out = {roi: OrbitTableBuilder(sensor, layers) for roi in rois}
+    try:
+        def _worker(item, item_rois=rois):
+            return _process_orbit_rois(
+                item, sensor, item_rois, reader, layers,
+                prefilter_lunar_mode=prefilter_lunar_mode,
+                prefilter_lunar_min_frac=prefilter_lunar_min_frac,
+                prefilter_lunar_thresh=prefilter_lunar_thresh,
+                li_resolver=li_resolver,
+                min_overlap_frac=min_overlap_frac,
+                prefilter_lunar_ephemeris=prefilter_lunar_ephemeris,
+                prescreen_bits=prescreen_bits,
+                prescreen_min_frac=prescreen_min_frac,
+                negatives=negatives,
+            )
+
+        def _accepts(item) -> bool:
+            return any(
+                _bboxes_intersect(tuple(item["bbox"]), roi)
+                and footprint_overlaps(item, roi, min_overlap_frac)
+                for roi in rois
+            )
+
+        if coverage_target is not None:
+            from harmonizer.transformers.orbitprep import NATIVE_PIXEL_SIZE_DEG
+
+            selector = CoverageSelector(
+                coverage_target, sensor, rois,
+                NATIVE_PIXEL_SIZE_DEG[sensor] * overview_factor,
+            )
+            with contextlib.closing(client.find_items(union, start, end)) as found:
+                for item in found:
+                    if _accepts(item):
+                        selector.add(item, _item_stub(item, sensor).orbit_id)
+            _ingest_by_coverage(selector, _worker, out, max_workers, max_orbits)
+            selector.write_provenance(
+                cache_dir / "selection", {roi: reader._roi_slug(roi) for roi in rois},
+            )
+            summary = selector.summary()
+            log.info(
+                "%s: coverage selection fetched %d of %d candidate orbits; "
+                "%d of %d period/ROI pairs reached %d obs",
+                sensor, summary["fetched"], summary["candidates"], summary["met"],
+                summary["period_rois"], coverage_target.min_obs,
+            )
+        else:
+            # The discovery thread submits accepted orbits to the pool, holding
+            # one slot per queued or running orbit; finished futures come back
+            # on `done`, followed by the number dispatched once discovery ends.
+            done: queue.Queue = queue.Queue()
+            slots = threading.Semaphore(max_workers * (1 + _DISPATCH_QUEUE_PER_WORKER))
+            discovery_error: list[BaseException] = []
+
+            def _finished(fut) -> None:
+                slots.release()
+                done.put(fut)
+
+            def _discover(pool: ThreadPoolExecutor) -> None:
+                n = 0
                 try:
-                    record = fut.result()
-                except Exception as e:
-                    log.warning("orbit worker raised: %s", e)
-                    record = None
-                if record is not None:
-                    out.append(record)
-                pbar.update(1)
-    log.info("%s: ingest complete (%d records)", sensor, len(out))
-    return out
+                    with contextlib.closing(client.find_items(union, start, end)) as found:
+                        for item in found:
+                            if max_orbits is not None and n >= max_orbits:
+                                break  # max_orbits=0
+                            if not _accepts(item):
+                                continue
+                            slots.acquire()
+                            pool.submit(_worker, item).add_done_callback(_finished)
+                            n += 1
+                            if max_orbits is not None and n >= max_orbits:
+                                break
+                except BaseException as e:
+                    discovery_error.append(e)
+                finally:
+                    log.info(
+                        "%s: dispatched %d orbits for %d ROI(s) across %d worker(s)",
+                        sensor, n, len(rois), max_workers,
+                    )
+                    done.put(n)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+                 tqdm(desc=f"{sensor} orbits", unit="orbit") as pbar:
+                discovery = threading.Thread(
+                    target=_discover, args=(pool,), name=f"{sensor}-discovery", daemon=True,
+                )
+                discovery.start()
+                total: Optional[int] = None
+                n_done = 0
+                while total is None or n_done < total:
+                    fut = done.get()
+                    if isinstance(fut, int):
+                        total = pbar.total = fut
+                        pbar.refresh()
+                        continue
+                    try:
+                        records = fut.result()
+                    except Exception as e:
+                        log.warning("orbit worker raised: %s", e)
+                        records = {}
+                    for roi, record in records.items():
+                        out[roi].append(record)
+                    n_done += 1
+                    pbar.update(1)
+                discovery.join()
+            if discovery_error:
+                raise discovery_error[0]
+    finally:
+        reader.close()
+        client.close()
+        if index is not None:
+            index.close()
+        if tiles is not None:
+            tile_stats = tiles.stats()
+            tiles.close()
+    log.info(
+        "%s: ingest complete (%d records over %d ROI(s))",
+        sensor, sum(len(v) for v in out.values()), len(rois),
+    )
+    if tiles is not None and tile_stats["hits"] + tile_stats["misses"]:
+        log.info(
+            "%s: tile cache served %d of %d tiles",
+            sensor, tile_stats["hits"], tile_stats["hits"] + tile_stats["misses"],
+        )
+    if negatives is not None and negatives.skipped:
+        log.info("%s: skipped %d orbit/ROI pairs with cached negative results", sensor, negatives.skipped)
+    if read_controller is not None:
+        log.info("%s: window-read concurrency ended at %d", sensor, read_controller.limit)
+    if hedge is not None and hedge.stats()["requests"]:
+        stats = hedge.stats()
+        log.info(
+            "%s: hedged %d of %d window reads (%.1f%%, %d won, %d over budget)",
+            sensor, stats["hedges"], stats["requests"], 100 * stats["rate"],
+            stats["wins"], stats["denied"],
+        )
+    return {roi: builder.build() for roi, builder in out.items()}
@@ -0,0 +1,232 @@
+"""Analytical lunar ephemeris for a zero-HTTP lunar pre-screen.
+
+The flag/LI pre-filter in `harmonizer.ingest` still reads one small tile per
+orbit just to learn whether the moon was up. About half of all orbits are
+moonlit, and for most of them that is obvious from the clock alone. This
+module computes moon altitude and lunar illuminance at the ground from the
+acquisition time and ROI location, so orbits that certainly pass or
+certainly fail the "zero"/"low" criterion are decided with no network I/O.
+Only borderline orbits still read the flag or LI tile.
+
+Positions use the low-precision formulae of the Astronomical Almanac (moon
+≈0.3°, sun ≈0.01° over 1950–2050); altitudes are topocentric, without
+refraction. Illuminance follows the usual photometric model: the lunar
+magnitude as a function of phase angle (Allen), converted to lux, scaled by
+the Earth–Moon distance, sin(altitude) and atmospheric extinction
+(0.2 mag/airmass, Kasten–Young airmass). Its absolute accuracy is tens of
+percent, so the pre-screen only trusts it well away from the thresholds
+(`_ALT_MARGIN_DEG`, `_LUX_MARGIN`).
+
+`prescreen()` samples the ROI corners, edge midpoints and centre over the
+orbit's acquisition span and returns PASS / FAIL only if every sample agrees.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from harmonizer.constants import SENSOR_DMSP, SENSOR_VIIRS
+
+Bbox = tuple[float, float, float, float]
+
+PASS = "pass"
+FAIL = "fail"
+BORDERLINE = "borderline"
+
+# Moon altitudes within this many degrees of the horizon are never decided
+# analytically (ephemeris error, parallax, refraction, terrain).
+_ALT_MARGIN_DEG = 2.0
+# "low" mode: illuminance must be below thresh / _LUX_MARGIN (certain pass)
+# or above thresh * _LUX_MARGIN (certain fail).
+_LUX_MARGIN = 2.0
+# "zero" mode: a moon above the horizon but fainter than this may still be
+# flagged zero-illuminance by the product (near new moon), so it's borderline.
+_ZERO_FAIL_MIN_LUX = 1e-3
+
+# How long after the item datetime the ROI may have been imaged. VIIRS items
+# are ~5-minute granules; DMSP OIS items are whole ~101-minute orbits.
+ACQUISITION_SPAN = {
+    SENSOR_VIIRS: timedelta(minutes=6),
+    SENSOR_DMSP: timedelta(minutes=105),
+}
+_TIME_STEP = timedelta(minutes=15)
+
+_J2000 = datetime(2000, 1, 1, 12, tzinfo=timezone.utc)
+_MEAN_MOON_DIST_ER = 60.27  # Earth radii
+
+
+def _sind(x: float) -> float:
+    return math.sin(math.radians(x))
+
+
+def _cosd(x: float) -> float:
+    return math.cos(math.radians(x))
+
+
+def _days_since_j2000(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _J2000).total_seconds() / 86400.0
+
+
+def _ecliptic_to_equatorial(lam: float, beta: float, eps: float) -> tuple[float, float]:
+    """(λ, β, ε) in degrees → (RA, Dec) in degrees."""
+    x = _cosd(beta) * _cosd(lam)
+    y = _cosd(eps) * _cosd(beta) * _sind(lam) - _sind(eps) * _sind(beta)
+    z = _sind(eps) * _cosd(beta) * _sind(lam) + _cosd(eps) * _sind(beta)
+    ra = math.degrees(math.atan2(y, x)) % 360.0
+    dec = math.degrees(math.asin(max(-1.0, min(1.0, z))))
+    return ra, dec
+
+
+def moon_ecliptic(dt: datetime) -> tuple[float, float, float]:
+    """Geocentric ecliptic longitude, latitude (deg) and distance (Earth radii)."""
+    T = _days_since_j2000(dt) / 36525.0
+    lam = (
+        218.32 + 481267.881 * T
+        + 6.29 * _sind(135.0 + 477198.87 * T)
+        - 1.27 * _sind(259.3 - 413335.36 * T)
+        + 0.66 * _sind(235.7 + 890534.22 * T)
+        + 0.21 * _sind(269.9 + 954397.74 * T)
+        - 0.19 * _sind(357.5 + 35999.05 * T)
+        - 0.11 * _sind(186.5 + 966404.03 * T)
+    ) % 360.0
+    beta = (
+        5.13 * _sind(93.3 + 483202.02 * T)
+        + 0.28 * _sind(228.2 + 960400.89 * T)
+        - 0.28 * _sind(318.3 + 6003.15 * T)
+        - 0.17 * _sind(217.6 - 407332.21 * T)
+    )
+    parallax = (
+        0.9508
+        + 0.0518 * _cosd(135.0 + 477198.87 * T)
+        + 0.0095 * _cosd(259.3 - 413335.36 * T)
+        + 0.0078 * _cosd(235.7 + 890534.22 * T)
+        + 0.0028 * _cosd(269.9 + 954397.74 * T)
+    )
+    return lam, beta, 1.0 / _sind(parallax)
+
+
+def sun_ecliptic_longitude(dt: datetime) -> float:
+    d = _days_since_j2000(dt)
+    L = 280.460 + 0.9856474 * d
+    g = 357.528 + 0.9856003 * d
+    return (L + 1.915 * _sind(g) + 0.020 * _sind(2 * g)) % 360.0
+
+
+def _obliquity(dt: datetime) -> float:
+    return 23.439 - 0.0000004 * _days_since_j2000(dt)
+
+
+def _gmst_deg(dt: datetime) -> float:
+    return (280.46061837 + 360.98564736629 * _days_since_j2000(dt)) % 360.0
+
+
+def moon_altitude(dt: datetime, lon: float, lat: float) -> float:
+    """Topocentric moon altitude in degrees (no refraction)."""
+    lam, beta, dist = moon_ecliptic(dt)
+    ra, dec = _ecliptic_to_equatorial(lam, beta, _obliquity(dt))
+    hour_angle = _gmst_deg(dt) + lon - ra
+    sin_h = _sind(lat) * _sind(dec) + _cosd(lat) * _cosd(dec) * _cosd(hour_angle)
+    h = math.degrees(math.asin(max(-1.0, min(1.0, sin_h))))
+    # Parallax in altitude: the moon is close enough for this to be ~1°.
+    return h - math.degrees(math.asin(_cosd(h) / dist))
+
+
+def moon_phase_angle(dt: datetime) -> float:
+    """Sun–Moon–Earth phase angle in degrees (0 = full, 180 = new)."""
+    lam, beta, _ = moon_ecliptic(dt)
+    cos_elong = _cosd(beta) * _cosd(lam - sun_ecliptic_longitude(dt))
+    return 180.0 - math.degrees(math.acos(max(-1.0, min(1.0, cos_elong))))
+
+
+def _airmass(alt_deg: float) -> float:
+    """Kasten & Young (1989) relative airmass."""
+    return 1.0 / (_sind(alt_deg) + 0.50572 * (alt_deg + 6.07995) ** -1.6364)
+
+
+def moon_illuminance(dt: datetime, lon: float, lat: float) -> float:
+    """Lunar illuminance on a horizontal surface at the ground, in lux."""
+    alt = moon_altitude(dt, lon, lat)
+    if alt <= 0:
+        return 0.0
+    phase = moon_phase_angle(dt)
+    _, _, dist = moon_ecliptic(dt)
+    mag = -12.73 + 0.026 * phase + 4e-9 * phase ** 4
+    normal = 10 ** (-0.4 * (mag + 14.18)) * (_MEAN_MOON_DIST_ER / dist) ** 2
+    extinction = 10 ** (-0.4 * 0.2 * _airmass(alt))
+    return normal * _sind(alt) * extinction
+
+
+def _sample_points(roi_bbox: Bbox) -> list[tuple[float, float]]:
+    xmin, ymin, xmax, ymax = roi_bbox
+    xs = (xmin, (xmin + xmax) / 2, xmax)
+    ys = (ymin, (ymin + ymax) / 2, ymax)
+    return [(x, y) for x in xs for y in ys]
+
+
+def _sample_times(
+    dt: datetime, sensor: str, item: Optional[dict] = None,
+) -> Iterable[datetime]:
+    props = (item or {}).get("properties", {})
+    start = _parse(props.get("start_datetime")) or dt
+    end = _parse(props.get("end_datetime")) or dt + ACQUISITION_SPAN.get(sensor, timedelta(0))
+    t = start
+    while t < end:
+        yield t
+        t += _TIME_STEP
+    yield end
+
+
+def _parse(s: Optional[str]) -> Optional[datetime]:
+    if not s:
+        return None
+    dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def prescreen_key() -> str:
+    """The margins `prescreen` decides with, for keying cached verdicts."""
+    return f"alt={_ALT_MARGIN_DEG}:lux={_LUX_MARGIN}:zero={_ZERO_FAIL_MIN_LUX}"
+
+
+def prescreen(
+    dt: datetime,
+    roi_bbox: Bbox,
+    mode: str,
+    sensor: str,
+    low_thresh_lux: float = 0.1,
+    item: Optional[dict] = None,
+) -> str:
+    """Decide an orbit's lunar criterion from the ephemeris alone.
+
+    Returns PASS if every pixel of the ROI certainly passes `mode`
+    ("zero": moon below the horizon; "low": illuminance below
+    `low_thresh_lux`), FAIL if every pixel certainly fails, and BORDERLINE
+    otherwise (the caller then reads the flag/LI tile). `item`, if given,
+    supplies `start_datetime`/`end_datetime` for the acquisition span.
+    """
+    if mode not in ("zero", "low"):
+        return BORDERLINE
+    verdicts = set()
+    for t in _sample_times(dt, sensor, item):
+        for lon, lat in _sample_points(roi_bbox):
+            alt = moon_altitude(t, lon, lat)
+            if alt < -_ALT_MARGIN_DEG:
+                verdicts.add(PASS)
+            elif alt < _ALT_MARGIN_DEG:
+                return BORDERLINE
+            else:
+                lux = moon_illuminance(t, lon, lat)
+                if mode == "zero":
+                    verdicts.add(FAIL if lux > _ZERO_FAIL_MIN_LUX else BORDERLINE)
+                elif lux < low_thresh_lux / _LUX_MARGIN:
+                    verdicts.add(PASS)
+                elif lux > low_thresh_lux * _LUX_MARGIN:
+                    verdicts.add(FAIL)
+                else:
+                    verdicts.add(BORDERLINE)
+            if len(verdicts) > 1 or BORDERLINE in verdicts:
+                return BORDERLINE
+    return verdicts.pop() if verdicts else BORDERLINE
@@ -16,74 +16,230 @@ Caches under `data/cache/...` make reruns incremental.
 from __future__ import annotations
 
 import argparse
+import json
 import logging
 import time
+from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterable, Optional
 
 from tqdm import tqdm
 
+from harmonizer.cachedb import CacheManifest, SharedTier
 from harmonizer.calibrate import calibrate_dmsp_composites, prep_viirs_composites
 from harmonizer.composite import Compositor
 from harmonizer.config import (
     ARTIFACTS,
+    CACHE,
+    CACHE_MANIFEST,
     CALIB_DIR,
     COMPOSITE_DIR,
+    COMPOSITE_OUTPUTS,
+    COVERAGE_MIN_PIXEL_FRAC,
+    COVERAGE_TARGET_OBS,
     DMSP_PREFERRED_SATS,
     DOWNSAMPLEVIIRS,
     END_DATE,
+    HEDGE_WINDOW_READS,
+    INGEST_BACKEND,
     INGEST_CACHE,
+    INGEST_STORE,
     LUNAR_MASK_MODE,
+    MIN_FOOTPRINT_OVERLAP,
+    ORBIT_TABLES,
     OUTPUT,
     PERIOD_FORMAT,
     PREP_DIR,
+    PRESCREEN_FLAGS,
+    PRESCREEN_MIN_USABLE_FRAC,
+    RASTER_BACKEND,
     RESULTS,
     ROIPATH,
     SAMPLEMETHOD,
+    SHARED_CACHE,
+    SHARED_CACHE_MODE,
+    SHARED_CACHE_WRITE_BACK,
+    SKIP_LI_IN_ZERO_MODE,
+    STAC_INDEX,
+    TILE_CACHE,
     START_DATE,
     TRAIN_YEAR,
     VIIRS_PREP_DIR,
 )
-from harmonizer.constants import SENSOR_DMSP, SENSOR_VIIRS
+from harmonizer.constants import SENSOR_CONFIGS, SENSOR_DMSP, SENSOR_VIIRS
 from harmonizer.diagnostics import run_diagnostics
 from harmonizer.ingest import ingest
+from harmonizer.orbitstore import OrbitStore
+from harmonizer.orbittable import OrbitTable
+from harmonizer.selection import CoverageTarget
 from harmonizer.transformers.gbm import XGB
 from harmonizer.transformers.harmonize import Harmonizer, save_obj
-from harmonizer.transformers.orbitprep import OrbitPrep
-from harmonizer.utils import roi_bbox_from_path
+from harmonizer.transformers.orbitprep import (
+    INGEST_LAYERS,
+    NATIVE_PIXEL_SIZE_DEG,
+    OrbitPrep,
+    plan_layers,
+)
+from harmonizer.utils import roi_bbox_from_path, roi_slug
 
 log = logging.getLogger(__name__)
 
 
-def _build_sensor_composites(
+def _open_manifest() -> CacheManifest:
+    """The cache manifest, in front of the shared tier if one is configured."""
+    shared = None
+    if SHARED_CACHE is not None:
+        shared = SharedTier(
+            SHARED_CACHE, CACHE, mode=SHARED_CACHE_MODE, write_back=SHARED_CACHE_WRITE_BACK,
+        )
+    return CacheManifest(CACHE_MANIFEST, shared=shared)
+
+
+def _mask_bits(sensor: str) -> tuple[int, ...]:
+    """Flag bits OrbitPrep masks on top of the lunar and validity masks."""
+    # Mask the pre-screened flag bits too, so kept orbits don't contribute
+    # the cloudy pixels the pre-screen tolerated.
+    if PRESCREEN_MIN_USABLE_FRAC is None:
+        return ()
+    return SENSOR_CONFIGS[sensor].flag_bits(PRESCREEN_FLAGS)
+
+
+def _ingest_kwargs(
+    sensor: str,
+    preview: int = 1,
+    lunar_mode: str = LUNAR_MASK_MODE,
+    period_format: str = PERIOD_FORMAT,
+) -> dict:
+    layers = plan_layers(lunar_mode, COMPOSITE_OUTPUTS, SKIP_LI_IN_ZERO_MODE)
+    extra = {"dmsp_preferred_sats": DMSP_PREFERRED_SATS} if sensor == SENSOR_DMSP else {}
+    if COVERAGE_TARGET_OBS is not None:
+        extra["coverage_target"] = CoverageTarget(
+            min_obs=COVERAGE_TARGET_OBS, min_pixel_frac=COVERAGE_MIN_PIXEL_FRAC,
+            period_format=period_format, lunar_mode=lunar_mode,
+            mask_bits=_mask_bits(sensor),
+        )
+    return {
+        "stac_index": STAC_INDEX,
+        "tile_cache": TILE_CACHE,
+        "min_overlap_frac": MIN_FOOTPRINT_OVERLAP,
+        "prescreen_flags": PRESCREEN_FLAGS,
+        "prescreen_min_frac": PRESCREEN_MIN_USABLE_FRAC,
+        "store": OrbitStore(INGEST_STORE) if INGEST_BACKEND == "hdf5" else None,
+        "overview_factor": preview,
+        "backend": RASTER_BACKEND,
+        "hedge_reads": HEDGE_WINDOW_READS,
+        "skip_layers": tuple(l for l in INGEST_LAYERS if l not in layers),
+        **extra,
+    }
+
+
+def _ingest_settings(kwargs: dict) -> dict:
+    """The `_ingest_kwargs` that decide which orbits an ingest keeps, as
+    JSON values. Saved with each ingest `OrbitTable`; --from-tables only
+    reuses a table whose settings match the current config."""
+    target = kwargs.get("coverage_target")
+    settings = {
+        "min_overlap_frac": kwargs["min_overlap_frac"],
+        "prescreen_flags": kwargs["prescreen_flags"],
+        "prescreen_min_frac": kwargs["prescreen_min_frac"],
+        "overview_factor": kwargs["overview_factor"],
+        "store": kwargs["store"] is not None,
+        "dmsp_preferred_sats": kwargs.get("dmsp_preferred_sats"),
+        "coverage_target": asdict(target) if target is not None else None,
+    }
+    # Round-trip so tuples compare equal to the lists a loaded table holds.
+    return json.loads(json.dumps(settings, sort_keys=True))
+
+
+def _ingest_table_path(
+    sensor: str, roi_bbox, start: datetime, end: datetime, preview: int = 1,
+) -> Path:
+    """Where one ingest run's `OrbitTable` is saved."""
+    name = f"{start:%Y%m%d}-{end:%Y%m%d}" + (f"-preview{preview}" if preview > 1 else "")
+    return ORBIT_TABLES / sensor / roi_slug(tuple(roi_bbox)) / f"{name}.npz"
+
+
+def _composite_records(
     sensor: str,
     roi_bbox,
-    start: datetime,
-    end: datetime,
+    records: Iterable[dict],
     lunar_mode: str,
     period_format: str,
+    manifest: Optional[CacheManifest] = None,
+    preview: int = 1,
 ) -> tuple[list[dict], str]:
-    """Run ingest → orbitprep → composite for one sensor.
+    """Run orbitprep → composite for one sensor's ingested records.
 
     Returns ``(composites, roi_slug)``. The slug identifies the cache
     namespace used for this sensor's outputs and is reused downstream by
     calibrate / viirsprep so the whole pipeline shares a consistent
-    ROI-keyed path layout.
+    ROI-keyed path layout. With preview N > 1 the target grid is N× coarser
+    than native, which also gives the preview its own slug.
     """
-    extra = {"dmsp_preferred_sats": DMSP_PREFERRED_SATS} if sensor == SENSOR_DMSP else {}
-    records = ingest(roi_bbox, start, end, sensor, INGEST_CACHE, **extra)
-    log.info("%s: ingested %d orbits", sensor, len(records))
-
-    prep = OrbitPrep(sensor, roi_bbox, PREP_DIR, lunar_mask_mode=lunar_mode)
-    prepped = [prep.transform(r) for r in records]
+    prep = OrbitPrep(
+        sensor, roi_bbox, PREP_DIR, lunar_mask_mode=lunar_mode,
+        extra_mask_if_set=_mask_bits(sensor), manifest=manifest,
+        layers=plan_layers(lunar_mode, COMPOSITE_OUTPUTS, SKIP_LI_IN_ZERO_MODE),
+        pixel_size_deg=NATIVE_PIXEL_SIZE_DEG[sensor] * preview if preview > 1 else None,
+    )
+    prepped = prep.transform_table(records)
 
     composites = Compositor(
         sensor, COMPOSITE_DIR, roi_slug=prep.roi_slug, period_format=period_format,
+        outputs=COMPOSITE_OUTPUTS, manifest=manifest,
     ).aggregate(prepped)
     log.info("%s: built %d composite period(s)", sensor, len(composites))
     return composites, prep.roi_slug
 
 
+def _build_sensor_composites(
+    sensor: str,
+    roi_bbox,
+    start: datetime,
+    end: datetime,
+    lunar_mode: str,
+    period_format: str,
+    manifest: Optional[CacheManifest] = None,
+    preview: int = 1,
+    from_table: bool = False,
+) -> tuple[list[dict], str]:
+    """Run ingest → orbitprep → composite for one sensor.
+
+    The ingest result is saved as an `OrbitTable` under ORBIT_TABLES. With
+    `from_table`, a table saved by an earlier run over the same sensor, ROI,
+    dates and preview factor is used instead of ingesting, when it was
+    built with the same ingest settings (`_ingest_settings`) and has the
+    layers this run needs.
+
+    Returns ``(composites, roi_slug)`` as `_composite_records` does.
+    """
+    table_path = _ingest_table_path(sensor, roi_bbox, start, end, preview)
+    kwargs = _ingest_kwargs(sensor, preview, lunar_mode, period_format)
+    settings = _ingest_settings(kwargs)
+    records = None
+    if from_table and table_path.exists():
+        records = OrbitTable.load(table_path)
+        if records.settings != settings:
+            log.info("%s: %s was ingested with other settings; re-ingesting", sensor, table_path)
+            records = None
+        elif not set(plan_layers(lunar_mode, COMPOSITE_OUTPUTS, SKIP_LI_IN_ZERO_MODE)) <= set(records.layers):
+            log.info("%s: %s lacks layers this run needs; re-ingesting", sensor, table_path)
+            records = None
+        else:
+            log.info("%s: loaded %d ingested orbits from %s", sensor, len(records), table_path)
+    if records is None:
+        records = ingest(
+            roi_bbox, start, end, sensor, INGEST_CACHE, manifest=manifest, **kwargs,
+        )
+        records.settings = settings
+        records.save(table_path)
+        log.info("%s: ingested %d orbits", sensor, len(records))
+    return _composite_records(
+        sensor, roi_bbox, records, lunar_mode, period_format, manifest, preview,
+    )
+
+
 def main(
     trialname: str,
     roi_bbox,
@@ -97,7 +253,63 @@ def main(
     shift: bool = False,
     idX: bool = False,
     skip_diagnostics: bool = False,
+    preview: int = 1,
+    from_tables: bool = False,
+) -> None:
+    """Run the whole pipeline for one ROI.
+
+    preview N > 1 is a quick low-resolution run: windows are read from the
+    COG overviews at N× coarser resolution, every stage works on the
+    coarser grid in its own cache namespace, and the trial is named
+    ``{trialname}_previewN``.
+
+    from_tables starts each sensor from the ingest `OrbitTable` an earlier
+    run with the same ROI and dates saved, skipping ingest.
+    """
+    if preview < 1:
+        raise ValueError(f"preview must be >= 1, got {preview}")
+    if preview > 1:
+        trialname = f"{trialname}_preview{preview}"
+    t0 = time.time()
+    print(f"=== {trialname}: {start.date()} → {end.date()}, train={train_year}, mode={lunar_mode!r} ===")
+
+    manifest = _open_manifest()
+    try:
+        # 1–3. Ingest, orbitprep, composite for both sensors.
+        composites_by_sensor: dict[str, list[dict]] = {}
+        slug_by_sensor: dict[str, str] = {}
+        for sensor in (SENSOR_DMSP, SENSOR_VIIRS):
+            t = time.time()
+            composites_by_sensor[sensor], slug_by_sensor[sensor] = _build_sensor_composites(
+                sensor, roi_bbox, start, end, lunar_mode, period_format, manifest,
+                preview, from_tables,
+            )
+            print(f"  {sensor}: ingest+prep+composite in {time.time() - t:.1f}s")
+
+        run_from_composites(
+            trialname, composites_by_sensor, slug_by_sensor, train_year,
+            est=est, polyX=polyX, shift=shift, idX=idX,
+            skip_diagnostics=skip_diagnostics, manifest=manifest,
+        )
+    finally:
+        manifest.close()
+    print(f"DONE in {time.time() - t0:.1f}s — outputs at {OUTPUT / trialname}")
+
+
+def run_from_composites(
+    trialname: str,
+    composites_by_sensor: dict[str, list[dict]],
+    slug_by_sensor: dict[str, str],
+    train_year: int,
+    est=None,
+    polyX: bool = True,
+    shift: bool = False,
+    idX: bool = False,
+    skip_diagnostics: bool = False,
+    manifest: Optional[CacheManifest] = None,
 ) -> None:
+    """Steps 4–7 of the pipeline (calibrate, fit, inference, diagnostics)
+    for one ROI whose per-sensor composites are already built."""
     if est is None:
         est = XGB()
 
@@ -106,28 +318,15 @@ def main(
     trialout.mkdir(parents=True, exist_ok=True)
     trialresults.mkdir(parents=True, exist_ok=True)
 
-    t0 = time.time()
-    print(f"=== {trialname}: {start.date()} → {end.date()}, train={train_year}, mode={lunar_mode!r} ===")
-
-    # 1–3. Ingest, orbitprep, composite for both sensors.
-    composites_by_sensor: dict[str, list[dict]] = {}
-    slug_by_sensor: dict[str, str] = {}
-    for sensor in (SENSOR_DMSP, SENSOR_VIIRS):
-        t = time.time()
-        composites_by_sensor[sensor], slug_by_sensor[sensor] = _build_sensor_composites(
-            sensor, roi_bbox, start, end, lunar_mode, period_format,
-        )
-        print(f"  {sensor}: ingest+prep+composite in {time.time() - t:.1f}s")
-
     # 4. DMSP intercalibration + VIIRS preprocessing.
     t = time.time()
     dmsp_calibrated = calibrate_dmsp_composites(
         composites_by_sensor[SENSOR_DMSP], CALIB_DIR, DMSP_PREFERRED_SATS,
-        roi_slug=slug_by_sensor[SENSOR_DMSP],
+        roi_slug=slug_by_sensor[SENSOR_DMSP], manifest=manifest,
     )
     viirs_prepped = prep_viirs_composites(
         composites_by_sensor[SENSOR_VIIRS], VIIRS_PREP_DIR,
-        roi_slug=slug_by_sensor[SENSOR_VIIRS],
+        roi_slug=slug_by_sensor[SENSOR_VIIRS], manifest=manifest,
     )
     print(f"  calibrate + prep in {time.time() - t:.1f}s")
 
@@ -186,8 +385,6 @@ def main(
         )
         print(f"  diagnostics in {time.time() - t:.1f}s")
 
-    print(f"DONE in {time.time() - t0:.1f}s — outputs at {trialout}")
-
 
 def _parse_date(s: str) -> datetime:
     dt = datetime.fromisoformat(s)
@@ -215,6 +412,16 @@ def get_args() -> argparse.Namespace:
         "--skip-diagnostics", action="store_true",
         help="skip the post-run plots/metrics step",
     )
+    p.add_argument(
+        "--preview", type=int, default=1, metavar="N",
+        help="quick run at N× coarser resolution from the COG overviews "
+             "(separate caches; trial named NAME_previewN)",
+    )
+    p.add_argument(
+        "--from-tables", action="store_true",
+        help="reuse the ingest tables a previous run with the same ROI and "
+             "dates saved instead of re-running ingest",
+    )
     return p.parse_args()
 
 
@@ -231,4 +438,6 @@ if __name__ == "__main__":
         lunar_mode=args.lunar_mode,
         period_format=args.period_format,
         skip_diagnostics=args.skip_diagnostics,
+        preview=args.preview,
+        from_tables=args.from_tables,
     )
@@ -0,0 +1,348 @@
+"""Offline mirror of a WB-LEN subset for air-gapped runs.
+
+Copies the STAC subtree (sensor root catalogs, the period catalogs in the
+date range, and the items overlapping any of the ROIs) plus each item's
+radiance / LI / flag COGs into a local directory, under the same keys as the
+bucket. Item JSONs are rewritten with relative asset hrefs and explicit
+"li" / "flag" assets (a mirror can't be prefix-listed to find VIIRS LI
+files), and catalogs only link what was mirrored. Point the pipeline at it
+with
+
+    NTL_WBLEN_BASE_URL=file:///path/to/mirror python -m harmonizer.main ...
+
+or serve the directory over HTTP and use that URL instead.
+
+By default only the ROI windows of each COG are copied (the union of the
+overlapping ROIs' bboxes plus `--pad-deg`); `--full` copies whole files.
+`mirror_state.json` records the finished periods: reruns with the same ROIs
+and mode skip settled periods entirely and only fetch items not yet
+mirrored in the others, so extending the date range fetches just the new
+periods. Changing the ROIs or mode re-mirrors what they touch.
+
+To put the mirror in an object store, run it to a local directory and sync
+that with the store's own tools.
+
+Run:
+    python -m harmonizer.mirror /data/wblen-mirror --roi roifiles/gadm36_* \\
+        --start 2012-01-01 --end 2013-12-31
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shutil
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from tqdm import tqdm
+
+from harmonizer.cachedb import ensure_dir, tmp_name
+from harmonizer.constants import S3_HTTPS_BASE, SENSOR_DMSP, SENSORS
+from harmonizer.footprint import footprint_overlaps
+from harmonizer.ingest import (
+    STACCatalogClient,
+    ViirsLIResolver,
+    WindowedCOGReader,
+    _aget_json,
+    _bboxes_intersect,
+    _date_from_item_url,
+    _parse_item_datetime,
+    _period_settled,
+    _union_bbox,
+    orbitref_from_item,
+)
+
+log = logging.getLogger(__name__)
+
+Bbox = tuple[float, float, float, float]
+
+STATE_FILE = "mirror_state.json"
+
+_DOWNLOAD_RETRIES = 3
+_DOWNLOAD_BACKOFF_SECONDS = 2.0
+
+
+def _key(url: str) -> str:
+    """Bucket key of a source URL (its path below the archive root)."""
+    if url.startswith(S3_HTTPS_BASE + "/"):
+        return url[len(S3_HTTPS_BASE) + 1:]
+    return urllib.parse.urlparse(url).path.lstrip("/")
+
+
+def _relative_href(target_key: str, from_key: str) -> str:
+    rel = posixpath.relpath(target_key, posixpath.dirname(from_key) or ".")
+    return rel if rel.startswith(".") else f"./{rel}"
+
+
+def _write_json(path: Path, obj: dict) -> None:
+    ensure_dir(path.parent)
+    tmp = tmp_name(path)
+    tmp.write_text(json.dumps(obj, indent=1))
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _download(url: str, dst: Path) -> None:
+    """Copy a whole remote file to dst (atomic; skipped if dst exists)."""
+    if dst.exists() and dst.stat().st_size > 0:
+        return
+    ensure_dir(dst.parent)
+    tmp = tmp_name(dst)
+    for attempt in range(_DOWNLOAD_RETRIES):
+        try:
+            with urllib.request.urlopen(url, timeout=60) as r, open(tmp, "wb") as f:
+                shutil.copyfileobj(r, f, 1 << 20)
+            os.replace(tmp, dst)
+            return
+        except Exception:
+            if attempt + 1 == _DOWNLOAD_RETRIES:
+                raise
+            time.sleep(_DOWNLOAD_BACKOFF_SECONDS * (attempt + 1))
+
+
+class Mirror:
+    """Mirrors catalogs, items and COGs for a set of ROIs into `dest`.
+
+    Parameters
+    ----------
+    dest : mirror root (bucket keys are laid out below it)
+    rois : ROI bboxes in EPSG:4326
+    full : copy whole COGs instead of the ROI windows
+    pad_deg : margin added around the windowed clip, in degrees
+    max_workers : concurrent item copies
+    dmsp_preferred_sats : same meaning as for `STACCatalogClient`
+    """
+
+    def __init__(
+        self,
+        dest: Path,
+        rois: list[Bbox],
+        full: bool = False,
+        pad_deg: float = 0.02,
+        max_workers: int = 16,
+        dmsp_preferred_sats: Optional[dict[str, list[str]]] = None,
+    ):
+        self.dest = ensure_dir(Path(dest))
+        self.rois = list(dict.fromkeys(tuple(r) for r in rois))
+        self.full = full
+        self.pad_deg = pad_deg
+        self.max_workers = max_workers
+        self.dmsp_preferred_sats = dmsp_preferred_sats
+        self.fingerprint = hashlib.sha1(json.dumps(
+            {"full": full, "pad": pad_deg, "rois": sorted(self.rois)},
+        ).encode()).hexdigest()
+        self.state = _read_json(self.dest / STATE_FILE) or {"periods": {}}
+        self._li_resolver = ViirsLIResolver()
+
+    def _save_state(self) -> None:
+        _write_json(self.dest / STATE_FILE, self.state)
+
+    # ---- items ------------------------------------------------------------
+
+    def _item_rois(self, item: dict) -> list[Bbox]:
+        bbox = tuple(item["bbox"])
+        return [
+            r for r in self.rois
+            if _bboxes_intersect(bbox, r) and footprint_overlaps(item, r)
+        ]
+
+    def _mirror_item(
+        self, sensor: str, item_url: str, item: dict, reader: WindowedCOGReader,
+        fresh: bool,
+    ) -> bool:
+        """Copy one item and its layers. False if no layer overlaps the ROIs."""
+        item_key = _key(item_url)
+        item_path = self.dest / item_key
+        if fresh and item_path.exists():
+            return True
+        orbit = orbitref_from_item(item, sensor, self._li_resolver)
+        urls = {"image": orbit.radiance_url, "li": orbit.li_url, "flag": orbit.flag_url}
+        if self.full:
+            for url in urls.values():
+                _download(url, self.dest / _key(url))
+        else:
+            xmin, ymin, xmax, ymax = _union_bbox(self._item_rois(item))
+            clip = (xmin - self.pad_deg, ymin - self.pad_deg,
+                    xmax + self.pad_deg, ymax + self.pad_deg)
+            for url in urls.values():
+                dst = self.dest / _key(url)
+                ensure_dir(dst.parent)
+                if not fresh:
+                    dst.unlink(missing_ok=True)  # clipped for other ROIs
+                if reader.read_window(url, clip, dst) is None:
+                    return False
+        out = copy.deepcopy(item)
+        out["assets"] = dict(out.get("assets", {}))
+        for name, url in urls.items():
+            asset = dict(out["assets"].get(name, {"type": "image/tiff"}))
+            asset["href"] = _relative_href(_key(url), item_key)
+            out["assets"][name] = asset
+        out["links"] = []
+        _write_json(item_path, out)
+        return True
+
+    # ---- catalogs ---------------------------------------------------------
+
+    def _merge_catalog(self, src: dict, key: str, rel: str, hrefs: list[str]) -> None:
+        """Write catalog `key`: `src` with its `rel` links replaced by the
+        union of the ones already in the mirror and `hrefs`."""
+        path = self.dest / key
+        existing = _read_json(path) or {}
+        links = [l["href"] for l in existing.get("links", []) if l.get("rel") == rel]
+        for href in hrefs:
+            if href not in links:
+                links.append(href)
+        cat = {k: v for k, v in src.items() if k != "links"}
+        cat["links"] = [
+            l for l in src.get("links", []) if l.get("rel") not in ("child", "item", "self")
+        ] + [{"rel": rel, "href": h} for h in sorted(links)]
+        _write_json(path, cat)
+
+    def _mirror_period(
+        self, client: STACCatalogClient, sensor: str, period_url: str,
+        start: datetime, end: datetime, reader: WindowedCOGReader,
+    ) -> int:
+        period_id = client._period_id(period_url)
+        settled = _period_settled(period_id, sensor)
+        entry = self.state["periods"].get(f"{sensor}/{period_id}")
+        fresh = entry is not None and entry["fingerprint"] == self.fingerprint
+        if fresh and entry["settled"]:
+            return entry["items"]
+
+        cat = client._run(client._afetch_catalog(period_url, settled=settled))
+        item_urls = [
+            client._resolve(period_url, l["href"])
+            for l in cat.get("links", []) if l.get("rel") == "item"
+        ]
+        item_urls = [
+            u for u in item_urls
+            if (d := _date_from_item_url(u, sensor)) is None
+            or start.date() <= d.date() <= end.date()
+        ]
+
+        async def _fetch_all():
+            return await asyncio.gather(
+                *(_aget_json(client._pool, u) for u in item_urls), return_exceptions=True,
+            )
+
+        items = []
+        for url, item in zip(item_urls, client._run(_fetch_all())):
+            if isinstance(item, Exception):
+                log.warning("failed fetching %s: %s", url, item)
+                continue
+            if "bbox" not in item or not self._item_rois(item):
+                continue
+            if not (start <= _parse_item_datetime(item) <= end):
+                continue
+            items.append((url, item))
+
+        def _one(pair):
+            url, item = pair
+            try:
+                return url if self._mirror_item(sensor, url, item, reader, fresh) else None
+            except Exception as e:
+                log.warning("failed mirroring %s: %s", url, e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            done = [
+                u for u in tqdm(
+                    pool.map(_one, items), total=len(items),
+                    desc=f"{sensor} {period_id}", unit="item",
+                ) if u is not None
+            ]
+        period_key = _key(period_url)
+        self._merge_catalog(
+            cat, period_key, "item", [_relative_href(_key(u), period_key) for u in done],
+        )
+        n = len(done)
+        complete = len(done) == len(items)
+        self.state["periods"][f"{sensor}/{period_id}"] = {
+            "fingerprint": self.fingerprint,
+            # Only a settled period with no failed items is never revisited.
+            "settled": settled and complete,
+            "items": n,
+        }
+        self._save_state()
+        return n
+
+    def run(self, sensor: str, start: datetime, end: datetime) -> int:
+        """Mirror one sensor over [start, end]; returns the item count."""
+        client = STACCatalogClient(
+            sensor, max_workers=self.max_workers,
+            dmsp_preferred_sats=self.dmsp_preferred_sats if sensor == SENSOR_DMSP else None,
+        )
+        reader = WindowedCOGReader(self.dest)
+        root_url = client.catalog_url
+        total = 0
+        try:
+            period_urls = client._period_catalog_urls(start, end)
+            for period_url in period_urls:
+                total += self._mirror_period(client, sensor, period_url, start, end, reader)
+            root = client._run(client._afetch_catalog(root_url, settled=False))
+        finally:
+            reader.close()
+            client.close()
+        root_key = _key(root_url)
+        self._merge_catalog(
+            root, root_key, "child", [_relative_href(_key(u), root_key) for u in period_urls],
+        )
+        log.info("%s: %d item(s) mirrored over %d period(s)", sensor, total, len(period_urls))
+        return total
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def get_args() -> argparse.Namespace:
+    from harmonizer.main import _parse_date
+
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("dest", type=Path, help="mirror root directory")
+    p.add_argument(
+        "--roi", nargs="+", required=True,
+        help="ROI shapefile paths/directories or 'xmin,ymin,xmax,ymax' bboxes in EPSG:4326",
+    )
+    p.add_argument("--start", required=True, type=_parse_date)
+    p.add_argument("--end", required=True, type=_parse_date)
+    p.add_argument("--sensor", nargs="+", default=list(SENSORS), choices=SENSORS)
+    p.add_argument("--full", action="store_true", help="copy whole COGs, not ROI windows")
+    p.add_argument("--pad-deg", type=float, default=0.02, help="margin around windowed clips")
+    p.add_argument("--workers", type=int, default=16)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    from harmonizer.config import DMSP_PREFERRED_SATS
+    from harmonizer.utils import roi_bbox_from_path
+
+    args = get_args()
+    mirror = Mirror(
+        args.dest,
+        [roi_bbox_from_path(r) for r in args.roi],
+        full=args.full,
+        pad_deg=args.pad_deg,
+        max_workers=args.workers,
+        dmsp_preferred_sats=DMSP_PREFERRED_SATS,
+    )
+    for sensor in args.sensor:
+        mirror.run(sensor, args.start, args.end)
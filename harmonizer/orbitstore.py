@@ -0,0 +1,227 @@
+"""Per-period HDF5 store for ingested orbit clips.
+
+The default ingest cache writes three tiny deflate GeoTIFFs per orbit under
+`data/cache/ingest/{sensor}/{slug}/{period}/`. A year of VIIRS over a
+country is tens of thousands of small files, and opening them dominates
+OrbitPrep time. `OrbitStore` instead appends each orbit's clipped layers
+to one chunked HDF5 file per period:
+
+    {root}/{sensor}/{slug}/{period}.h5
+        /{orbit_id}/radiance   chunked, gzip; attrs: transform, crs, nodata
+        /{orbit_id}/li
+        /{orbit_id}/flag
+        /{orbit_id}.attrs["complete"] = True   (set last)
+
+The file's group listing is the orbit index; an orbit only counts once its
+`complete` attribute is written, so a crash mid-append leaves it a miss.
+Appends from the ingest thread pool are serialised per file (an in-process
+lock plus an exclusive `flock` on a sidecar `.lock` file for other
+processes); reads take a shared lock. HDF5 itself is not crash-safe, so a
+process killed mid-write can corrupt that one period file — delete it and
+re-run ingest.
+
+Layer locations are `StoreRef`s, which ingest puts in its records in place
+of paths. `read_layer` reads either kind, so downstream stages don't care
+which backend produced a record.
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Union
+
+from harmonizer.cachedb import ensure_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: in-process locking only
+    fcntl = None
+
+
+@dataclass(frozen=True)
+class StoreRef:
+    """One orbit layer inside a period file of an `OrbitStore`."""
+
+    path: Path
+    orbit_id: str
+    layer: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.orbit_id}/{self.layer}"
+
+    def __str__(self) -> str:
+        return f"{self.path}::{self.name}"
+
+    @classmethod
+    def parse(cls, s: str) -> "StoreRef":
+        """Inverse of `str()`: "{path}::{orbit_id}/{layer}"."""
+        path, name = s.rsplit("::", 1)
+        orbit_id, layer = name.rsplit("/", 1)
+        return cls(Path(path), orbit_id, layer)
+
+
+LayerRef = Union[Path, StoreRef]
+
+# Period-file locks are process-wide so every OrbitStore (and `read_layer`)
+# in the process shares them.
+_file_locks: dict[Path, threading.Lock] = {}
+_file_locks_lock = threading.Lock()
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _file_locks_lock:
+        lock = _file_locks.get(path)
+        if lock is None:
+            lock = _file_locks[path] = threading.Lock()
+        return lock
+
+
+@contextlib.contextmanager
+def _locked(path: Path, exclusive: bool):
+    with _file_lock(path):
+        if fcntl is None:
+            yield
+            return
+        with open(path.with_suffix(".h5.lock"), "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+
+class OrbitStore:
+    """Chunked per-period container for ingested orbit windows.
+
+    Parameters
+    ----------
+    root : directory holding the period files
+    compression : h5py compression filter for the layer datasets
+    """
+
+    def __init__(self, root: Path, compression: str = "gzip"):
+        self.root = Path(root)
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._index: dict[Path, set[str]] = {}
+
+    def ref(self, sensor: str, slug: str, period: str, orbit_id: str, layer: str) -> StoreRef:
+        path = ensure_dir(self.root / sensor / slug) / f"{period}.h5"
+        return StoreRef(path, orbit_id, layer)
+
+    # ---- index ----------------------------------------------------------
+
+    def _load_index(self, path: Path) -> set[str]:
+        """Complete "orbit/layer" names in one period file (cached)."""
+        with self._lock:
+            names = self._index.get(path)
+        if names is not None:
+            return names
+        import h5py
+
+        names = set()
+        if path.exists():
+            with _locked(path, exclusive=False), \
+                 h5py.File(path, "r", locking=False) as f:
+                for orbit_id, group in f.items():
+                    if group.attrs.get("complete", False):
+                        names.update(f"{orbit_id}/{layer}" for layer in group)
+        with self._lock:
+            return self._index.setdefault(path, names)
+
+    def has(self, ref: StoreRef) -> bool:
+        return ref.name in self._load_index(ref.path)
+
+    def reload(self, path: Path) -> None:
+        """Forget the cached index of a period file, so the next lookup sees
+        orbits other processes appended since."""
+        with self._lock:
+            self._index.pop(Path(path), None)
+
+    def orbit_ids(self, path: Path) -> list[str]:
+        """Orbits with at least one complete layer in a period file."""
+        return sorted({name.split("/", 1)[0] for name in self._load_index(Path(path))})
+
+    # ---- writes ---------------------------------------------------------
+
+    def append(self, items: Iterable[tuple[StoreRef, np.ndarray, dict]]) -> None:
+        """Append layers ([(ref, array, profile)]) as complete orbits.
+
+        `profile` is the window's rasterio profile (transform, crs, nodata
+        are stored). All layers of one orbit in a file are written under one
+        lock and marked complete together; layers already present are kept.
+        """
+        import h5py
+
+        by_file: dict[Path, list[tuple[StoreRef, np.ndarray, dict]]] = {}
+        for item in items:
+            by_file.setdefault(item[0].path, []).append(item)
+        for path, file_items in by_file.items():
+            index = self._load_index(path)
+            with _locked(path, exclusive=True), \
+                 h5py.File(path, "a", locking=False) as f:
+                touched = set()
+                for ref, data, profile in file_items:
+                    group = f.get(ref.orbit_id)
+                    if group is not None and not group.attrs.get("complete", False) \
+                            and ref.orbit_id not in touched:
+                        del f[ref.orbit_id]  # left over from an interrupted append
+                    group = f.require_group(ref.orbit_id)
+                    touched.add(ref.orbit_id)
+                    if ref.layer in group:
+                        continue
+                    ds = group.create_dataset(
+                        ref.layer, data=data, chunks=True,
+                        compression=self.compression, shuffle=True,
+                    )
+                    ds.attrs["transform"] = tuple(profile["transform"])[:6]
+                    ds.attrs["crs"] = profile["crs"].to_wkt() if profile.get("crs") else ""
+                    if profile.get("nodata") is not None:
+                        ds.attrs["nodata"] = profile["nodata"]
+                for orbit_id in touched:
+                    f[orbit_id].attrs["complete"] = True
+            with self._lock:
+                index.update(ref.name for ref, _, _ in file_items)
+
+
+def read_layer(ref: LayerRef) -> tuple[np.ndarray, dict]:
+    """Read one ingested layer from either backend.
+
+    Returns ``(array, meta)`` with meta keys transform, crs, width, height
+    and nodata.
+    """
+    if isinstance(ref, StoreRef):
+        import h5py
+        from affine import Affine
+        from rasterio.crs import CRS
+
+        with _locked(ref.path, exclusive=False), \
+             h5py.File(ref.path, "r", locking=False) as f:
+            ds = f[ref.name]
+            arr = ds[()]
+            attrs = dict(ds.attrs)
+        return arr, {
+            "transform": Affine(*attrs["transform"]),
+            "crs": CRS.from_wkt(attrs["crs"]) if attrs["crs"] else None,
+            "width": arr.shape[1],
+            "height": arr.shape[0],
+            "nodata": attrs.get("nodata"),
+        }
+    import rasterio
+
+    with rasterio.open(ref) as src:
+        arr = src.read(1)
+        meta = {
+            "transform": src.transform,
+            "crs": src.crs,
+            "width": src.width,
+            "height": src.height,
+            "nodata": src.nodata,
+        }
+    return arr, meta
@@ -0,0 +1,285 @@
+"""Columnar table of orbit records passed between pipeline stages.
+
+`harmonizer.ingest` used to return a list of ``{"orbit": OrbitRef,
+"radiance": Path, ...}`` dicts, which OrbitPrep and the Compositor then
+regrouped with `defaultdict`. At 100k+ DMSP orbits that is hundreds of MB of
+per-object overhead and slow Python-level grouping. `OrbitTable` holds the
+same information as one NumPy structured array, one row per orbit:
+
+    orbit_id        bytes
+    datetime        datetime64[us], UTC
+    bbox            4 × float64
+    radiance_url    bytes      (also li_url, flag_url)
+    {layer}         bytes      one column per layer: str() of the path or
+                               `harmonizer.orbitstore.StoreRef`, b"" if None
+    status          uint8      STATUS_OK / STATUS_PARTIAL / STATUS_EMPTY
+
+String columns store only what follows the column's common directory
+prefix (the bucket URL, the cache directory), which is kept once in the
+table metadata. `settings` is a free-form JSON-able dict saved with the
+table, for whoever builds it to describe how (e.g. the ingest filters).
+
+Period grouping and filtering are vectorized (`periods`, `group_by_period`,
+`has`, boolean indexing). The table is still a sequence of record dicts —
+`len`, iteration and integer indexing build them on demand — so code written
+against the list-of-dicts interface keeps working. `save` / `load` persist a
+table as a compressed ``.npz``, so a later stage can start from a saved
+table instead of re-running ingest.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from harmonizer.cachedb import tmp_name
+from harmonizer.orbitstore import LayerRef, StoreRef
+
+STATUS_OK = 0       # every layer present
+STATUS_PARTIAL = 1  # some layers missing
+STATUS_EMPTY = 2    # no layer present
+
+URL_FIELDS = ("radiance_url", "li_url", "flag_url")
+
+# Period formats that group on a truncated datetime64 without formatting
+# every row.
+_PERIOD_UNITS = {"%Y": "Y", "%Y%m": "M", "%Y%m%d": "D"}
+
+_FORMAT_VERSION = 1
+
+
+def _encode_ref(ref: Optional[LayerRef]) -> bytes:
+    return b"" if ref is None else str(ref).encode()
+
+
+def _decode_ref(s: str) -> Optional[LayerRef]:
+    if not s:
+        return None
+    return StoreRef.parse(s) if "::" in s else Path(s)
+
+
+def _to_datetime64(dt: datetime) -> np.datetime64:
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(dt, "us")
+
+
+class OrbitTable:
+    """One sensor's orbit records as a structured array.
+
+    Build one with `from_records` (or `OrbitTableBuilder` when records arrive
+    one at a time); `layers` names the layer columns.
+    """
+
+    def __init__(
+        self, sensor: str, layers: Iterable[str], data: np.ndarray,
+        prefixes: Optional[dict[str, str]] = None,
+        settings: Optional[dict] = None,
+    ):
+        self.sensor = sensor
+        self.layers = tuple(layers)
+        self.data = data
+        self.prefixes = dict(prefixes or {})
+        self.settings = dict(settings or {})
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[dict], sensor: Optional[str] = None,
+        layers: Iterable[str] = ("radiance", "li", "flag"),
+    ) -> "OrbitTable":
+        """Table of ``{"orbit": OrbitRef, layer: ref, ...}`` records."""
+        if isinstance(records, OrbitTable):
+            return records
+        builder = OrbitTableBuilder(sensor, layers)
+        for record in records:
+            builder.append(record)
+        return builder.build()
+
+    # ---- sequence of records ---------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self.data)):
+            yield self._record(i)
+
+    def __getitem__(self, key) -> Union[dict, "OrbitTable"]:
+        """An int gives that row's record dict; a slice, index array or
+        boolean mask gives a sub-table."""
+        if isinstance(key, (int, np.integer)):
+            return self._record(int(key))
+        return OrbitTable(
+            self.sensor, self.layers, self.data[key], self.prefixes, self.settings,
+        )
+
+    def _str(self, field: str, i: int) -> str:
+        return self.prefixes.get(field, "") + self.data[field][i].decode()
+
+    def _record(self, i: int) -> dict:
+        from harmonizer.ingest import OrbitRef
+
+        row = self.data[i]
+        orbit = OrbitRef(
+            sensor=self.sensor,
+            orbit_id=row["orbit_id"].decode(),
+            datetime=row["datetime"].item().replace(tzinfo=timezone.utc),
+            bbox=tuple(float(v) for v in row["bbox"]),
+            **{f: self._str(f, i) for f in URL_FIELDS},
+        )
+        record = {"orbit": orbit}
+        for layer in self.layers:
+            record[layer] = _decode_ref(self._str(layer, i) if row[layer] else "")
+        return record
+
+    # ---- vectorized queries ---------------------------------------------
+
+    @property
+    def status(self) -> np.ndarray:
+        return self.data["status"]
+
+    def refs(self, layer: str) -> list[Optional[LayerRef]]:
+        """One layer's column as paths / `StoreRef`s (None where missing),
+        without building the records."""
+        prefix = self.prefixes.get(layer, "")
+        return [_decode_ref(prefix + v.decode() if v else "") for v in self.data[layer]]
+
+    def has(self, layer: str) -> np.ndarray:
+        """Boolean mask of rows where `layer` is present."""
+        return self.data[layer] != b""
+
+    def period_index(self, period_format: str) -> tuple[list[str], np.ndarray]:
+        """(sorted period keys, per-row index into them)."""
+        unit = _PERIOD_UNITS.get(period_format)
+        dts = self.data["datetime"]
+        truncated = dts.astype(f"datetime64[{unit}]") if unit else dts
+        uniq, inverse = np.unique(truncated, return_inverse=True)
+        labels = [d.astype("datetime64[us]").item().strftime(period_format) for d in uniq]
+        if unit is None:
+            # Arbitrary formats can map several timestamps to one label.
+            keys, remap = np.unique(np.array(labels, dtype=str), return_inverse=True)
+            return keys.tolist(), remap[inverse] if len(inverse) else inverse
+        return labels, inverse
+
+    def periods(self, period_format: str) -> np.ndarray:
+        """Each row's period key."""
+        keys, inverse = self.period_index(period_format)
+        return np.array(keys, dtype=str)[inverse] if keys else np.array([], dtype=str)
+
+    def group_by_period(self, period_format: str) -> dict[str, "OrbitTable"]:
+        """Sub-table per period, in period order, rows in table order."""
+        keys, inverse = self.period_index(period_format)
+        if not keys:
+            return {}
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+        return {k: self[idx] for k, idx in zip(keys, np.split(order, splits))}
+
+    # ---- persistence ----------------------------------------------------
+
+    def save(self, path: Path) -> Path:
+        """Write the table to a compressed ``.npz`` (atomically)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "version": _FORMAT_VERSION,
+            "sensor": self.sensor,
+            "layers": list(self.layers),
+            "prefixes": self.prefixes,
+            "settings": self.settings,
+        }
+        tmp = tmp_name(path)
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, rows=self.data, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "OrbitTable":
+        with np.load(Path(path), allow_pickle=False) as npz:
+            meta = json.loads(str(npz["meta"]))
+            if meta.get("version") != _FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported orbit table version {meta.get('version')}")
+            return cls(
+                meta["sensor"], meta["layers"], npz["rows"], meta["prefixes"],
+                meta.get("settings"),
+            )
+
+
+class OrbitTableBuilder:
+    """Accumulates records column-wise and builds an `OrbitTable`.
+
+    Holds compact per-column lists rather than the records themselves, so
+    an ingest run never keeps its full list of dicts alive.
+    """
+
+    def __init__(self, sensor: Optional[str], layers: Iterable[str]):
+        self.sensor = sensor
+        self.layers = tuple(layers)
+        self._strings: dict[str, list[bytes]] = {
+            f: [] for f in ("orbit_id", *URL_FIELDS, *self.layers)
+        }
+        self._datetimes: list[np.datetime64] = []
+        self._bboxes: list[tuple[float, ...]] = []
+        self._status: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._status)
+
+    def append(self, record: dict) -> None:
+        orbit = record["orbit"]
+        if self.sensor is None:
+            self.sensor = orbit.sensor
+        elif orbit.sensor != self.sensor:
+            raise ValueError(f"{self.sensor} table can't hold a {orbit.sensor} orbit")
+        self._strings["orbit_id"].append(orbit.orbit_id.encode())
+        for f in URL_FIELDS:
+            self._strings[f].append(getattr(orbit, f).encode())
+        present = 0
+        for layer in self.layers:
+            ref = record.get(layer)
+            present += ref is not None
+            self._strings[layer].append(_encode_ref(ref))
+        self._datetimes.append(_to_datetime64(orbit.datetime))
+        self._bboxes.append(tuple(orbit.bbox))
+        self._status.append(
+            STATUS_OK if present == len(self.layers)
+            else STATUS_EMPTY if present == 0 else STATUS_PARTIAL
+        )
+
+    def build(self) -> OrbitTable:
+        if self.sensor is None:
+            raise ValueError("empty OrbitTable needs an explicit sensor")
+        prefixes: dict[str, str] = {}
+        columns: dict[str, np.ndarray] = {}
+        for name, values in self._strings.items():
+            prefix = b""
+            if name != "orbit_id":
+                # Up to a "/", so no value is reduced to b"" (= missing).
+                prefix = os.path.commonprefix([v for v in values if v]) or b""
+                prefix = prefix[: prefix.rfind(b"/") + 1]
+            if prefix:
+                prefixes[name] = prefix.decode()
+                values = [v[len(prefix):] if v else v for v in values]
+            # Built from [b""] when empty so the column is "S1", not "S0".
+            columns[name] = np.array(values or [b""], dtype=bytes)[: len(values)]
+        dtype = [
+            ("orbit_id", columns["orbit_id"].dtype),
+            ("datetime", "datetime64[us]"),
+            ("bbox", "f8", (4,)),
+            *((f, columns[f].dtype) for f in URL_FIELDS),
+            *((layer, columns[layer].dtype) for layer in self.layers),
+            ("status", "u1"),
+        ]
+        data = np.empty(len(self._status), dtype=dtype)
+        for name, col in columns.items():
+            data[name] = col
+        data["datetime"] = np.array(self._datetimes, dtype="datetime64[us]")
+        if self._bboxes:
+            data["bbox"] = np.array(self._bboxes, dtype="f8")
+        data["status"] = np.array(self._status, dtype="u1")
+        return OrbitTable(self.sensor, self.layers, data, prefixes)
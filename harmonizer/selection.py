@@ -0,0 +1,337 @@
+"""Coverage-targeted orbit selection for ingest.
+
+A monthly median over a well-covered ROI gains next to nothing from the
+60th clear night over the 20th, yet `harmonizer.ingest.ingest` fetches every
+candidate orbit. With a `CoverageTarget`, ingest instead ranks each period's
+candidates per ROI by expected useful coverage and takes the best first,
+counting per-pixel valid observations as the windows come in, and stops a
+(period, ROI) once enough of its pixels reach `min_obs`.
+
+The ranking score of a candidate for an ROI is the product of
+
+    footprint   the fraction of the ROI its swath covers (`harmonizer.footprint`)
+    lunar       the ephemeris pre-screen (`harmonizer.lunar.prescreen`):
+                certain pass 1, borderline 0.5, certain fail drops the orbit
+    view        cos(off-nadir angle) from the STAC view extension
+                (`view:off_nadir`, else `view:incidence_angle`); 1 when the
+                item doesn't publish view geometry
+
+Flag-tile checks (the lunar tile pre-filter and the cloud pre-screen) still
+run when a candidate is taken: a rejected orbit costs one small tile read
+and adds nothing, so the next choices fill in around it. Valid observations
+are counted with OrbitPrep's own masks (lunar mode, extra flag bits,
+validity) on a per-ROI count grid at the sensor's native resolution, coarsened
+to at most `_COUNT_GRID_MAX` pixels a side for big ROIs.
+
+Each (period, ROI) writes a provenance record of what was reached:
+
+    {cache_dir}/selection/{sensor}/{roi_slug}/{period}.json
+
+with the target, the candidate and selected orbits, why selection stopped
+("target_reached" or "exhausted") and the distribution of reached counts.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from harmonizer import lunar
+from harmonizer.cachedb import ensure_dir, tmp_name
+from harmonizer.footprint import overlap_fraction
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Bbox = tuple[float, float, float, float]
+
+# Largest count-grid side. A country-sized VIIRS ROI at 15 arc-sec is
+# thousands of pixels wide; counting at ~512² keeps the per-(period, ROI)
+# state small while still resolving swath edges.
+_COUNT_GRID_MAX = 512
+
+# A (period, ROI) keeps at most this fraction of `min_obs` orbits in flight,
+# so it overshoots the target by about that much at worst.
+_IN_FLIGHT_FRAC = 0.25
+
+_BORDERLINE_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class CoverageTarget:
+    """When to stop fetching a period's orbits for an ROI.
+
+    min_obs : valid observations wanted per pixel
+    min_pixel_frac : fraction of the ROI's pixels that must reach `min_obs`
+                     (1.0 = every pixel; lower it for ROIs with pixels no
+                     swath ever covers, which otherwise exhaust the period)
+    period_format : strftime pattern grouping orbits into periods; match the
+                    compositor's
+    lunar_mode : OrbitPrep's lunar mask mode, used for ranking and counting
+    mask_bits : flag bits that mask a pixel out (OrbitPrep's
+                `extra_mask_if_set`)
+    """
+
+    min_obs: int = 20
+    min_pixel_frac: float = 1.0
+    period_format: str = "%Y%m"
+    lunar_mode: str = "zero"
+    mask_bits: tuple[int, ...] = ()
+
+    def __post_init__(self):
+        if self.min_obs < 1:
+            raise ValueError(f"min_obs must be >= 1, got {self.min_obs}")
+        if not 0.0 < self.min_pixel_frac <= 1.0:
+            raise ValueError(f"min_pixel_frac must be in (0, 1], got {self.min_pixel_frac}")
+
+
+def view_weight(item: dict) -> float:
+    """cos(off-nadir) from the item's STAC view extension, else 1."""
+    props = item.get("properties", {})
+    angle = props.get("view:off_nadir", props.get("view:incidence_angle"))
+    if angle is None:
+        return 1.0
+    return max(0.0, math.cos(math.radians(float(angle))))
+
+
+def expected_coverage(
+    item: dict, roi: Bbox, sensor: str, target: CoverageTarget,
+) -> float:
+    """Ranking score of `item` for `roi` (0 = useless)."""
+    from harmonizer.ingest import _bboxes_intersect, _parse_item_datetime
+
+    if not _bboxes_intersect(tuple(item["bbox"]), roi):
+        return 0.0
+    frac = overlap_fraction(item, roi)
+    score = 1.0 if frac is None else frac
+    if score <= 0.0:
+        return 0.0
+    verdict = lunar.prescreen(_parse_item_datetime(item), roi, target.lunar_mode, sensor, item=item)
+    if verdict == lunar.FAIL:
+        return 0.0
+    if verdict == lunar.BORDERLINE and target.lunar_mode in ("zero", "low"):
+        score *= _BORDERLINE_WEIGHT
+    return score * view_weight(item)
+
+
+@dataclass
+class _CountGrid:
+    bounds: Bbox
+    width: int
+    height: int
+    pixel_size_deg: float
+
+    def centers(self) -> tuple[np.ndarray, np.ndarray]:
+        import numpy as np
+
+        xmin, _, _, ymax = self.bounds
+        xs = xmin + (np.arange(self.width) + 0.5) * self.pixel_size_deg
+        ys = ymax - (np.arange(self.height) + 0.5) * self.pixel_size_deg
+        return xs, ys
+
+
+def _count_grid(roi: Bbox, pixel_size_deg: float) -> _CountGrid:
+    from harmonizer.transformers.orbitprep import make_target_grid
+
+    xmin, ymin, xmax, ymax = roi
+    pixel_size_deg = max(pixel_size_deg, max(xmax - xmin, ymax - ymin) / _COUNT_GRID_MAX)
+    grid = make_target_grid(roi, pixel_size_deg)
+    return _CountGrid(grid.bounds, grid.width, grid.height, pixel_size_deg)
+
+
+class _PeriodROI:
+    """Selection state of one (period, ROI)."""
+
+    def __init__(self, grid: _CountGrid):
+        import numpy as np
+
+        self.grid = grid
+        self.counts = np.zeros((grid.height, grid.width), dtype=np.uint16)
+        self.heap: list[tuple[float, str, int]] = []  # (-score, orbit_id, item index)
+        self.candidates: set[int] = set()
+        self.in_flight = 0
+        self.taken: list[str] = []
+        self.taken_idx: set[int] = set()
+        self.selected: list[str] = []
+        self.met = False
+
+
+class CoverageSelector:
+    """Ranks candidate orbits and tracks reached counts for `ingest_many`.
+
+    Thread-safe: workers call `observed`, the scheduler calls `add`,
+    `next_item` and `done`.
+    """
+
+    def __init__(
+        self, target: CoverageTarget, sensor: str, rois: list[Bbox],
+        pixel_size_deg: float,
+    ):
+        self.target = target
+        self.sensor = sensor
+        self.rois = rois
+        self._grids = {roi: _count_grid(roi, pixel_size_deg) for roi in rois}
+        self._centers = {roi: grid.centers() for roi, grid in self._grids.items()}
+        self._items: list[dict] = []
+        self._state: dict[tuple[str, Bbox], _PeriodROI] = {}
+        self._lock = threading.Lock()
+        self._max_in_flight = max(1, math.ceil(target.min_obs * _IN_FLIGHT_FRAC))
+
+    # ---- ranking --------------------------------------------------------
+
+    def add(self, item: dict, orbit_id: str) -> None:
+        """Register a candidate; it is ranked separately for each ROI."""
+        from harmonizer.ingest import _parse_item_datetime
+
+        period = _parse_item_datetime(item).strftime(self.target.period_format)
+        idx = len(self._items)
+        self._items.append(item)
+        for roi in self.rois:
+            score = expected_coverage(item, roi, self.sensor, self.target)
+            if score <= 0.0:
+                continue
+            state = self._state.get((period, roi))
+            if state is None:
+                state = self._state[(period, roi)] = _PeriodROI(self._grids[roi])
+            heapq.heappush(state.heap, (-score, orbit_id, idx))
+            state.candidates.add(idx)
+
+    def next_item(self) -> Optional[tuple[dict, str, list[Bbox]]]:
+        """The best untaken candidate of any (period, ROI) still short of its
+        target and with room in flight, as (item, orbit_id, unmet ROIs to
+        read it for); None if nothing can be dispatched now."""
+        with self._lock:
+            for (period, roi), state in sorted(self._state.items(), key=lambda kv: kv[0][0]):
+                if state.met or state.in_flight >= self._max_in_flight:
+                    continue
+                while state.heap:
+                    _, orbit_id, idx = heapq.heappop(state.heap)
+                    if idx not in state.taken_idx:
+                        return self._take(period, idx, orbit_id)
+        return None
+
+    def _take(self, period: str, idx: int, orbit_id: str) -> tuple[dict, str, list[Bbox]]:
+        # One read serves every unmet ROI of this period the orbit is a
+        # candidate for, not just the ROI that picked it.
+        rois = []
+        for roi in self.rois:
+            state = self._state.get((period, roi))
+            if state is None or state.met or idx not in state.candidates \
+                    or idx in state.taken_idx:
+                continue
+            state.taken.append(orbit_id)
+            state.taken_idx.add(idx)
+            state.in_flight += 1
+            rois.append(roi)
+        return self._items[idx], orbit_id, rois
+
+    # ---- accounting -----------------------------------------------------
+
+    def observed(self, roi: Bbox, record: dict) -> Optional[np.ndarray]:
+        """Boolean valid-observation mask of one ingested record, sampled on
+        the ROI's count grid (None if a needed layer is missing)."""
+        import numpy as np
+
+        from harmonizer.constants import SENSOR_CONFIGS
+        from harmonizer.orbitstore import read_layer
+        from harmonizer.transformers.orbitprep import (
+            make_extra_mask,
+            make_lunar_mask,
+            make_validity_mask,
+        )
+
+        if record.get("radiance") is None or record.get("flag") is None:
+            return None
+        cfg = SENSOR_CONFIGS[self.sensor]
+        radiance, meta = read_layer(record["radiance"])
+        flag, _ = read_layer(record["flag"])
+        li = read_layer(record["li"])[0] if record.get("li") is not None else None
+        if li is None and self.target.lunar_mode != "zero":
+            return None
+        keep = make_lunar_mask(li, flag, cfg, self.target.lunar_mode, 0.1)
+        keep &= make_extra_mask(flag, self.target.mask_bits)
+        keep &= make_validity_mask(radiance, li, cfg, meta["nodata"])
+
+        xs, ys = self._centers[roi]
+        t = meta["transform"]
+        cols = np.floor((xs - t.c) / t.a).astype(np.int64)
+        rows = np.floor((ys - t.f) / t.e).astype(np.int64)
+        col_ok = (cols >= 0) & (cols < keep.shape[1])
+        row_ok = (rows >= 0) & (rows < keep.shape[0])
+        out = np.zeros((len(ys), len(xs)), dtype=bool)
+        out[np.ix_(row_ok, col_ok)] = keep[np.ix_(rows[row_ok], cols[col_ok])]
+        return out
+
+    def done(
+        self, item: dict, orbit_id: str, rois: list[Bbox],
+        masks: dict[Bbox, Optional[np.ndarray]],
+    ) -> None:
+        """Account a finished candidate read for `rois` (its masks by ROI)."""
+        from harmonizer.ingest import _parse_item_datetime
+
+        period = _parse_item_datetime(item).strftime(self.target.period_format)
+        with self._lock:
+            for roi in rois:
+                state = self._state[(period, roi)]
+                state.in_flight -= 1
+                mask = masks.get(roi)
+                if mask is None:
+                    continue
+                state.selected.append(orbit_id)
+                state.counts += mask
+                reached = float((state.counts >= self.target.min_obs).mean())
+                state.met = reached >= self.target.min_pixel_frac
+
+    # ---- provenance -----------------------------------------------------
+
+    def summary(self) -> dict[str, int]:
+        with self._lock:
+            states = list(self._state.values())
+        return {
+            "candidates": len(self._items),
+            "fetched": len({o for s in states for o in s.taken}),
+            "period_rois": len(states),
+            "met": sum(s.met for s in states),
+        }
+
+    def write_provenance(self, root: Path, roi_slugs: dict[Bbox, str]) -> None:
+        """Write one JSON record per (period, ROI) under `root`."""
+        import numpy as np
+
+        with self._lock:
+            states = dict(self._state)
+        for (period, roi), state in states.items():
+            counts = state.counts
+            values, n_pixels = np.unique(counts, return_counts=True)
+            doc = {
+                "sensor": self.sensor,
+                "period": period,
+                "roi_bbox": list(roi),
+                "target": asdict(self.target),
+                "status": "target_reached" if state.met else "exhausted",
+                "candidates": len(state.candidates),
+                "taken": state.taken,
+                "selected": state.selected,
+                "count_grid": {
+                    "bounds": list(state.grid.bounds),
+                    "width": state.grid.width,
+                    "height": state.grid.height,
+                    "pixel_size_deg": state.grid.pixel_size_deg,
+                },
+                "reached": {
+                    "min": int(counts.min()) if counts.size else 0,
+                    "median": float(np.median(counts)) if counts.size else 0.0,
+                    "max": int(counts.max()) if counts.size else 0,
+                    "frac_at_target": float((counts >= self.target.min_obs).mean()) if counts.size else 0.0,
+                    "histogram": {str(int(v)): int(n) for v, n in zip(values, n_pixels)},
+                },
+            }
+            path = ensure_dir(root / self.sensor / roi_slugs[roi]) / f"{period}.json"
+            tmp = tmp_name(path)
+            tmp.write_text(json.dumps(doc, indent=1))
+            os.replace(tmp, path)
@@ -0,0 +1,232 @@
+"""Persistent on-disk index of WB-LEN STAC catalogs and items.
+
+Discovery against the static catalog is pure HTTP: sensor catalog → period
+catalogs → one item JSON per orbit. For a multi-year run that is tens of
+thousands of requests before a single pixel is read, and every rerun used to
+repeat all of them. `STACItemIndex` keeps what we've already learned in one
+SQLite file:
+
+    catalogs   every catalog JSON we've fetched (sensor or period level), with
+               a fetched-at timestamp and a "settled" marker
+    items      one row per item URL listed in a period catalog; the item JSON
+               and its datetime are filled in once the item has been fetched
+    item_bbox  R-tree over fetched items' bboxes for spatial queries
+    li_keys    per-month map of VIIRS orbit key → GDNBO LI object key, built
+               from one prefix listing of the month (see `ViirsLIResolver`)
+
+`STACCatalogClient.find_items` consults the index first and only goes to the
+network for catalogs that are missing or stale, and for item JSONs it hasn't
+seen yet. A catalog is stale when it is unsettled (the sensor catalog, or a
+period that may still be growing such as the current VIIRS month) and older
+than `UNSETTLED_TTL_SECONDS`. Settled period catalogs are never refetched.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+log = logging.getLogger(__name__)
+
+Bbox = tuple[float, float, float, float]  # (xmin, ymin, xmax, ymax) in EPSG:4326
+
+# Unsettled catalogs (sensor-level catalogs and still-open periods) are
+# refetched once they are older than this.
+UNSETTLED_TTL_SECONDS = 24 * 3600
+
+# SQLite's default bound-parameter limit is 32766 on modern builds but 999 on
+# old ones; keep IN (...) lists comfortably under the conservative limit.
+_IN_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalogs (
+    url        TEXT PRIMARY KEY,
+    sensor     TEXT NOT NULL,
+    body       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    settled    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id         INTEGER PRIMARY KEY,
+    url        TEXT UNIQUE NOT NULL,
+    sensor     TEXT NOT NULL,
+    period_url TEXT NOT NULL,
+    datetime   REAL,
+    body       TEXT
+);
+CREATE INDEX IF NOT EXISTS items_period ON items (period_url);
+CREATE INDEX IF NOT EXISTS items_datetime ON items (sensor, datetime);
+CREATE VIRTUAL TABLE IF NOT EXISTS item_bbox USING rtree (id, xmin, xmax, ymin, ymax);
+CREATE TABLE IF NOT EXISTS li_keys (
+    prefix_url TEXT PRIMARY KEY,
+    body       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    settled    INTEGER NOT NULL
+);
+"""
+
+
+def _chunks(seq: list, n: int = _IN_CHUNK) -> Iterator[list]:
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _item_timestamp(item: dict) -> Optional[float]:
+    s = item.get("properties", {}).get("datetime")
+    if not s:
+        return None
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(s).timestamp()
+    except ValueError:
+        return None
+
+
+class STACItemIndex:
+    """SQLite-backed cache of STAC catalogs and items.
+
+    Safe to share between the threads of one process (all access goes through
+    a single connection guarded by a lock) and between processes (WAL journal
+    plus a busy timeout, so a concurrent writer just waits).
+    """
+
+    def __init__(self, path: Path, unsettled_ttl: float = UNSETTLED_TTL_SECONDS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.unsettled_ttl = unsettled_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=60.0, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- catalogs -------------------------------------------------------
+
+    def _fresh_body(self, row: Optional[tuple]) -> Optional[dict]:
+        if row is None:
+            return None
+        body, fetched_at, settled = row
+        if not settled and time.time() - fetched_at > self.unsettled_ttl:
+            return None
+        return json.loads(body)
+
+    def get_catalog(self, url: str) -> Optional[dict]:
+        """Return the cached catalog JSON, or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at, settled FROM catalogs WHERE url = ?", (url,)
+            ).fetchone()
+        return self._fresh_body(row)
+
+    def put_catalog(self, url: str, sensor: str, catalog: dict, settled: bool) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO catalogs (url, sensor, body, fetched_at, settled) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, sensor, json.dumps(catalog), time.time(), int(settled)),
+            )
+
+    # ---- items ----------------------------------------------------------
+
+    def register_items(self, sensor: str, period_url: str, item_urls: Iterable[str]) -> None:
+        """Record item URLs listed by a period catalog (no-op for known URLs)."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO items (url, sensor, period_url) VALUES (?, ?, ?)",
+                ((u, sensor, period_url) for u in item_urls),
+            )
+
+    def put_item(self, url: str, item: dict) -> None:
+        """Store a fetched item JSON. Items without a bbox or datetime get no
+        R-tree row / timestamp, so queries skip them — matching the live
+        walker, which drops them too."""
+        dt = _item_timestamp(item)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE items SET body = ?, datetime = ? WHERE url = ?",
+                (json.dumps(item), dt, url),
+            )
+            if cur.rowcount == 0:
+                return
+            (item_id,) = self._conn.execute(
+                "SELECT id FROM items WHERE url = ?", (url,)
+            ).fetchone()
+            bbox = item.get("bbox")
+            if bbox is not None and len(bbox) >= 4:
+                xmin, ymin, xmax, ymax = (float(v) for v in bbox[:4])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO item_bbox (id, xmin, xmax, ymin, ymax) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (item_id, xmin, xmax, ymin, ymax),
+                )
+
+    def unfetched_item_urls(self, period_urls: list[str]) -> list[str]:
+        """Item URLs listed under these periods whose JSON we don't have yet."""
+        out: list[str] = []
+        with self._lock:
+            for chunk in _chunks(period_urls):
+                marks = ",".join("?" * len(chunk))
+                out.extend(
+                    r[0] for r in self._conn.execute(
+                        f"SELECT url FROM items WHERE body IS NULL AND period_url IN ({marks})",
+                        chunk,
+                    )
+                )
+        return out
+
+    def query(
+        self,
+        period_urls: list[str],
+        roi_bbox: Bbox,
+        start: datetime,
+        end: datetime,
+    ) -> list[dict]:
+        """Fetched items in these periods whose bbox intersects roi_bbox and
+        whose datetime lies in [start, end]."""
+        xmin, ymin, xmax, ymax = roi_bbox
+        out: list[dict] = []
+        with self._lock:
+            for chunk in _chunks(period_urls):
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT i.body FROM item_bbox b JOIN items i ON i.id = b.id "
+                    "WHERE b.xmax >= ? AND b.xmin <= ? AND b.ymax >= ? AND b.ymin <= ? "
+                    "AND i.datetime BETWEEN ? AND ? "
+                    f"AND i.period_url IN ({marks})",
+                    (xmin, xmax, ymin, ymax, start.timestamp(), end.timestamp(), *chunk),
+                )
+                out.extend(json.loads(r[0]) for r in rows)
+        return out
+
+    # ---- VIIRS LI keys --------------------------------------------------
+
+    def get_li_keys(self, prefix_url: str) -> Optional[dict[str, str]]:
+        """Orbit key → LI object key for one listed prefix (e.g.
+        ``https://…/201501/GDNBO_``), or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, fetched_at, settled FROM li_keys WHERE prefix_url = ?",
+                (prefix_url,),
+            ).fetchone()
+        return self._fresh_body(row)
+
+    def put_li_keys(self, prefix_url: str, keys: dict[str, str], settled: bool) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO li_keys (prefix_url, body, fetched_at, settled) "
+                "VALUES (?, ?, ?, ?)",
+                (prefix_url, json.dumps(keys), time.time(), int(settled)),
+            )
@@ -0,0 +1,238 @@
+"""Persistent cache of remote COG tiles, independent of any ROI.
+
+Ingest's window cache is keyed by ROI (`roi_slug`), so a Paris run and a
+France run fetch and store the same remote pixels twice, and enlarging a
+bbox by a hair misses everything. `TileCache` stores what was actually
+fetched — the COG's own internal tiles — in one SQLite file:
+
+    cogs   one row per COG URL: its parsed header (CRS, transform, size,
+           profile) as JSON, so a fully cached window needs no remote open
+    tiles  (url, tile x, tile y) → dtype, shape and the zlib-compressed
+           tile pixels, with created-at and last-accessed timestamps
+
+`harmonizer.ingest.WindowedCOGReader` builds every ROI window by assembling
+cached tiles and fetching only the missing ones, so overlapping and growing
+ROIs reuse every byte already downloaded. The per-ROI window files are still
+written (downstream stages read them); they're now derived locally. That
+doubles local storage, so the cache is off unless `config.TILE_CACHE` is set.
+
+The cache grows without bound; trim it with
+
+    python -m harmonizer.tilecache stats
+    python -m harmonizer.tilecache prune --max-gb 20
+
+which drops the least recently used tiles first.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+log = logging.getLogger(__name__)
+
+Tile = tuple[int, int]  # (tile x, tile y) in the COG's full-resolution block grid
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cogs (
+    url     TEXT PRIMARY KEY,
+    header  TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tiles (
+    url     TEXT NOT NULL,
+    tx      INTEGER NOT NULL,
+    ty      INTEGER NOT NULL,
+    dtype   TEXT NOT NULL,
+    height  INTEGER NOT NULL,
+    width   INTEGER NOT NULL,
+    data    BLOB NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL,
+    PRIMARY KEY (url, ty, tx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tiles_created ON tiles (created);
+"""
+
+# A hit only rewrites a tile's `accessed` time once it is this stale, so
+# repeat reads of hot tiles don't turn into a write per read.
+_TOUCH_INTERVAL = 3600.0
+
+# zlib level for stored tiles: level 1 is within a few percent of the
+# default's ratio on these rasters at a fraction of the CPU.
+_ZLIB_LEVEL = 1
+
+
+class TileCache:
+    """SQLite-backed store of decoded COG tiles and headers.
+
+    Safe to share between threads (one connection guarded by a lock) and
+    processes (WAL journal plus a busy timeout), like
+    `harmonizer.stacindex.STACItemIndex`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=60.0, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tiles)")}
+            if "accessed" not in columns:  # caches written before LRU pruning
+                self._conn.execute("ALTER TABLE tiles ADD COLUMN accessed REAL")
+        self._counts = {"hits": 0, "misses": 0}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---- headers --------------------------------------------------------
+
+    def header(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT header FROM cogs WHERE url = ?", (url,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_header(self, url: str, header: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cogs (url, header, created) VALUES (?, ?, ?)",
+                (url, json.dumps(header), time.time()),
+            )
+
+    # ---- tiles ----------------------------------------------------------
+
+    def get_many(self, url: str, tiles: Iterable[Tile]) -> dict[Tile, np.ndarray]:
+        """The cached ones among `tiles` of one COG, decoded. Marks them
+        as accessed (see `prune`)."""
+        import numpy as np
+
+        wanted = set(tiles)
+        if not wanted:
+            return {}
+        xs = [tx for tx, _ in wanted]
+        ys = [ty for _, ty in wanted]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tx, ty, dtype, height, width, data, COALESCE(accessed, created) "
+                "FROM tiles WHERE url = ? AND ty BETWEEN ? AND ? AND tx BETWEEN ? AND ?",
+                (url, min(ys), max(ys), min(xs), max(xs)),
+            ).fetchall()
+        now = time.time()
+        out: dict[Tile, np.ndarray] = {}
+        stale: list[tuple[float, str, int, int]] = []
+        for tx, ty, dtype, h, w, data, accessed in rows:
+            if (tx, ty) in wanted:
+                out[(tx, ty)] = np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(h, w)
+                if now - accessed > _TOUCH_INTERVAL:
+                    stale.append((now, url, tx, ty))
+        with self._lock:
+            self._counts["hits"] += len(out)
+            self._counts["misses"] += len(wanted) - len(out)
+            if stale:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE tiles SET accessed = ? WHERE url = ? AND tx = ? AND ty = ?",
+                        stale,
+                    )
+        return out
+
+    def put_many(self, url: str, tiles: dict[Tile, np.ndarray]) -> None:
+        now = time.time()
+        rows = [
+            (url, tx, ty, arr.dtype.str, arr.shape[0], arr.shape[1],
+             zlib.compress(arr.tobytes(), _ZLIB_LEVEL), now, now)
+            for (tx, ty), arr in tiles.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tiles "
+                "(url, tx, ty, dtype, height, width, data, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    # ---- maintenance ----------------------------------------------------
+
+    def stats(self) -> dict[str, int]:
+        """Tile and COG counts, stored bytes, and this process's tile hits
+        and misses."""
+        with self._lock:
+            n_tiles, n_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM tiles"
+            ).fetchone()
+            n_cogs = self._conn.execute("SELECT COUNT(*) FROM cogs").fetchone()[0]
+            return {"cogs": n_cogs, "tiles": n_tiles, "bytes": n_bytes, **self._counts}
+
+    def prune(self, max_bytes: int) -> int:
+        """Drop the least recently used tiles until at most `max_bytes` of
+        tile data is left, and headers of COGs with no tiles left. Returns
+        tiles dropped. Access times are only as fine as `_TOUCH_INTERVAL`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, tx, ty, LENGTH(data) FROM tiles "
+                "ORDER BY COALESCE(accessed, created) DESC"
+            ).fetchall()
+        total = 0
+        drop = []
+        for url, tx, ty, size in rows:
+            total += size
+            if total > max_bytes:
+                drop.append((url, tx, ty))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM tiles WHERE url = ? AND tx = ? AND ty = ?", drop,
+            )
+            self._conn.execute(
+                "DELETE FROM cogs WHERE url NOT IN (SELECT DISTINCT url FROM tiles)"
+            )
+        if drop:
+            with self._lock:
+                self._conn.execute("VACUUM")
+        return len(drop)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def get_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = p.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="report the cache's size")
+    pr = sub.add_parser("prune", help="drop the least recently used tiles down to a size")
+    pr.add_argument("--max-gb", type=float, required=True)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    from harmonizer.config import TILE_CACHE
+
+    args = get_args()
+    if TILE_CACHE is None:
+        raise SystemExit("TILE_CACHE is not set in harmonizer/config.py")
+    cache = TileCache(TILE_CACHE)
+    try:
+        if args.command == "prune":
+            print(f"dropped {cache.prune(int(args.max_gb * 1e9))} tiles")
+        stats = cache.stats()
+        print(f"{stats['cogs']} COGs, {stats['tiles']} tiles, {stats['bytes'] / 1e9:.2f} GB")
+    finally:
+        cache.close()
@@ -41,6 +41,7 @@ from rasterio.enums import Resampling
 from rasterio.warp import reproject
 from tqdm import tqdm
 
+from harmonizer.cachedb import tmp_name
 from harmonizer.utils import clip_arr
 
 log = logging.getLogger(__name__)
@@ -284,7 +285,7 @@ class Harmonizer:
             tiled=True,
             driver="GTiff",
         )
-        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        tmp = tmp_name(out_path)
         with rasterio.open(tmp, "w", **profile) as dst:
             dst.write(Y, 1)
         tmp.replace(out_path)
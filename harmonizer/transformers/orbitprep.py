@@ -7,6 +7,11 @@ shared per-sensor ROI grid:
     radiance.tif  — masked + warped, float32 with NaN nodata
     li.tif        — masked + warped, float32 with NaN nodata
 
+LI is always ingested by default. With the experimental `skip_li` opt-in,
+`plan_layers` drops it from "zero"-mode runs without an LI composite, and an
+OrbitPrep built without "li" takes (radiance, flag) pairs and writes
+radiance.tif only.
+
 The flag layer is consumed (used to derive the mask) but not written out: a
 downstream consumer can recover the valid-pixel mask via `np.isnan(radiance)`.
 
@@ -33,6 +38,9 @@ import rasterio
 from rasterio.transform import from_bounds as transform_from_bounds
 from rasterio.warp import Resampling, reproject
 
+from harmonizer.cachedb import CacheManifest, build_lock, ensure_dir, tmp_name
+from harmonizer.orbitstore import read_layer
+from harmonizer.orbittable import OrbitTable
 from harmonizer.constants import (
     SENSOR_CONFIGS,
     SENSOR_DMSP,
@@ -49,6 +57,7 @@ NATIVE_PIXEL_SIZE_DEG = {
 }
 
 LUNAR_MASK_MODES = ("zero", "low", "all")
+INGEST_LAYERS = ("radiance", "li", "flag")
 
 
 # ---------------------------------------------------------------------------
@@ -85,7 +94,10 @@ def make_lunar_mask(
 
 
 def make_validity_mask(
-    radiance: np.ndarray, li: np.ndarray, cfg: SensorConfig
+    radiance: np.ndarray,
+    li: Optional[np.ndarray],
+    cfg: SensorConfig,
+    radiance_nodata: Optional[float] = None,
 ) -> np.ndarray:
     """Boolean: True where pixel has a real observation (not a fill sentinel).
 
@@ -95,16 +107,21 @@ def make_validity_mask(
         no-observation sentinels.
       - Radiance within the sensor's valid range. Catches DMSP's 255 fill and
         any extreme outliers without depending on a single sentinel value.
+
+    With ``li=None`` only the radiance check (plus the source's declared
+    `radiance_nodata`) applies. That drops the LI sentinel check, the only
+    one that catches VIIRS no-observation pixels (see
+    `harmonizer.constants`); it is used only under the experimental
+    `plan_layers(..., skip_li=True)` opt-in.
     """
     rad_f = radiance.astype(np.float32)
     rad_min, rad_max = cfg.radiance_range
-    return (
-        (li >= 0)
-        & np.isfinite(li)
-        & np.isfinite(rad_f)
-        & (rad_f >= rad_min)
-        & (rad_f <= rad_max)
-    )
+    valid = np.isfinite(rad_f) & (rad_f >= rad_min) & (rad_f <= rad_max)
+    if li is not None:
+        return valid & (li >= 0) & np.isfinite(li)
+    if radiance_nodata is not None and not math.isnan(radiance_nodata):
+        valid &= radiance != radiance_nodata
+    return valid
 
 
 def make_extra_mask(flag: np.ndarray, mask_if_set: Iterable[int]) -> np.ndarray:
@@ -115,6 +132,31 @@ def make_extra_mask(flag: np.ndarray, mask_if_set: Iterable[int]) -> np.ndarray:
     return keep
 
 
+def plan_layers(
+    lunar_mask_mode: str,
+    composite_outputs: Iterable[str],
+    skip_li: bool = False,
+) -> tuple[str, ...]:
+    """The ingest layers a run needs, in `INGEST_LAYERS` order.
+
+    All three by default: LI drives the validity check (its sentinel is what
+    marks VIIRS no-observation pixels). With `skip_li`, LI is dropped from
+    "zero"-mode runs without an "li" composite output, saving a window read
+    per orbit and, for VIIRS, the GDNBO LI bucket lookup. Validity then rests
+    on the radiance range and the zero-lunar flag bit alone, which has not
+    been checked against real archive orbits. The "low" mask and "all"-mode
+    validity always need LI.
+    """
+    if lunar_mask_mode not in LUNAR_MASK_MODES:
+        raise ValueError(
+            f"lunar_mask_mode must be one of {LUNAR_MASK_MODES}, got {lunar_mask_mode!r}"
+        )
+    need_li = (
+        not skip_li or lunar_mask_mode != "zero" or "li" in set(composite_outputs)
+    )
+    return tuple(l for l in INGEST_LAYERS if need_li or l != "li")
+
+
 # ---------------------------------------------------------------------------
 # Target grid
 # ---------------------------------------------------------------------------
@@ -171,6 +213,11 @@ class OrbitPrep:
     low_thresh_lux : LI threshold used in "low" mode (lux)
     extra_mask_if_set : flag bit indices that should mask a pixel out when set
     pixel_size_deg : output pixel size; defaults to sensor native
+    layers : ingest layers the records carry (see `plan_layers`); without
+             "li", records need no LI layer and no li.tif is written
+    manifest : optional ``harmonizer.cachedb.CacheManifest``; when given,
+               cache hits are one manifest query (keyed on the masking
+               settings, so changing them recomputes) instead of file stats
     """
 
     sensor: str
@@ -180,6 +227,8 @@ class OrbitPrep:
     low_thresh_lux: float = 0.1
     extra_mask_if_set: tuple[int, ...] = field(default_factory=tuple)
     pixel_size_deg: Optional[float] = None
+    layers: tuple[str, ...] = INGEST_LAYERS
+    manifest: Optional[CacheManifest] = None
     _grid: TargetGrid = field(init=False)
     _cfg: SensorConfig = field(init=False)
     roi_slug: str = field(init=False)
@@ -191,6 +240,9 @@ class OrbitPrep:
             raise ValueError(
                 f"lunar_mask_mode must be one of {LUNAR_MASK_MODES}, got {self.lunar_mask_mode!r}"
             )
+        self.layers = tuple(self.layers)
+        if "li" not in self.layers and "li" in plan_layers(self.lunar_mask_mode, (), skip_li=True):
+            raise ValueError(f"lunar_mask_mode {self.lunar_mask_mode!r} needs the li layer")
         self._cfg = SENSOR_CONFIGS[self.sensor]
         if self.pixel_size_deg is None:
             self.pixel_size_deg = NATIVE_PIXEL_SIZE_DEG[self.sensor]
@@ -206,52 +258,80 @@ class OrbitPrep:
     # ---- orchestration --------------------------------------------------
 
     def out_dir(self, period: str) -> Path:
-        d = self.dst_dir / self.sensor / self.roi_slug / period
-        d.mkdir(parents=True, exist_ok=True)
-        return d
+        return ensure_dir(self.dst_dir / self.sensor / self.roi_slug / period)
+
+    @property
+    def outputs(self) -> tuple[str, ...]:
+        """Layers written per orbit: radiance, plus li when it's ingested."""
+        return tuple(l for l in ("radiance", "li") if l in self.layers)
 
     def out_paths(self, period: str, orbit_id: str) -> dict[str, Path]:
         d = self.out_dir(period)
-        return {
-            "radiance": d / f"{orbit_id}.radiance.tif",
-            "li": d / f"{orbit_id}.li.tif",
-        }
+        return {layer: d / f"{orbit_id}.{layer}.tif" for layer in self.outputs}
+
+    def transform_table(self, records: Iterable[dict]) -> OrbitTable:
+        """`transform` every record of an ingest `OrbitTable` (or any
+        iterable of records); returns the outputs as a table with
+        `outputs` as its layer columns."""
+        return OrbitTable.from_records(
+            (self.transform(r) for r in records), sensor=self.sensor, layers=self.outputs,
+        )
 
     def transform(self, record: dict) -> dict:
         """Process a single orbit record from `harmonizer.ingest.ingest()`.
 
         record schema: {"orbit": OrbitRef, "radiance": Path, "li": Path, "flag": Path}
+        (layers may be `harmonizer.orbitstore.StoreRef`s when ingest used an
+        `OrbitStore`; "li" is ignored unless it is in `layers`)
         """
         orbit = record["orbit"]
         if orbit.sensor != self.sensor:
             raise ValueError(
                 f"OrbitPrep configured for {self.sensor} but record sensor is {orbit.sensor}"
             )
-        if any(record.get(k) is None for k in ("radiance", "li", "flag")):
+        if any(record.get(k) is None for k in self.layers):
             log.warning("orbit %s missing one or more layers; skipping", orbit.orbit_id)
-            return {"orbit": orbit, "radiance": None, "li": None}
+            return {"orbit": orbit, **dict.fromkeys(self.outputs)}
 
         period = orbit.datetime.strftime("%Y%m")
         outs = self.out_paths(period, orbit.orbit_id)
-        if all(p.exists() and p.stat().st_size > 0 for p in outs.values()):
+        key = None
+        if self.manifest is not None:
+            key = self.manifest.input_key(
+                self.lunar_mask_mode, self.low_thresh_lux, tuple(self.extra_mask_if_set),
+                inputs=tuple(record[k] for k in self.layers),
+            )
+        if self._is_cached(outs, key):
             return {"orbit": orbit, **outs}
+        # Single-flight: a concurrent run preparing the same orbit waits here
+        # and reuses the result.
+        with build_lock(outs["radiance"]):
+            if not self._is_cached(outs, key):
+                self._prepare(record, outs, key)
+        return {"orbit": orbit, **outs}
 
+    def _is_cached(self, outs: dict[str, Path], key: Optional[str]) -> bool:
+        if self.manifest is not None:
+            return self.manifest.has_all("orbitprep", list(outs.values()), key)
+        return all(p.exists() and p.stat().st_size > 0 for p in outs.values())
+
+    def _prepare(self, record: dict, outs: dict[str, Path], key: Optional[str]) -> None:
+        """Mask and warp one orbit's layers into `outs`."""
+        orbit = record["orbit"]
         # Read source layers (all on same source grid — they're co-located).
-        radiance_src, src_meta = self._read(record["radiance"])
-        li_src, _ = self._read(record["li"])
-        flag_src, _ = self._read(record["flag"])
+        radiance_src, src_meta = read_layer(record["radiance"])
+        li_src = read_layer(record["li"])[0] if "li" in self.layers else None
+        flag_src, _ = read_layer(record["flag"])
 
         # Build mask in source space, apply, then warp.
         keep = make_lunar_mask(
             li_src, flag_src, self._cfg, self.lunar_mask_mode, self.low_thresh_lux
         )
         keep &= make_extra_mask(flag_src, self.extra_mask_if_set)
-        keep &= make_validity_mask(radiance_src, li_src, self._cfg)
+        keep &= make_validity_mask(radiance_src, li_src, self._cfg, src_meta["nodata"])
 
         radiance_masked = radiance_src.astype(np.float32, copy=True)
         radiance_masked[~keep] = np.nan
-        li_masked = li_src.astype(np.float32, copy=True)
-        li_masked[~keep] = np.nan
 
         kept_pct = 100.0 * keep.sum() / keep.size if keep.size else 0.0
         log.debug(
@@ -263,27 +343,18 @@ class OrbitPrep:
             radiance_masked, src_meta, outs["radiance"],
             resampling=Resampling.average,
         )
-        self._warp_and_write(
-            li_masked, src_meta, outs["li"],
-            resampling=Resampling.average,
-        )
-        return {"orbit": orbit, **outs}
+        if li_src is not None:
+            li_masked = li_src.astype(np.float32, copy=True)
+            li_masked[~keep] = np.nan
+            self._warp_and_write(
+                li_masked, src_meta, outs["li"],
+                resampling=Resampling.average,
+            )
+        if self.manifest is not None:
+            self.manifest.record_many("orbitprep", outs.values(), key)
 
     # ---- IO helpers -----------------------------------------------------
 
-    @staticmethod
-    def _read(path: Path) -> tuple[np.ndarray, dict]:
-        with rasterio.open(path) as src:
-            arr = src.read(1)
-            meta = {
-                "transform": src.transform,
-                "crs": src.crs,
-                "width": src.width,
-                "height": src.height,
-                "nodata": src.nodata,
-            }
-        return arr, meta
-
     def _warp_and_write(
         self,
         src_arr: np.ndarray,
@@ -315,7 +386,7 @@ class OrbitPrep:
             "compress": "deflate",
             "tiled": True,
         }
-        tmp = dst_path.with_suffix(dst_path.suffix + ".tmp")
+        tmp = tmp_name(dst_path)
         with rasterio.open(tmp, "w", **profile) as out:
             out.write(dst, 1)
         tmp.replace(dst_path)
@@ -0,0 +1,142 @@
+"""Offline ingest throughput benchmark against the fake WB-LEN server.
+
+Builds (or reuses) a synthetic fixture, serves it with
+`scripts.fake_wblen.FakeWBLENServer`, then runs `harmonizer.ingest.ingest()`
+once per (raster backend, worker count) against a fresh cache and reports
+orbits/s and bytes/s.
+
+Each run happens in a child process so GDAL's per-process /vsicurl/ caches
+(and the pure-Python backends' header caches) can't carry over between runs;
+the server (and its byte counters) lives in this parent process.
+
+Run:
+    python -m scripts.bench_ingest --workers 4 8 16 32 --latency 0.05 \
+        --error-rate 0.01 --bandwidth 2e6
+    python -m scripts.bench_ingest --backend gdal range --workers 8 --latency 0.05
+    python -m scripts.bench_ingest --workers 8 --stall-rate 0.02 --stall-seconds 5 \
+        [--no-hedge]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from scripts.fake_wblen import FakeWBLENServer, build_fixture, load_fixture
+
+
+def get_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sensor", default="viirs_npp", choices=["viirs_npp", "dmsp"])
+    p.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16, 32])
+    p.add_argument("--fixture-dir", type=Path, default=None,
+                   help="reuse/keep the fixture here (default: a temp dir)")
+    p.add_argument("--days", type=int, default=6)
+    p.add_argument("--orbits-per-day", type=int, default=4)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--bandwidth", type=float, default=None)
+    p.add_argument("--stall-rate", type=float, default=0.0,
+                   help="fraction of range requests that stall (tail latency)")
+    p.add_argument("--stall-seconds", type=float, default=5.0)
+    p.add_argument("--no-hedge", action="store_true",
+                   help="disable hedged window reads")
+    p.add_argument("--backend", nargs="+", default=["gdal"],
+                   choices=["gdal", "range", "local", "auto"],
+                   help="raster I/O backend(s) to compare (see harmonizer.cogio)")
+    p.add_argument("--fixed", action="store_true",
+                   help="disable adaptive concurrency (workers is the exact level)")
+    # internal: run one ingest and print a JSON result line
+    p.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    p.add_argument("--cache-dir", type=Path, default=None, help=argparse.SUPPRESS)
+    return p.parse_args()
+
+
+def run_child(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    from harmonizer.ingest import ingest  # after NTL_WBLEN_BASE_URL is set
+
+    fixture = load_fixture(args.fixture_dir)
+    spec = fixture["sensors"][args.sensor]
+    t0 = time.time()
+    records = ingest(
+        tuple(fixture["roi_bbox"]),
+        datetime.fromisoformat(spec["start"]),
+        datetime.fromisoformat(spec["end"]),
+        args.sensor,
+        args.cache_dir,
+        max_workers=args.workers[0],
+        adaptive_concurrency=not args.fixed,
+        backend=args.backend[0],
+        hedge_reads=not args.no_hedge,
+    )
+    print(json.dumps({"records": len(records), "elapsed": time.time() - t0}))
+    return 0
+
+
+def main() -> int:
+    args = get_args()
+    if args.child:
+        return run_child(args)
+
+    with tempfile.TemporaryDirectory() as td:
+        fixture_dir = args.fixture_dir or Path(td) / "fixture"
+        fixture = load_fixture(fixture_dir)
+        if fixture is None:
+            print(f"building fixture under {fixture_dir} ...")
+            fixture = build_fixture(
+                fixture_dir, n_days=args.days, orbits_per_day=args.orbits_per_day,
+            )
+        n_candidates = fixture["sensors"][args.sensor]["n_orbits"]
+
+        server = FakeWBLENServer(
+            fixture_dir, latency=args.latency, error_rate=args.error_rate,
+            bandwidth=args.bandwidth, stall_rate=args.stall_rate,
+            stall_seconds=args.stall_seconds,
+        )
+        env = {**os.environ, "NTL_WBLEN_BASE_URL": server.base_url}
+        print(
+            f"{args.sensor}: {n_candidates} candidate orbits  latency={args.latency}s  "
+            f"error_rate={args.error_rate}  bandwidth={args.bandwidth or 'unlimited'}  "
+            f"stall_rate={args.stall_rate}  hedge={'off' if args.no_hedge else 'on'}"
+        )
+        print(f"{'backend':>8} {'workers':>8} {'orbits':>7} {'wall s':>8} {'orbits/s':>9} {'MB/s':>8} {'requests':>9}")
+        with server:
+            for backend in args.backend:
+                for w in args.workers:
+                    server.reset_stats()
+                    cmd = [
+                        sys.executable, "-m", "scripts.bench_ingest", "--child",
+                        "--sensor", args.sensor, "--workers", str(w),
+                        "--backend", backend,
+                        "--fixture-dir", str(fixture_dir),
+                        "--cache-dir", str(Path(td) / f"cache_{backend}_w{w}"),
+                    ] + (["--fixed"] if args.fixed else []) \
+                      + (["--no-hedge"] if args.no_hedge else [])
+                    t0 = time.time()
+                    out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+                    wall = time.time() - t0
+                    if out.returncode != 0:
+                        print(out.stderr, file=sys.stderr)
+                        return out.returncode
+                    result = json.loads(out.stdout.strip().splitlines()[-1])
+                    stats = server.stats()
+                    elapsed = result["elapsed"]
+                    print(
+                        f"{backend:>8} {w:>8d} {result['records']:>7d} {elapsed:>8.2f} "
+                        f"{result['records'] / elapsed:>9.2f} "
+                        f"{stats['bytes_sent'] / elapsed / 1e6:>8.2f} {stats['requests']:>9d}"
+                        + ("" if abs(wall - elapsed) < 30 else f"  (process wall {wall:.1f}s)")
+                    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -253,7 +253,7 @@ def build() -> nbf.NotebookNode:
         "print(f'bbox:  {orbit.bbox}')",
         "print(f'radiance: {orbit.radiance_url[-90:]}')",
         "",
-        "reader = WindowedCOGReader(TUTORIAL_CACHE / 'ingest')",
+        "reader = WindowedCOGReader(TUTORIAL_CACHE / 'ingest', PARIS_BBOX)",
         "paths = {",
         "    layer: reader.read_window(",
         "        getattr(orbit, f'{layer}_url'),",
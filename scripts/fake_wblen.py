@@ -0,0 +1,592 @@
+"""Offline stand-in for the WB-LEN bucket: synthetic fixtures + local server.
+
+Every other script in `scripts/` talks to the live `globalnightlight` bucket,
+so ingest throughput can't be measured reproducibly or without a network.
+This module provides:
+
+  - `build_fixture(root, ...)` — writes a small synthetic WB-LEN layout to
+    disk: sensor catalogs, period catalogs, item JSONs, and tiled COG
+    triplets (radiance / li / flag) per orbit, using the real filename
+    conventions for both sensors. The directory can be kept and reused as a
+    recorded fixture.
+  - `FakeWBLENServer` — a threaded HTTP/1.1 server over such a directory that
+    speaks just enough S3 for the pipeline: plain and ranged GETs, HEAD, and
+    ListObjectsV2 XML at the root (1000 keys per page with continuation
+    tokens). Latency, error-rate (retryable 503s), per-response bandwidth
+    and stalled range requests (tail latency) can be injected, whole-object
+    GETs can be sent chunked, and it counts connections, requests and bytes
+    served.
+
+Item JSONs are stored with a `__WBLEN_BASE__` placeholder in their asset hrefs
+which the server rewrites to its own base URL, so a fixture works on any port.
+
+Point the pipeline at a running server by exporting its base URL before
+importing `harmonizer`:
+
+    NTL_WBLEN_BASE_URL=http://127.0.0.1:8000 python -m scripts.smoke_test_ingest
+
+Run standalone:
+
+    python -m scripts.fake_wblen --root /tmp/wblen --build --port 8000
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import bisect
+import json
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from xml.sax.saxutils import escape
+
+log = logging.getLogger("fake_wblen")
+
+BASE_PLACEHOLDER = "__WBLEN_BASE__"
+FIXTURE_MANIFEST = "fixture.json"
+
+PARIS_BBOX = (2.0, 48.5, 3.0, 49.5)
+
+VIIRS_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DMSP_START = datetime(2005, 1, 1, tzinfo=timezone.utc)
+DMSP_SAT = "F16"
+
+_VIIRS_PIXEL_DEG = 15.0 / 3600.0
+_DMSP_PIXEL_DEG = 30.0 / 3600.0
+
+
+# ---------------------------------------------------------------------------
+# Fixture builder
+# ---------------------------------------------------------------------------
+
+def _swath_polygon(bbox, rng: random.Random) -> list[list[float]]:
+    """A diagonal strip inside bbox — orbit swaths are rarely axis-aligned."""
+    xmin, ymin, xmax, ymax = bbox
+    w = xmax - xmin
+    half = w * rng.uniform(0.2, 0.35)
+    lean = w * rng.uniform(-0.3, 0.3)
+    cx = (xmin + xmax) / 2
+    return [
+        [cx - half - lean, ymin],
+        [cx + half - lean, ymin],
+        [cx + half + lean, ymax],
+        [cx - half + lean, ymax],
+        [cx - half - lean, ymin],
+    ]
+
+
+def _inside_swath(poly, xs, ys):
+    """Vectorized point-in-convex-quad test for the strip from _swath_polygon."""
+    (x0, y0), (x1, _), (x2, y2), (x3, _) = poly[:4]
+    t = (ys - y0) / (y2 - y0)
+    left = x0 + (x3 - x0) * t
+    right = x1 + (x2 - x1) * t
+    return (xs >= left) & (xs <= right) & (t >= 0) & (t <= 1)
+
+
+def _write_cog(
+    path: Path, arr, bbox, nodata, compress: str = "deflate",
+    predictor: Optional[int] = None,
+) -> None:
+    import rasterio
+    import rasterio.shutil
+    from rasterio.transform import from_bounds
+
+    height, width = arr.shape
+    profile = {
+        "driver": "GTiff",
+        "dtype": arr.dtype.name,
+        "count": 1,
+        "width": width,
+        "height": height,
+        "crs": "EPSG:4326",
+        "transform": from_bounds(*bbox, width, height),
+        "nodata": nodata,
+        "tiled": True,
+        "blockxsize": 256,
+        "blockysize": 256,
+    }
+    codec = {"compress": compress}
+    if predictor is not None:
+        codec["predictor"] = predictor
+    profile.update(codec)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with rasterio.open(tmp, "w", **profile) as dst:
+        dst.write(arr, 1)
+    with rasterio.open(tmp, "r+") as dst:
+        dst.build_overviews([2, 4, 8])
+    # Re-copy so the overviews sit ahead of full-res data, COG style.
+    rasterio.shutil.copy(
+        tmp, path, driver="GTiff", tiled=True, blockxsize=256, blockysize=256,
+        copy_src_overviews=True, **codec,
+    )
+    tmp.unlink()
+
+
+def _orbit_layers(sensor: str, bbox, poly, dark: bool, rng: random.Random):
+    """Synthetic (radiance, li, flag) arrays for one orbit over bbox."""
+    import numpy as np
+
+    px = _VIIRS_PIXEL_DEG if sensor == "viirs_npp" else _DMSP_PIXEL_DEG
+    xmin, ymin, xmax, ymax = bbox
+    width = int(round((xmax - xmin) / px))
+    height = int(round((ymax - ymin) / px))
+    xs = xmin + (np.arange(width) + 0.5) * px
+    ys = ymax - (np.arange(height) + 0.5) * px
+    gx, gy = np.meshgrid(xs, ys)
+    swath = _inside_swath(poly, gx, gy)
+    nrng = np.random.default_rng(rng.randrange(2**32))
+
+    # A few Gaussian "cities" over a dim background.
+    lights = nrng.lognormal(mean=-1.0, sigma=0.5, size=(height, width))
+    for _ in range(6):
+        cx, cy = rng.uniform(xmin, xmax), rng.uniform(ymin, ymax)
+        amp, r = rng.uniform(5, 60), rng.uniform(0.05, 0.3)
+        lights += amp * np.exp(-((gx - cx) ** 2 + (gy - cy) ** 2) / (2 * r * r))
+    moon_lux = 0.0 if dark else rng.uniform(0.02, 0.3)
+
+    if sensor == "viirs_npp":
+        radiance = np.where(swath, lights + 50 * moon_lux, 0).astype(np.float32)
+        li = np.where(swath, moon_lux, -999.3).astype(np.float32)
+        flag = np.zeros((height, width), dtype=np.uint16)
+        if dark:
+            flag[swath] |= 1 << 5
+        return (radiance, None), (li, None), (flag, None)
+    radiance = np.where(swath, np.clip(lights, 0, 63), 255).astype(np.uint8)
+    li = np.where(swath, moon_lux, -1.0).astype(np.float32)
+    flag = np.zeros((height, width), dtype=np.uint16)
+    if dark:
+        flag[swath] |= 1 << 11
+    return (radiance, 255), (li, None), (flag, None)
+
+
+def _item_json(item_id: str, bbox, poly, dt: datetime, radiance_href: str) -> dict:
+    return {
+        "type": "Feature",
+        "stac_version": "1.0.0",
+        "id": item_id,
+        "bbox": list(bbox),
+        "geometry": {"type": "Polygon", "coordinates": [poly]},
+        "properties": {"datetime": dt.strftime("%Y-%m-%dT%H:%M:%SZ")},
+        "assets": {"image": {"href": radiance_href, "type": "image/tiff"}},
+        "links": [],
+    }
+
+
+def build_fixture(
+    root: Path,
+    sensors: tuple[str, ...] = ("viirs_npp", "dmsp"),
+    roi_bbox=PARIS_BBOX,
+    n_days: int = 6,
+    orbits_per_day: int = 4,
+    extent_deg: float = 4.0,
+    seed: int = 0,
+) -> dict:
+    """Write a synthetic WB-LEN layout under `root`. Returns the manifest.
+
+    Each sensor gets one period catalog (VIIRS 201501, DMSP F162005) with
+    `n_days * orbits_per_day` orbits whose bboxes are `extent_deg` wide and
+    jittered around `roi_bbox`, so some miss the ROI entirely and some only
+    graze it with their bbox but not their swath.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    cx = (roi_bbox[0] + roi_bbox[2]) / 2
+    cy = (roi_bbox[1] + roi_bbox[3]) / 2
+    manifest: dict = {"roi_bbox": list(roi_bbox), "sensors": {}}
+
+    for sensor in sensors:
+        if sensor == "viirs_npp":
+            start, period_id, sensor_cat = VIIRS_START, VIIRS_START.strftime("%Y%m"), "VIIRS_npp_catalog.json"
+        else:
+            start, period_id, sensor_cat = DMSP_START, f"{DMSP_SAT}{DMSP_START.year}", "DMSP_catalog.json"
+        period_dir = root / period_id
+        period_dir.mkdir(exist_ok=True)
+        item_links = []
+        n_orbits = 0
+        for day in range(n_days):
+            for k in range(orbits_per_day):
+                dt = start + timedelta(days=day, hours=1 + 5 * k, minutes=rng.randrange(60))
+                ox = cx + rng.uniform(-0.7, 0.7) * extent_deg
+                oy = cy + rng.uniform(-0.7, 0.7) * extent_deg
+                half = extent_deg / 2
+                bbox = (round(ox - half, 4), round(oy - half, 4), round(ox + half, 4), round(oy + half, 4))
+                poly = _swath_polygon(bbox, rng)
+                # Roughly half the nights are moonlit, as in the real archive.
+                dark = (day // 3) % 2 == 0
+                (rad, rad_nd), (li, li_nd), (flag, flag_nd) = _orbit_layers(
+                    sensor, bbox, poly, dark, rng
+                )
+                if sensor == "viirs_npp":
+                    b = 16466 + day * orbits_per_day + k
+                    t0 = dt.strftime("%H%M%S") + "0"
+                    t1 = (dt + timedelta(minutes=5)).strftime("%H%M%S") + "0"
+                    orbit = f"npp_d{dt:%Y%m%d}_t{t0}_e{t1}_b{b:05d}"
+                    c_rad = (dt + timedelta(hours=6)).strftime("%Y%m%d%H%M%S") + "000000"
+                    c_li = (dt + timedelta(hours=6, seconds=7)).strftime("%Y%m%d%H%M%S") + "000000"
+                    rad_name = f"SVDNB_{orbit}_c{c_rad}_noaa_ops.rade9.co.tif"
+                    li_name = f"GDNBO_{orbit}_c{c_li}_noaa_ops.li.co.tif"
+                    flag_name = f"{orbit}.vflag.co.tif"
+                    item_name = rad_name[: -len(".tif")] + ".json"
+                    item_id = rad_name[: -len(".co.tif")]
+                else:
+                    stem = f"{DMSP_SAT}{dt:%Y%m%d%H%M}.night.OIS"
+                    rad_name = f"{stem}.vis.co.tif"
+                    li_name = f"{stem}.li.co.tif"
+                    flag_name = f"{stem}.flag.co.tif"
+                    item_name = f"{stem}.vis.co.json"
+                    item_id = stem
+                _write_cog(period_dir / rad_name, rad, bbox, rad_nd)
+                _write_cog(period_dir / li_name, li, bbox, li_nd)
+                _write_cog(period_dir / flag_name, flag, bbox, flag_nd)
+                item = _item_json(
+                    item_id, bbox, poly, dt,
+                    f"{BASE_PLACEHOLDER}/{period_id}/{rad_name}",
+                )
+                (period_dir / item_name).write_text(json.dumps(item))
+                item_links.append({"rel": "item", "href": f"./{item_name}"})
+                n_orbits += 1
+
+        period_cat = {
+            "type": "Catalog", "stac_version": "1.0.0", "id": period_id,
+            "description": f"synthetic {sensor} {period_id}", "links": item_links,
+        }
+        (period_dir / f"{period_id}_catalog.json").write_text(json.dumps(period_cat))
+        (root / sensor_cat).write_text(json.dumps({
+            "type": "Catalog", "stac_version": "1.0.0", "id": sensor_cat[:-5],
+            "description": f"synthetic {sensor}",
+            "links": [{"rel": "child", "href": f"./{period_id}/{period_id}_catalog.json"}],
+        }))
+        manifest["sensors"][sensor] = {
+            "period": period_id,
+            "start": start.isoformat(),
+            "end": (start + timedelta(days=n_days) - timedelta(seconds=1)).isoformat(),
+            "n_orbits": n_orbits,
+        }
+    (root / FIXTURE_MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_fixture(root: Path) -> Optional[dict]:
+    path = Path(root) / FIXTURE_MANIFEST
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.fake._count("connections")
+        # Headers and body go out in separate writes; without this Nagle +
+        # delayed ACK adds ~40 ms to every response.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, fmt, *args):  # quiet
+        log.debug("%s " + fmt, self.address_string(), *args)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _send(self, status: int, body: bytes, ctype: str, head: bool, extra=None) -> None:
+        chunked = self.server.fake.chunked and status == 200
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if not head:
+            self.server.fake._write(self.wfile, body, chunked)
+
+    def _serve(self, head: bool) -> None:
+        fake: FakeWBLENServer = self.server.fake
+        fake._on_request()
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake.error_rate and fake._roll() < fake.error_rate:
+            fake._count("errors_injected")
+            self._send(503, b"<Error><Code>SlowDown</Code></Error>", "application/xml", head)
+            return
+
+        parsed = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        if parsed.path in ("", "/") and query.get("list-type") == ["2"]:
+            fake._count("list_requests")
+            self._send(200, fake._list_xml(query), "application/xml", head)
+            return
+
+        body = fake._blob(urllib.parse.unquote(parsed.path.lstrip("/")))
+        if body is None:
+            self._send(404, b"<Error><Code>NoSuchKey</Code></Error>", "application/xml", head)
+            return
+        ctype = "application/json" if parsed.path.endswith(".json") else "image/tiff"
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            first, _, last = rng[len("bytes="):].split(",")[0].partition("-")
+            size = len(body)
+            if first == "":
+                start, end = max(0, size - int(last)), size - 1
+            else:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            if start >= size:
+                self._send(416, b"", ctype, head, {"Content-Range": f"bytes */{size}"})
+                return
+            fake._count("range_requests")
+            if fake.stall_rate and fake._roll() < fake.stall_rate:
+                fake._count("stalls_injected")
+                time.sleep(fake.stall_seconds)
+            self._send(
+                206, body[start:end + 1], ctype, head,
+                {"Content-Range": f"bytes {start}-{end}/{size}"},
+            )
+            return
+        self._send(200, body, ctype, head)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is routine here.
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeWBLENServer:
+    """Threaded local HTTP server over a fixture directory.
+
+    Parameters
+    ----------
+    root : fixture directory (see `build_fixture`)
+    latency : seconds slept before every response
+    error_rate : probability that a request gets a retryable 503
+    bandwidth : per-response throughput cap in bytes/s (None ⇒ unthrottled)
+    stall_rate : probability that a range request stalls for `stall_seconds`
+                 before responding (a slow S3 connection)
+    chunked : send whole-object (200) bodies with chunked transfer encoding
+              instead of a Content-Length
+    seed : RNG seed for error and stall injection
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        bandwidth: Optional[float] = None,
+        stall_rate: float = 0.0,
+        stall_seconds: float = 5.0,
+        chunked: bool = False,
+        seed: int = 0,
+    ):
+        self.root = Path(root).resolve()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bandwidth = bandwidth
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.chunked = chunked
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._blobs: dict[str, bytes] = {}
+        self._keys: Optional[list[str]] = None
+        self._stats: dict[str, int] = {}
+        self.reset_stats()
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeWBLENServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-wblen", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeWBLENServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---- stats -----------------------------------------------------------
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {
+                "connections": 0, "requests": 0, "bytes_sent": 0, "errors_injected": 0,
+                "list_requests": 0, "range_requests": 0, "stalls_injected": 0,
+            }
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def _on_request(self) -> None:
+        self._count("requests")
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    # ---- content -------------------------------------------------------
+
+    def _blob(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._blobs.get(key)
+        if body is not None:
+            return body
+        path = (self.root / key).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+        body = path.read_bytes()
+        if path.suffix == ".json":
+            body = body.replace(BASE_PLACEHOLDER.encode(), self.base_url.encode())
+        with self._lock:
+            self._blobs[key] = body
+        return body
+
+    def _all_keys(self) -> list[str]:
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(
+                    p.relative_to(self.root).as_posix()
+                    for p in self.root.rglob("*") if p.is_file()
+                )
+            return self._keys
+
+    def _list_xml(self, query: dict[str, list[str]]) -> bytes:
+        prefix = query.get("prefix", [""])[0]
+        max_keys = int(query.get("max-keys", ["1000"])[0])
+        token = query.get("continuation-token", [None])[0]
+        keys = self._all_keys()
+        if token:
+            pos = bisect.bisect_right(keys, base64.urlsafe_b64decode(token).decode())
+        else:
+            pos = bisect.bisect_left(keys, prefix)
+        page: list[str] = []
+        while pos < len(keys) and keys[pos].startswith(prefix) and len(page) < max_keys:
+            page.append(keys[pos])
+            pos += 1
+        truncated = pos < len(keys) and keys[pos].startswith(prefix)
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">',
+            "<Name>globalnightlight</Name>",
+            f"<Prefix>{escape(prefix)}</Prefix>",
+            f"<KeyCount>{len(page)}</KeyCount>",
+            f"<MaxKeys>{max_keys}</MaxKeys>",
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>",
+        ]
+        for key in page:
+            size = (self.root / key).stat().st_size
+            parts.append(f"<Contents><Key>{escape(key)}</Key><Size>{size}</Size></Contents>")
+        if truncated:
+            nxt = base64.urlsafe_b64encode(page[-1].encode()).decode()
+            parts.append(f"<NextContinuationToken>{nxt}</NextContinuationToken>")
+        parts.append("</ListBucketResult>")
+        return "".join(parts).encode()
+
+    def _write(self, wfile, body: bytes, chunked: bool = False) -> None:
+        if not self.bandwidth and not chunked:
+            wfile.write(body)
+        else:
+            chunk = 64 * 1024
+            for i in range(0, len(body), chunk):
+                piece = body[i:i + chunk]
+                wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+                if self.bandwidth:
+                    time.sleep(len(piece) / self.bandwidth)
+            if chunked:
+                wfile.write(b"0\r\n\r\n")
+        self._count("bytes_sent", len(body))
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def get_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--root", required=True, type=Path, help="fixture directory")
+    p.add_argument("--build", action="store_true", help="(re)build the fixture first")
+    p.add_argument("--days", type=int, default=6)
+    p.add_argument("--orbits-per-day", type=int, default=4)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503s")
+    p.add_argument("--bandwidth", type=float, default=None, help="bytes/s per response")
+    p.add_argument("--stall-rate", type=float, default=0.0, help="fraction of stalled range GETs")
+    p.add_argument("--stall-seconds", type=float, default=5.0)
+    p.add_argument("--chunked", action="store_true", help="chunked whole-object GETs")
+    return p.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    args = get_args()
+    if args.build or load_fixture(args.root) is None:
+        print(f"building fixture under {args.root} ...")
+        build_fixture(args.root, n_days=args.days, orbits_per_day=args.orbits_per_day)
+    server = FakeWBLENServer(
+        args.root, host=args.host, port=args.port, latency=args.latency,
+        error_rate=args.error_rate, bandwidth=args.bandwidth,
+        stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        chunked=args.chunked,
+    )
+    print(f"serving {args.root} at {server.base_url}")
+    print(f"  export NTL_WBLEN_BASE_URL={server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,7 +34,7 @@ def fetch_one(sensor: str, start, end, cache: Path) -> dict:
     if not items:
         raise SystemExit(f"no {sensor} items found")
     orbit = orbitref_from_item(items[0], sensor)
-    reader = WindowedCOGReader(cache)
+    reader = WindowedCOGReader(cache, PARIS_BBOX)
     out = {"orbit": orbit}
     for layer, url in (
         ("radiance", orbit.radiance_url),
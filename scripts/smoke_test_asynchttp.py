@@ -0,0 +1,109 @@
+"""Smoke test for `harmonizer.asynchttp.AsyncHTTPPool` against `scripts.fake_wblen`.
+
+Checks the hand-written HTTP/1.1 client on the paths discovery and the
+`range` raster backend rely on:
+
+  - keep-alive: many sequential and concurrent GETs through a pool capped
+    at two connections per host open at most two server connections
+  - chunked bodies: with the server sending whole objects chunked, GETs
+    return the exact file bytes (a COG spans many chunks); ranged GETs
+    (Content-Length) keep working on the same connections
+  - errors: a missing key raises `urllib.error.HTTPError` 404
+  - timeouts: a ranged GET stalled past `timeout` raises
+    `asyncio.TimeoutError`, and the pool stays usable afterwards
+
+Run:
+    python -m scripts.smoke_test_asynchttp
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import tempfile
+import urllib.error
+from pathlib import Path
+
+from scripts.fake_wblen import FakeWBLENServer, build_fixture
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+log = logging.getLogger("smoke_test_asynchttp")
+
+CONNECTIONS_PER_HOST = 2
+N_REQUESTS = 40
+
+
+def check(ok: bool, what: str, failures: list[str]) -> None:
+    log.info("%-60s %s", what, "ok" if ok else "FAILED")
+    if not ok:
+        failures.append(what)
+
+
+async def keep_alive_and_chunked(root: Path, failures: list[str]) -> None:
+    from harmonizer.asynchttp import AsyncHTTPPool
+
+    cog = next(root.rglob("*.rade9.co.tif")).relative_to(root).as_posix()
+    body = (root / cog).read_bytes()
+    with FakeWBLENServer(root, chunked=True) as server:
+        pool = AsyncHTTPPool(max_connections_per_host=CONNECTIONS_PER_HOST, timeout=10)
+        try:
+            url = f"{server.base_url}/{cog}"
+            for _ in range(N_REQUESTS // 2):
+                resp = await pool.request(url, headers={"Range": "bytes=0-1023"})
+                if resp.status != 206 or resp.body != body[:1024]:
+                    break
+            check(resp.status == 206 and resp.body == body[:1024],
+                  "sequential ranged GETs return the requested bytes", failures)
+
+            got = await asyncio.gather(*(pool.get(url) for _ in range(N_REQUESTS // 2)))
+            check(all(g == body for g in got),
+                  f"concurrent chunked GETs return the {len(body)}-byte file", failures)
+            check(server.stats()["connections"] <= CONNECTIONS_PER_HOST,
+                  f"{N_REQUESTS} requests over <= {CONNECTIONS_PER_HOST} connections "
+                  f"(used {server.stats()['connections']})", failures)
+
+            try:
+                await pool.get(f"{server.base_url}/no/such/key.json")
+                check(False, "missing key raises HTTPError 404", failures)
+            except urllib.error.HTTPError as e:
+                check(e.code == 404, "missing key raises HTTPError 404", failures)
+        finally:
+            await pool.close()
+
+
+async def timeout(root: Path, failures: list[str]) -> None:
+    from harmonizer.asynchttp import AsyncHTTPPool
+
+    cog = next(root.rglob("*.vflag.co.tif")).relative_to(root).as_posix()
+    with FakeWBLENServer(root, stall_rate=1.0, stall_seconds=3.0) as server:
+        pool = AsyncHTTPPool(max_connections_per_host=CONNECTIONS_PER_HOST, timeout=0.5)
+        try:
+            url = f"{server.base_url}/{cog}"
+            try:
+                await pool.request(url, headers={"Range": "bytes=0-1023"})
+                check(False, "stalled ranged GET times out", failures)
+            except asyncio.TimeoutError:
+                check(True, "stalled ranged GET times out", failures)
+            # Whole-object GETs aren't stalled: the pool must still work.
+            resp = await pool.request(url, timeout=10)
+            check(resp.status == 200, "pool still usable after a timeout", failures)
+        finally:
+            await pool.close()
+
+
+def main() -> int:
+    failures: list[str] = []
+    with tempfile.TemporaryDirectory() as td:
+        root = Path(td)
+        build_fixture(root, sensors=("viirs_npp",), n_days=1, orbits_per_day=1)
+        asyncio.run(keep_alive_and_chunked(root, failures))
+        asyncio.run(timeout(root, failures))
+    if failures:
+        log.error("FAILED: %s", "; ".join(failures))
+        return 1
+    log.info("all checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -64,7 +64,7 @@ def stage2(orbit: "OrbitRef", cache_dir: Path) -> None:
         print("  (rasterio not installed; skipping windowed read)")
         return
     print(f"\n=== Stage 2: windowed read of {orbit.sensor} {orbit.orbit_id} ===")
-    reader = WindowedCOGReader(cache_dir)
+    reader = WindowedCOGReader(cache_dir, PARIS_BBOX)
     for layer, url in (
         ("radiance", orbit.radiance_url),
         ("li", orbit.li_url),